@@ -0,0 +1,55 @@
+# @author: fatima bashir
+from typing import Optional
+import secrets
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.services.embedding_batcher import EmbeddingCoalescer
+from app.services.ingestion import DocumentIngestionService
+from app.services.registry import ModelRegistry, get_registry
+from app.services.rerank import RerankService
+from app.services.search import SearchService
+
+
+def get_embedding_coalescer(
+    registry: ModelRegistry = Depends(get_registry),
+) -> EmbeddingCoalescer:
+    """Get the shared embedding coalescer."""
+    return registry.embedding_coalescer
+
+
+def get_rerank_service(
+    registry: ModelRegistry = Depends(get_registry),
+) -> RerankService:
+    """Get the shared rerank service."""
+    return registry.rerank_service
+
+
+def get_search_service(
+    db: AsyncSession = Depends(get_read_db),
+    registry: ModelRegistry = Depends(get_registry),
+) -> SearchService:
+    """Get a search service bound to a read (replica when configured) session."""
+    return SearchService(
+        db,
+        embedding_service=registry.embedding_service,
+        embedding_coalescer=registry.embedding_coalescer,
+    )
+
+
+def get_ingestion_service(
+    db: AsyncSession = Depends(get_db),
+    registry: ModelRegistry = Depends(get_registry),
+) -> DocumentIngestionService:
+    """Get a document ingestion service bound to the request's database session."""
+    return DocumentIngestionService(db, registry.embedding_service)
+
+
+def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """Reject requests without the configured admin API key."""
+    if not settings.ADMIN_API_KEY or not x_admin_key or not secrets.compare_digest(
+        x_admin_key, settings.ADMIN_API_KEY
+    ):
+        raise HTTPException(status_code=403, detail="Admin access denied")
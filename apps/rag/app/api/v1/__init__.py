@@ -1,6 +1,6 @@
 # @author: fatima bashir
 from fastapi import APIRouter
-from app.api.v1.endpoints import search, embeddings, documents
+from app.api.v1.endpoints import search, embeddings, documents, admin
 
 api_router = APIRouter()
 
@@ -9,3 +9,4 @@ api_router.include_router(search.router, prefix="/search", tags=["search"])
 api_router.include_router(embeddings.router, prefix="/embeddings", tags=["embeddings"])
 api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
 
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
@@ -0,0 +1,71 @@
+# @author: fatima bashir
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+import structlog
+
+from app.api.deps import require_admin
+from app.services.ann_index import ANN_INDEXES, ann_index_manager
+
+logger = structlog.get_logger()
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/indexes")
+async def list_indexes():
+    """
+    Report the status of every managed ANN index.
+    """
+    try:
+        return {"indexes": await ann_index_manager.get_all_status()}
+
+    except Exception as e:
+        logger.error("Index status failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/indexes/maintain")
+async def maintain_indexes():
+    """
+    Build missing ANN indexes and rebuild any the data has outgrown.
+    """
+    try:
+        return {"indexes": await ann_index_manager.maintain()}
+
+    except Exception as e:
+        logger.error("Index maintenance failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/indexes/{table}/build")
+async def build_index(table: str, method: Optional[str] = None):
+    """
+    Build or rebuild the ANN index for a table concurrently.
+    """
+    if table not in ANN_INDEXES:
+        raise HTTPException(status_code=404, detail=f"No ANN index is managed for table: {table}")
+
+    try:
+        logger.info("Index build requested", table=table, method=method)
+        return await ann_index_manager.build_index(table, method)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Index build failed", table=table, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/indexes/tenants/{user_id}/build")
+async def build_tenant_index(user_id: str, method: Optional[str] = None):
+    """
+    Build or rebuild the partial doc_chunks ANN index for one user concurrently.
+    """
+    try:
+        logger.info("Tenant index build requested", user_id=user_id, method=method)
+        return await ann_index_manager.build_tenant_index(user_id, method)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Tenant index build failed", user_id=user_id, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
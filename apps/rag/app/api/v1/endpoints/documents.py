@@ -4,7 +4,9 @@ from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
 from pydantic import BaseModel
 import structlog
 
+from app.api.deps import get_ingestion_service
 from app.core.database import get_db
+from app.services.ingestion import DocumentIngestionService
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -30,7 +32,7 @@ class DocumentResponse(BaseModel):
 async def upload_document(
     file: UploadFile = File(...),
     metadata: Optional[str] = None,
-    db = Depends(get_db),
+    ingestion_service: DocumentIngestionService = Depends(get_ingestion_service),
 ):
     """
     Upload and process a document for RAG.
@@ -38,18 +40,25 @@ async def upload_document(
     try:
         logger.info("Document upload started", filename=file.filename)
         
-        # TODO: Implement document processing
-        # - Save file to storage
-        # - Extract text content
-        # - Chunk the document
-        # - Generate embeddings
-        # - Store in database
+        document_metadata = (
+            DocumentMetadata.parse_raw(metadata)
+            if metadata
+            else DocumentMetadata(title=file.filename or "Untitled", type="document")
+        )
+        
+        result = await ingestion_service.ingest_upload(
+            file,
+            title=document_metadata.title,
+            artifact_type=document_metadata.type,
+            user_id=document_metadata.user_id,
+            source=document_metadata.source,
+        )
         
         return DocumentResponse(
-            id="placeholder-id",
-            title=file.filename or "Untitled",
-            chunks_created=0,
-            processing_status="pending",
+            id=result["id"],
+            title=document_metadata.title,
+            chunks_created=result["chunks_created"],
+            processing_status="completed",
         )
         
     except Exception as e:
@@ -77,7 +86,7 @@ async def list_documents(
 @router.delete("/{document_id}")
 async def delete_document(
     document_id: str,
-    db = Depends(get_db),
+    ingestion_service: DocumentIngestionService = Depends(get_ingestion_service),
 ):
     """
     Delete a document and its chunks.
@@ -85,14 +94,10 @@ async def delete_document(
     try:
         logger.info("Document deletion started", document_id=document_id)
         
-        # TODO: Implement document deletion
-        # - Remove from storage
-        # - Delete chunks from database
-        # - Remove embeddings
+        chunks_deleted = await ingestion_service.delete_document(document_id)
         
-        return {"message": "Document deleted successfully"}
+        return {"message": "Document deleted successfully", "chunks_deleted": chunks_deleted}
         
     except Exception as e:
         logger.error("Document deletion failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
-
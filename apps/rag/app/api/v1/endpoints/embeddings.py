@@ -1,10 +1,11 @@
 # @author: fatima bashir
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 import structlog
 
-from app.services.embeddings import EmbeddingService
+from app.api.deps import get_embedding_coalescer
+from app.services.embedding_batcher import EmbeddingCoalescer
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -23,15 +24,17 @@ class EmbeddingResponse(BaseModel):
 
 
 @router.post("/generate", response_model=EmbeddingResponse)
-async def generate_embeddings(request: EmbeddingRequest):
+async def generate_embeddings(
+    request: EmbeddingRequest,
+    coalescer: EmbeddingCoalescer = Depends(get_embedding_coalescer),
+):
     """
     Generate embeddings for given texts.
     """
     try:
         logger.info("Generating embeddings", text_count=len(request.texts))
         
-        embedding_service = EmbeddingService()
-        embeddings = await embedding_service.embed_texts(request.texts)
+        embeddings = await coalescer.embed_many(request.texts)
         
         return EmbeddingResponse(
             embeddings=embeddings,
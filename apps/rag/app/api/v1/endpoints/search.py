@@ -1,12 +1,19 @@
 # @author: fatima bashir
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import structlog
 
-from app.core.database import get_db
+from app.api.deps import get_rerank_service, get_search_service
+from app.core.config import settings
+from app.core.metrics import get_request_timings, stage_timer
 from app.services.search import SearchService
 from app.services.rerank import RerankService
+from app.services.result_cache import search_result_cache
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -19,6 +26,7 @@ class SearchQuery(BaseModel):
     top_k: int = 10
     include_metadata: bool = True
     filters: Optional[dict] = None
+    recall_tier: Optional[str] = None  # "fast", "balanced" or "accurate"
 
 
 class SearchResult(BaseModel):
@@ -37,35 +45,76 @@ class SearchResponse(BaseModel):
     search_time_ms: float
 
 
+class BatchSearchRequest(BaseModel):
+    """Batch search request model."""
+    queries: List[SearchQuery]
+
+
+class BatchSearchResponse(BaseModel):
+    """Batch search response model; responses are in request order."""
+    responses: List[SearchResponse]
+    total_queries: int
+    search_time_ms: float
+    timings_ms: Dict[str, float]
+
+
 @router.post("/hybrid", response_model=SearchResponse)
 async def hybrid_search(
     query: SearchQuery,
-    db = Depends(get_db),
+    search_service: SearchService = Depends(get_search_service),
+    rerank_service: RerankService = Depends(get_rerank_service),
 ):
     """
     Perform hybrid search using BM25 + semantic similarity + reranking.
     """
     try:
+        started = time.perf_counter()
         logger.info("Hybrid search request", query=query.query, user_id=query.user_id)
         
-        # Initialize services
-        search_service = SearchService(db)
-        rerank_service = RerankService()
-        
-        # Perform search
-        results = await search_service.hybrid_search(
-            query=query.query,
-            user_id=query.user_id,
-            top_k=query.top_k,
-            filters=query.filters,
-        )
+        cache_variant = f"hybrid:{query.recall_tier or settings.ANN_DEFAULT_TIER}"
+        generation, reranked_results = None, None
+        if settings.SEARCH_CACHE_ENABLED:
+            with stage_timer("search_cache"):
+                generation, reranked_results = await search_result_cache.get(
+                    query.query, query.user_id, query.filters, query.top_k, cache_variant
+                )
         
-        # Rerank results
-        reranked_results = await rerank_service.rerank(
-            query=query.query,
-            results=results,
-            top_k=min(query.top_k, 10)  # Limit reranking
-        )
+        if reranked_results is None:
+            # Fetch extra candidates for the cascade reranker to narrow down
+            candidates = max(query.top_k, settings.RERANK_CANDIDATES)
+            await search_service.set_recall_tier(
+                query.recall_tier,
+                search_service.semantic_ann_limit(
+                    candidates * settings.HYBRID_CANDIDATE_MULTIPLIER
+                ),
+            )
+            
+            # Perform search
+            results = await search_service.hybrid_search(
+                query=query.query,
+                user_id=query.user_id,
+                top_k=candidates,
+                filters=query.filters,
+            )
+            
+            # Rerank results
+            with stage_timer("rerank"):
+                reranked_results = await rerank_service.rerank(
+                    query=query.query,
+                    results=results,
+                    top_k=min(query.top_k, 10)  # Limit reranking
+                )
+            
+            if settings.SEARCH_CACHE_ENABLED:
+                await search_result_cache.set(
+                    query.query,
+                    query.user_id,
+                    query.filters,
+                    query.top_k,
+                    reranked_results,
+                    generation,
+                    cache_variant,
+                )
         
         # Format response
         search_results = [
@@ -82,7 +131,7 @@ async def hybrid_search(
             results=search_results,
             query=query.query,
             total_results=len(search_results),
-            search_time_ms=0.0,  # TODO: Add timing
+            search_time_ms=round((time.perf_counter() - started) * 1000, 3),
         )
         
     except Exception as e:
@@ -90,18 +139,240 @@ async def hybrid_search(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/batch", response_model=BatchSearchResponse)
+async def batch_search(
+    request: BatchSearchRequest,
+    search_service: SearchService = Depends(get_search_service),
+    rerank_service: RerankService = Depends(get_rerank_service),
+):
+    """
+    Perform hybrid search with reranking for many queries in one request.
+    
+    Cache misses are embedded in one call, searched concurrently over the
+    read pool and reranked in one cross-encoder batch. Each response's
+    search_time_ms covers its own cache lookup and SQL; the shared stages
+    are reported once in timings_ms.
+    """
+    queries = request.queries
+    if not queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    if len(queries) > settings.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.SEARCH_BATCH_MAX_QUERIES} queries per batch",
+        )
+    
+    try:
+        started = time.perf_counter()
+        logger.info("Batch search request", queries=len(queries))
+        
+        cache_variants = [
+            f"hybrid:{query.recall_tier or settings.ANN_DEFAULT_TIER}" for query in queries
+        ]
+        elapsed_ms = [0.0] * len(queries)
+        generations: List[Any] = [None] * len(queries)
+        reranked: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+        if settings.SEARCH_CACHE_ENABLED:
+            async def cache_lookup(index: int):
+                lookup_started = time.perf_counter()
+                query = queries[index]
+                generations[index], reranked[index] = await search_result_cache.get(
+                    query.query, query.user_id, query.filters, query.top_k, cache_variants[index]
+                )
+                elapsed_ms[index] += (time.perf_counter() - lookup_started) * 1000
+            
+            with stage_timer("search_cache"):
+                await asyncio.gather(*[cache_lookup(i) for i in range(len(queries))])
+        
+        misses = [i for i, results in enumerate(reranked) if results is None]
+        if misses:
+            # Fetch extra candidates for the cascade reranker to narrow down
+            outcomes = await search_service.hybrid_search_batch([
+                {
+                    "query": queries[i].query,
+                    "user_id": queries[i].user_id,
+                    "top_k": max(queries[i].top_k, settings.RERANK_CANDIDATES),
+                    "filters": queries[i].filters,
+                    "recall_tier": queries[i].recall_tier,
+                }
+                for i in misses
+            ])
+            for i, (_, search_ms) in zip(misses, outcomes):
+                elapsed_ms[i] += search_ms
+            
+            with stage_timer("rerank"):
+                reranked_batch = await rerank_service.rerank_batch(
+                    [queries[i].query for i in misses],
+                    [results for results, _ in outcomes],
+                    [min(queries[i].top_k, 10) for i in misses],  # Limit reranking
+                )
+            
+            for i, results in zip(misses, reranked_batch):
+                reranked[i] = results
+                if settings.SEARCH_CACHE_ENABLED:
+                    query = queries[i]
+                    await search_result_cache.set(
+                        query.query,
+                        query.user_id,
+                        query.filters,
+                        query.top_k,
+                        results,
+                        generations[i],
+                        cache_variants[i],
+                    )
+        
+        responses = []
+        for query, results, search_ms in zip(queries, reranked, elapsed_ms):
+            search_results = [
+                SearchResult(**_format_result(result, query.include_metadata))
+                for result in results
+            ]
+            responses.append(SearchResponse(
+                results=search_results,
+                query=query.query,
+                total_results=len(search_results),
+                search_time_ms=round(search_ms, 3),
+            ))
+        
+        return BatchSearchResponse(
+            responses=responses,
+            total_queries=len(responses),
+            search_time_ms=round((time.perf_counter() - started) * 1000, 3),
+            timings_ms=get_request_timings(),
+        )
+        
+    except Exception as e:
+        logger.error("Batch search failed", error=str(e), queries=len(queries))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/hybrid/stream")
+async def hybrid_search_stream(
+    query: SearchQuery,
+    request: Request,
+    search_service: SearchService = Depends(get_search_service),
+    rerank_service: RerankService = Depends(get_rerank_service),
+):
+    """
+    Stream hybrid search: fused results as soon as they are ready, then the reranked order.
+    
+    Responds with Server-Sent Events when the client accepts
+    text/event-stream and with NDJSON otherwise.
+    """
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    return StreamingResponse(
+        _hybrid_search_events(query, search_service, rerank_service, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _hybrid_search_events(
+    query: SearchQuery,
+    search_service: SearchService,
+    rerank_service: RerankService,
+    sse: bool,
+) -> AsyncIterator[str]:
+    """Yield fused, reranked and done events for a hybrid search."""
+    started = time.perf_counter()
+    try:
+        logger.info("Streaming hybrid search request", query=query.query, user_id=query.user_id)
+        
+        cache_variant = f"hybrid:{query.recall_tier or settings.ANN_DEFAULT_TIER}"
+        generation, reranked_results = None, None
+        if settings.SEARCH_CACHE_ENABLED:
+            with stage_timer("search_cache"):
+                generation, reranked_results = await search_result_cache.get(
+                    query.query, query.user_id, query.filters, query.top_k, cache_variant
+                )
+        
+        if reranked_results is None:
+            candidates = max(query.top_k, settings.RERANK_CANDIDATES)
+            await search_service.set_recall_tier(
+                query.recall_tier,
+                search_service.semantic_ann_limit(
+                    candidates * settings.HYBRID_CANDIDATE_MULTIPLIER
+                ),
+            )
+            results = await search_service.hybrid_search(
+                query=query.query,
+                user_id=query.user_id,
+                top_k=candidates,
+                filters=query.filters,
+            )
+            yield _encode_event("fused", {
+                "results": [_format_result(r, query.include_metadata) for r in results[:query.top_k]],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            }, sse)
+            
+            with stage_timer("rerank"):
+                reranked_results = await rerank_service.rerank(
+                    query=query.query,
+                    results=results,
+                    top_k=min(query.top_k, 10)  # Limit reranking
+                )
+            
+            if settings.SEARCH_CACHE_ENABLED:
+                await search_result_cache.set(
+                    query.query,
+                    query.user_id,
+                    query.filters,
+                    query.top_k,
+                    reranked_results,
+                    generation,
+                    cache_variant,
+                )
+        
+        yield _encode_event("reranked", {
+            "results": [_format_result(r, query.include_metadata) for r in reranked_results],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }, sse)
+        yield _encode_event("done", {
+            "query": query.query,
+            "total_results": len(reranked_results),
+            "search_time_ms": round((time.perf_counter() - started) * 1000, 3),
+            "timings_ms": get_request_timings(),
+        }, sse)
+        
+    except Exception as e:
+        # Headers are already sent, so failures are reported in-band
+        logger.error("Streaming hybrid search failed", error=str(e))
+        yield _encode_event("error", {"detail": str(e)}, sse)
+
+
+def _format_result(result: Dict[str, Any], include_metadata: bool) -> Dict[str, Any]:
+    """Serialize a search result like SearchResult."""
+    return SearchResult(
+        content=result["content"],
+        score=result["score"],
+        metadata=result.get("metadata") if include_metadata else None,
+        source=result.get("source"),
+    ).dict()
+
+
+def _encode_event(event: str, data: Dict[str, Any], sse: bool) -> str:
+    """Encode one stream event as an SSE message or an NDJSON line."""
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    return json.dumps({"event": event, **data}, default=str) + "\n"
+
+
 @router.post("/semantic", response_model=SearchResponse)
 async def semantic_search(
     query: SearchQuery,
-    db = Depends(get_db),
+    search_service: SearchService = Depends(get_search_service),
 ):
     """
     Perform semantic search using vector similarity.
     """
     try:
+        started = time.perf_counter()
         logger.info("Semantic search request", query=query.query, user_id=query.user_id)
         
-        search_service = SearchService(db)
+        if not search_service.serves_locally(query.user_id):
+            await search_service.set_recall_tier(
+                query.recall_tier, search_service.semantic_ann_limit(query.top_k)
+            )
         results = await search_service.semantic_search(
             query=query.query,
             user_id=query.user_id,
@@ -123,7 +394,7 @@ async def semantic_search(
             results=search_results,
             query=query.query,
             total_results=len(search_results),
-            search_time_ms=0.0,
+            search_time_ms=round((time.perf_counter() - started) * 1000, 3),
         )
         
     except Exception as e:
@@ -134,15 +405,15 @@ async def semantic_search(
 @router.post("/keyword", response_model=SearchResponse)
 async def keyword_search(
     query: SearchQuery,
-    db = Depends(get_db),
+    search_service: SearchService = Depends(get_search_service),
 ):
     """
     Perform keyword search using BM25.
     """
     try:
+        started = time.perf_counter()
         logger.info("Keyword search request", query=query.query, user_id=query.user_id)
         
-        search_service = SearchService(db)
         results = await search_service.keyword_search(
             query=query.query,
             user_id=query.user_id,
@@ -164,7 +435,7 @@ async def keyword_search(
             results=search_results,
             query=query.query,
             total_results=len(search_results),
-            search_time_ms=0.0,
+            search_time_ms=round((time.perf_counter() - started) * 1000, 3),
         )
         
     except Exception as e:
@@ -0,0 +1,194 @@
+# @author: fatima bashir
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, List, Sequence
+import json
+import struct
+import time
+import numpy as np
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Columns written for each doc_chunks row, in COPY order
+DOC_CHUNK_COLUMNS = (
+    "id",
+    "artifact_id",
+    "content",
+    "embedding",
+    "metadata",
+    "chunk_index",
+)
+
+
+def encode_vector(value: Any) -> bytes:
+    """Encode a vector in pgvector's binary format (dim, unused, float32 BE values)."""
+    vector = np.asarray(value, dtype=">f4")
+    return struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Decode pgvector's binary format into a float32 array."""
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4).astype(np.float32)
+
+
+async def register_vector_codec(connection) -> None:
+    """Register the binary pgvector codec on a raw asyncpg connection."""
+    await connection.set_type_codec(
+        "vector",
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary",
+    )
+
+
+async def get_asyncpg_connection(session: AsyncSession):
+    """Get the raw asyncpg connection behind a session."""
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    return raw.driver_connection
+
+
+@asynccontextmanager
+async def vector_connection(session: AsyncSession):
+    """
+    The raw asyncpg connection behind a session, with the binary vector codec.
+
+    The codec is removed again on exit, before the connection can go back
+    to the pool: SQLAlchemy statements bind vectors as text, which the
+    binary encoder rejects. Nested uses share one registration.
+    """
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    driver_connection = raw.driver_connection
+
+    depth = raw.info.get("vector_codec_depth", 0)
+    if depth == 0:
+        await register_vector_codec(driver_connection)
+    raw.info["vector_codec_depth"] = depth + 1
+    try:
+        yield driver_connection
+    finally:
+        raw.info["vector_codec_depth"] -= 1
+        if raw.info["vector_codec_depth"] == 0:
+            try:
+                await driver_connection.reset_type_codec("vector")
+            except Exception as e:
+                # e.g. an aborted transaction; never pool a connection that keeps the codec
+                logger.warning("Vector codec reset failed, discarding connection", error=str(e))
+                await connection.invalidate()
+
+
+class BulkWriteStats:
+    """Rows written and throughput for a bulk write."""
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+class DocChunkWriter:
+    """Bulk upserts doc_chunks rows with binary COPY into a staging table."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        batch_size: int = settings.BULK_WRITE_BATCH_SIZE,
+        update_columns: Sequence[str] = ("content", "embedding", "metadata", "chunk_index"),
+    ):
+        self.session = session
+        self.batch_size = batch_size
+        self.update_columns = update_columns
+        self.stats = BulkWriteStats()
+
+    async def write(self, rows: Iterable[Dict[str, Any]]) -> BulkWriteStats:
+        """
+        Upsert rows (dicts keyed by DOC_CHUNK_COLUMNS) in COPY batches.
+        """
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(self._to_record(row))
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+
+        if batch:
+            await self._flush(batch)
+
+        return self.stats
+
+    async def _flush(self, records: List[tuple]) -> None:
+        """
+        COPY one batch into the staging table and merge it into doc_chunks.
+        """
+        started = time.perf_counter()
+        columns = ", ".join(DOC_CHUNK_COLUMNS)
+
+        try:
+            async with vector_connection(self.session) as connection:
+                # CREATE ... AS copies column types without NOT NULL constraints
+                await connection.execute(f"""
+                    CREATE TEMP TABLE IF NOT EXISTS doc_chunks_staging ON COMMIT DROP AS
+                    SELECT {columns} FROM doc_chunks WITH NO DATA
+                """)
+                await connection.execute("TRUNCATE doc_chunks_staging")
+
+                await connection.copy_records_to_table(
+                    "doc_chunks_staging",
+                    records=records,
+                    columns=DOC_CHUNK_COLUMNS,
+                )
+
+                updates = ", ".join(
+                    f"{column} = EXCLUDED.{column}" for column in self.update_columns
+                )
+                await connection.execute(f"""
+                    INSERT INTO doc_chunks ({columns}, created_at, updated_at)
+                    SELECT {columns}, now(), now() FROM doc_chunks_staging
+                    ON CONFLICT (id) DO UPDATE SET {updates}, updated_at = now()
+                """)
+
+        except Exception as e:
+            logger.error("Bulk doc_chunks write failed", error=str(e), batch_size=len(records))
+            raise
+
+        self.stats.rows += len(records)
+        self.stats.batches += 1
+        self.stats.seconds += time.perf_counter() - started
+
+        logger.debug(
+            "Bulk doc_chunks batch written",
+            batch_size=len(records),
+            rows_per_second=round(self.stats.rows_per_second, 1),
+        )
+
+    @staticmethod
+    def _to_record(row: Dict[str, Any]) -> tuple:
+        """
+        Convert a row dict into a COPY record in column order.
+        """
+        metadata = row.get("metadata")
+        return (
+            row["id"],
+            row.get("artifact_id"),
+            row["content"],
+            row.get("embedding"),
+            json.dumps(metadata) if isinstance(metadata, dict) else metadata,
+            row.get("chunk_index", 0),
+        )
@@ -21,21 +21,75 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "password"
     POSTGRES_DB: str = "mentorly"
+    DATABASE_READ_URL: Optional[str] = None  # Read replica for search traffic
+    READ_REPLICA_MAX_LAG: float = 5.0  # seconds; cached searches re-invalidated after this
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 256  # Prepared statements per connection; 0 for PgBouncer
     
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_CACHE_TTL: int = 3600  # 1 hour
     
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000  # In-process LRU tier
+    
+    # Search Result Cache Configuration
+    SEARCH_CACHE_ENABLED: bool = True
+    
     # OpenAI Configuration
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4"
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     EMBEDDING_DIMENSION: int = 1536
+    EMBEDDING_PROVIDER: str = "openai"  # "openai" or "hash" (deterministic, offline; benchmarks)
+    EMBEDDING_BATCH_MAX_TOKENS: int = 40000  # Estimated tokens per request
+    EMBEDDING_BATCH_MAX_ITEMS: int = 256
+    EMBEDDING_MAX_CONCURRENCY: int = 8
+    EMBEDDING_MAX_RETRIES: int = 3
+    EMBEDDING_RETRY_BASE_DELAY: float = 0.5  # seconds
+    EMBEDDING_TOKENS_PER_MINUTE: int = 0  # 0 disables client-side rate limiting
+    EMBEDDING_COALESCE_WINDOW_MS: float = 3.0  # Micro-batching window for queries
+    EMBEDDING_COALESCE_MAX_BATCH: int = 64
+    
+    # OpenAI HTTP Client Configuration (one pooled client per process)
+    OPENAI_HTTP2: bool = True
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    OPENAI_CONNECT_TIMEOUT: float = 5.0
+    OPENAI_READ_TIMEOUT: float = 60.0
+    OPENAI_WRITE_TIMEOUT: float = 10.0
+    OPENAI_POOL_TIMEOUT: float = 5.0  # Wait for a free pooled connection
+    
+    # Model Configuration
+    FALLBACK_EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-2-v2"
+    MODEL_WARMUP: bool = True  # Load and warm models at startup
+    
+    # Rerank Worker Pool Configuration
+    RERANK_EXECUTOR: str = "thread"  # "thread" or "process"
+    RERANK_WORKERS: int = 2
+    RERANK_TORCH_THREADS: int = 2  # torch.set_num_threads per worker
+    RERANK_MAX_BATCH_PAIRS: int = 128  # Pairs merged into one predict call
+    RERANK_BATCH_WINDOW_MS: float = 2.0
+    RERANK_MAX_QUEUE: int = 256  # Pending requests before new ones are shed
+    RERANK_CANDIDATES: int = 30  # Hybrid candidates fetched for reranking
+    RERANK_PREFILTER_TOP_N: int = 15  # Candidates kept for the cross-encoder
+    RERANK_PREFILTER_KEYWORD_SLOTS: int = 5  # Of those, places reserved for the best keyword matches
+    RERANK_MAX_PASSAGE_TOKENS: int = 256
     
     # RAG Configuration
     MAX_CONTEXT_LENGTH: int = 8000
     CHUNK_SIZE: int = 512
     CHUNK_OVERLAP: int = 50
+    INGEST_BATCH_SIZE: int = 64  # Chunks embedded and written per batch
+    UPLOAD_READ_SIZE: int = 1024 * 1024  # Bytes read per upload chunk
+    BULK_WRITE_BATCH_SIZE: int = 1000  # Rows per COPY batch
     TOP_K_RETRIEVAL: int = 10
     RERANK_TOP_K: int = 5
     
@@ -43,6 +97,49 @@ class Settings(BaseSettings):
     SEMANTIC_SEARCH_WEIGHT: float = 0.7
     BM25_SEARCH_WEIGHT: float = 0.3
     SIMILARITY_THRESHOLD: float = 0.5
+    HYBRID_SEARCH_MODE: str = "fused"  # "fused" (single SQL statement) or "parallel" (legs on two read connections)
+    HYBRID_FUSION: str = "weighted"  # "weighted" or "rrf" (reciprocal rank fusion)
+    HYBRID_CANDIDATE_MULTIPLIER: int = 2  # Candidates per leg = top_k * multiplier
+    SEARCH_BATCH_MAX_QUERIES: int = 100  # Queries accepted by /search/batch
+    SEARCH_BATCH_CONCURRENCY: int = 4  # Queries one batch runs at once (two connections each in "parallel" mode)
+    RRF_K: int = 60
+    
+    # Keyword Engine
+    KEYWORD_ENGINE: str = "trigram"  # "trigram", "fulltext" (stored tsvector) or "bm25" (in-process)
+    KEYWORD_FUZZY_FALLBACK: bool = True  # Retry empty fulltext matches with trigram word similarity
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    BM25_SNAPSHOT_PATH: Optional[str] = "/tmp/mentorly-bm25.pkl"  # Unset to rebuild on every start
+    BM25_REFRESH_INTERVAL: int = 60  # seconds; 0 disables (single worker)
+    
+    # Quantized Semantic Search (packages/database/quantized-embeddings.sql)
+    QUANTIZED_SEARCH: bool = False  # Hamming prefilter on embedding_bits, then rescore
+    QUANTIZED_CANDIDATE_MULTIPLIER: int = 10  # Bit-vector candidates = top_k * multiplier
+    QUANTIZED_RESCORE_COLUMN: str = "embedding_half"  # "embedding_half" or "embedding"
+    
+    # Local Vector Store (in-process HNSW over a memory-mapped matrix)
+    LOCAL_VECTOR_STORE: bool = False  # Serve small tenants' semantic search in-process (not fused)
+    LOCAL_VECTOR_PATH: str = "/tmp/mentorly-vectors"  # Directory for the matrix file
+    LOCAL_VECTOR_MAX_ROWS: int = 1_000_000
+    LOCAL_VECTOR_MAX_TENANT_ROWS: int = 50_000  # Larger tenants stay on pgvector
+    LOCAL_VECTOR_EXACT_MAX_ROWS: int = 20_000  # Filtered subsets up to this size are scanned exactly
+    LOCAL_VECTOR_HNSW_M: int = 16
+    LOCAL_VECTOR_HNSW_EF_CONSTRUCTION: int = 200
+    LOCAL_VECTOR_HNSW_EF_SEARCH: int = 64
+    LOCAL_VECTOR_REFRESH_INTERVAL: int = 60  # seconds; 0 disables (single worker)
+    
+    # ANN Index Configuration
+    ANN_INDEX_METHOD: str = "hnsw"  # "hnsw" or "ivfflat"
+    ANN_MIN_ROWS: int = 10000  # Sequential scans are fine below this
+    ANN_REBUILD_GROWTH_FACTOR: float = 2.0  # Rebuild once rows grow by this factor
+    ANN_AUTO_MAINTAIN: bool = False
+    ANN_MAINTENANCE_INTERVAL: int = 3600  # seconds
+    ANN_MAINTENANCE_WORK_MEM: str = "1GB"
+    ANN_DEFAULT_TIER: str = "balanced"  # "fast", "balanced" or "accurate"
+    TENANT_FILTER_PUSHDOWN: bool = False  # Filter on doc_chunks.user_id/artifact_type (run tenant-columns.sql first)
+    ANN_TENANT_INDEXES: bool = True  # Partial per-user indexes for large tenants (with TENANT_FILTER_PUSHDOWN)
+    ANN_TENANT_INDEX_MIN_ROWS: int = 50000  # Tenant rows before it gets its own index
+    ANN_ITERATIVE_SCAN: Optional[str] = None  # "off", "relaxed_order" or "strict_order"; None: relaxed_order on pgvector >= 0.8
     
     # Minio Configuration
     MINIO_ENDPOINT: str = "localhost:9000"
@@ -53,6 +150,7 @@ class Settings(BaseSettings):
     
     # Security
     SECRET_KEY: str = "your-secret-key-here"
+    ADMIN_API_KEY: Optional[str] = None  # Admin endpoints are disabled when unset
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8080"]
     
     # Logging
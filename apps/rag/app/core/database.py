@@ -1,25 +1,67 @@
 # @author: fatima bashir
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 import structlog
 
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CONNECTIONS, DB_POOL_SATURATION
 
 logger = structlog.get_logger()
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.DEBUG,
-    future=True,
+
+def create_engine(url: str) -> AsyncEngine:
+    """Create an async engine with the configured pool and statement cache."""
+    return create_async_engine(
+        url.replace("postgresql://", "postgresql+asyncpg://"),
+        echo=settings.DEBUG,
+        future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        # Statements are prepared once per connection and reused by SQL text
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+
+
+def register_pool_metrics(name: str, async_engine: AsyncEngine) -> None:
+    """Expose an engine's pool usage as gauges, read at scrape time."""
+    pool = async_engine.sync_engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+    DB_POOL_CONNECTIONS.labels(pool=name, state="checked_out").set_function(pool.checkedout)
+    DB_POOL_CONNECTIONS.labels(pool=name, state="idle").set_function(pool.checkedin)
+    DB_POOL_CONNECTIONS.labels(pool=name, state="overflow").set_function(
+        lambda: max(pool.overflow(), 0)
+    )
+    DB_POOL_SATURATION.labels(pool=name).set_function(
+        lambda: pool.checkedout() / capacity if capacity else 0.0
+    )
+
+
+# Create async engines; reads share the primary unless a replica is configured
+engine = create_engine(settings.DATABASE_URL)
+read_engine = (
+    create_engine(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else engine
 )
 
-# Create async session factory
+register_pool_metrics("primary", engine)
+if read_engine is not engine:
+    register_pool_metrics("replica", read_engine)
+
+# Create async session factories
 AsyncSessionLocal = sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
+ReadSessionLocal = sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
 
 
 async def get_db() -> AsyncSession:
@@ -35,13 +77,32 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db() -> AsyncSession:
+    """Get a read-only database session, served by the replica when configured."""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error("Read database session error", error=str(e))
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
 async def init_db():
     """Initialize database."""
     try:
-        # Test database connection
+        # Test database connections
         async with engine.begin() as conn:
-            await conn.execute("SELECT 1")
-        logger.info("Database connection established successfully")
+            await conn.execute(text("SELECT 1"))
+        if read_engine is not engine:
+            async with read_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        logger.info(
+            "Database connection established successfully",
+            read_replica=read_engine is not engine,
+        )
     except Exception as e:
         logger.error("Failed to connect to database", error=str(e))
         raise
@@ -50,5 +111,6 @@ async def init_db():
 async def close_db():
     """Close database connections."""
     await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
     logger.info("Database connections closed")
-
@@ -0,0 +1,83 @@
+# @author: fatima bashir
+from typing import Any, Callable, Dict
+import time
+
+import httpx
+
+from app.core.metrics import (
+    HTTP_CLIENT_CONNECT_LATENCY,
+    HTTP_CLIENT_CONNECTIONS,
+    HTTP_CLIENT_REQUESTS,
+)
+
+# httpcore trace events that bracket each connection setup phase
+_CONNECT_PHASES = {
+    "connection.connect_tcp": "tcp",
+    "connection.start_tls": "tls",
+}
+
+
+def _connection_trace(name: str) -> Callable:
+    """Build a per-request httpcore trace hook that records connection setup."""
+    starts: Dict[str, float] = {}
+
+    async def trace(event_name: str, info: Dict[str, Any]) -> None:
+        prefix, _, step = event_name.rpartition(".")
+        phase = _CONNECT_PHASES.get(prefix)
+        if phase is None:
+            return
+        if step == "started":
+            starts[prefix] = time.perf_counter()
+        elif step == "complete" and prefix in starts:
+            HTTP_CLIENT_CONNECT_LATENCY.labels(client=name, phase=phase).observe(
+                time.perf_counter() - starts.pop(prefix)
+            )
+            if phase == "tcp":
+                HTTP_CLIENT_CONNECTIONS.labels(client=name).inc()
+
+    return trace
+
+
+def create_http_client(
+    name: str,
+    http2: bool = True,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 30.0,
+    connect_timeout: float = 5.0,
+    read_timeout: float = 60.0,
+    write_timeout: float = 10.0,
+    pool_timeout: float = 5.0,
+) -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP client that records connection metrics under `name`.
+
+    Create one per process in a lifespan hook and reuse it, so requests share
+    kept-alive connections instead of paying TCP and TLS setup every time.
+    """
+
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions = {**request.extensions, "trace": _connection_trace(name)}
+
+    async def on_response(response: httpx.Response) -> None:
+        HTTP_CLIENT_REQUESTS.labels(
+            client=name,
+            http_version=response.http_version,
+            status=str(response.status_code),
+        ).inc()
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        ),
+        event_hooks={"request": [on_request], "response": [on_response]},
+    )
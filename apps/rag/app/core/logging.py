@@ -1,6 +1,7 @@
 # @author: fatima bashir
 import logging
 import sys
+import time
 from typing import Any, Dict
 
 import structlog
@@ -55,7 +56,16 @@ class LoggingMiddleware:
     
     async def __call__(self, scope, receive, send):
         if scope["type"] == "http":
-            request_id = scope.get("headers", {}).get("x-request-id", "unknown")
+            headers = dict(scope.get("headers", []))
+            request_id = headers.get(b"x-request-id", b"unknown").decode("latin-1")
+            started = time.perf_counter()
+            status = 500
+            
+            async def send_with_status(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                await send(message)
             
             # Log request
             self.logger.info(
@@ -66,8 +76,17 @@ class LoggingMiddleware:
             )
             
             # Process request
-            await self.app(scope, receive, send)
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                self.logger.info(
+                    "Request completed",
+                    method=scope.get("method"),
+                    path=scope.get("path"),
+                    request_id=request_id,
+                    status_code=status,
+                    duration_ms=round((time.perf_counter() - started) * 1000, 2),
+                )
             
         else:
             await self.app(scope, receive, send)
-
@@ -0,0 +1,168 @@
+# @author: fatima bashir
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Latency of individual search pipeline stages",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+REQUEST_LATENCY = Histogram(
+    "rag_request_duration_seconds",
+    "End-to-end HTTP request latency",
+    ["method", "handler", "status"],
+)
+
+CACHE_EVENTS = Counter(
+    "rag_cache_events_total",
+    "Cache lookups by cache and outcome",
+    ["cache", "outcome"],
+)
+
+FALLBACKS = Counter(
+    "rag_fallbacks_total",
+    "Times a component degraded to its fallback path",
+    ["component"],
+)
+
+MODEL_LOADS = Counter(
+    "rag_model_loads_total",
+    "Model loads from disk",
+    ["model"],
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "rag_db_pool_connections",
+    "Database pool connections by state",
+    ["pool", "state"],
+)
+
+DB_POOL_SATURATION = Gauge(
+    "rag_db_pool_saturation_ratio",
+    "Checked-out connections over pool_size + max_overflow",
+    ["pool"],
+)
+
+HTTP_CLIENT_REQUESTS = Counter(
+    "rag_http_client_requests_total",
+    "Outbound HTTP requests by client, HTTP version and status",
+    ["client", "http_version", "status"],
+)
+
+HTTP_CLIENT_CONNECTIONS = Counter(
+    "rag_http_client_connections_opened_total",
+    "New outbound connections (requests minus these reused a pooled connection)",
+    ["client"],
+)
+
+HTTP_CLIENT_CONNECT_LATENCY = Histogram(
+    "rag_http_client_connect_seconds",
+    "Outbound connection setup time by phase",
+    ["client", "phase"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "rag_embedding_coalesced_batch_size",
+    "Query texts per coalesced embedding call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+EMBEDDING_QUEUE_WAIT = Histogram(
+    "rag_embedding_queue_wait_seconds",
+    "Time a query waited for its coalesced embedding batch to start",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+VECTOR_STORE_QUERIES = Counter(
+    "rag_vector_store_queries_total",
+    "Semantic searches by vector store backend",
+    ["backend"],
+)
+
+LOCAL_VECTOR_ROWS = Gauge(
+    "rag_local_vector_store_rows",
+    "Chunks held by the in-process vector store",
+)
+
+# Per-request stage timings, collected for the Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration in Prometheus and the current request's timings."""
+    STAGE_LATENCY.labels(stage=stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the enclosed block as a pipeline stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def get_request_timings() -> Dict[str, float]:
+    """Stage timings recorded so far in the current request, in milliseconds."""
+    timings = _request_timings.get() or {}
+    return {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Render stage timings as a Server-Timing header value."""
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items()
+    )
+
+
+class TimingMiddleware:
+    """Collects stage timings per request and exposes them as Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timings["total"] = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(timings).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # The router records the matched endpoint in the shared scope;
+            # labelling by handler keeps path parameters out of the label set
+            endpoint = scope.get("endpoint")
+            REQUEST_LATENCY.labels(
+                method=scope.get("method"),
+                handler=getattr(endpoint, "__name__", "unmatched"),
+                status=str(status),
+            ).observe(time.perf_counter() - started)
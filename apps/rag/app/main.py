@@ -1,14 +1,21 @@
 # @author: fatima bashir
 from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import structlog
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, close_db
 from app.api.v1 import api_router
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, LoggingMiddleware
+from app.core.metrics import TimingMiddleware
+from app.services.ann_index import ann_index_manager
+from app.services.bm25 import bm25_index
+from app.services.registry import registry
+from app.services.vector_store import local_vector_store
 
 # Setup logging
 setup_logging()
@@ -23,11 +30,45 @@ async def lifespan(app: FastAPI):
     # Initialize database
     await init_db()
     
+    # Load models and shared clients once, before serving requests
+    await registry.startup()
+    
+    # Keep ANN indexes sized to the data in the background
+    maintenance_task = None
+    if settings.ANN_AUTO_MAINTAIN:
+        maintenance_task = asyncio.create_task(ann_index_manager.run_maintenance_loop())
+    
+    # Load small tenants into the in-process vector store
+    refresh_task = None
+    if settings.LOCAL_VECTOR_STORE:
+        await local_vector_store.load()
+        if settings.LOCAL_VECTOR_REFRESH_INTERVAL > 0:
+            refresh_task = asyncio.create_task(local_vector_store.run_refresh_loop())
+    
+    # Build or restore the in-process BM25 keyword index
+    bm25_refresh_task = None
+    if settings.KEYWORD_ENGINE == "bm25":
+        await bm25_index.load()
+        if settings.BM25_REFRESH_INTERVAL > 0:
+            bm25_refresh_task = asyncio.create_task(bm25_index.run_refresh_loop())
+    
     logger.info("RAG service started successfully")
     
     yield
     
     logger.info("Shutting down RAG service...")
+    
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+    if refresh_task is not None:
+        refresh_task.cancel()
+    await local_vector_store.close()
+    if bm25_refresh_task is not None:
+        bm25_refresh_task.cancel()
+    if bm25_index.loaded and settings.BM25_SNAPSHOT_PATH:
+        bm25_index.save()
+    await registry.shutdown()
+    await close_db()
 
 
 # Create FastAPI application
@@ -47,6 +88,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request logging and per-stage Server-Timing
+app.add_middleware(LoggingMiddleware)
+app.add_middleware(TimingMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
@@ -63,6 +108,12 @@ async def health_check():
     return {"status": "healthy", "service": "rag"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Global HTTP exception handler."""
@@ -0,0 +1,527 @@
+# @author: fatima bashir
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import math
+import re
+import time
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.core.config import settings
+from app.core.database import engine
+
+logger = structlog.get_logger()
+
+# Vector columns managed by this module
+ANN_INDEXES = {
+    "doc_chunks": {
+        "column": "embedding",
+        "index_name": "doc_chunks_embedding_idx",
+    },
+    "job_descriptions": {
+        "column": "embedding",
+        "index_name": "job_descriptions_embedding_idx",
+    },
+}
+
+# Per-tenant partial indexes on doc_chunks (WHERE user_id = ...) share this prefix
+TENANT_INDEX_PREFIX = "doc_chunks_embedding_t_"
+
+# Search-time knobs per tier: ivfflat probes as a multiple of sqrt(lists)
+# and the hnsw candidate list size
+RECALL_TIERS = {
+    "fast": {"probes_factor": 0.5, "ef_search": 20},
+    "balanced": {"probes_factor": 1.0, "ef_search": 40},
+    "accurate": {"probes_factor": 4.0, "ef_search": 100},
+}
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+
+# Build-time parameters each method accepts in its WITH clause
+BUILD_PARAMS = {
+    "hnsw": ("m", "ef_construction"),
+    "ivfflat": ("lists",),
+}
+
+
+class AnnIndexManager:
+    """Builds, rebuilds and tunes pgvector ANN indexes."""
+
+    def __init__(self):
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._build_lock = asyncio.Lock()
+        self._pgvector_version: Optional[Tuple[int, ...]] = None
+
+    @property
+    def tenant_indexes(self) -> bool:
+        """Per-tenant partial indexes need the denormalized user_id column."""
+        return settings.TENANT_FILTER_PUSHDOWN and settings.ANN_TENANT_INDEXES
+
+    @staticmethod
+    def choose_params(method: str, rows: int) -> Dict[str, int]:
+        """
+        Pick index build parameters from the table size.
+        """
+        if method == "ivfflat":
+            # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond
+            lists = rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows))
+            return {"lists": max(10, lists)}
+
+        if rows < 1_000_000:
+            return {"m": 16, "ef_construction": 64}
+        return {"m": 24, "ef_construction": 128}
+
+    async def get_status(self, table: str) -> Dict[str, Any]:
+        """
+        Report index presence, parameters, size and whether it needs a rebuild.
+        """
+        spec = self._get_spec(table)
+
+        async with engine.connect() as conn:
+            rows = await self._count_rows(conn, table)
+            result = await conn.execute(
+                text("""
+                    SELECT
+                        am.amname AS method,
+                        pg_get_indexdef(c.oid) AS definition,
+                        i.indisvalid AS is_valid,
+                        pg_relation_size(c.oid) AS size_bytes,
+                        obj_description(c.oid, 'pg_class') AS comment
+                    FROM pg_class c
+                    JOIN pg_index i ON i.indexrelid = c.oid
+                    JOIN pg_am am ON am.oid = c.relam
+                    WHERE c.relname = :index_name
+                """),
+                {"index_name": spec["index_name"]},
+            )
+            row = result.first()
+
+        status: Dict[str, Any] = {
+            "table": table,
+            "index_name": spec["index_name"],
+            "rows": rows,
+            "exists": row is not None,
+        }
+
+        if row is not None:
+            built_rows = self._parse_built_rows(row.comment)
+            status.update({
+                "method": row.method,
+                "params": self._parse_params(row.definition),
+                "is_valid": row.is_valid,
+                "size_bytes": row.size_bytes,
+                "built_rows": built_rows,
+                "needs_rebuild": (
+                    not row.is_valid
+                    or built_rows is None
+                    or rows >= built_rows * settings.ANN_REBUILD_GROWTH_FACTOR
+                ),
+            })
+        else:
+            status["needs_rebuild"] = rows >= settings.ANN_MIN_ROWS
+
+        self._status[table] = status
+        return status
+
+    async def get_all_status(self) -> List[Dict[str, Any]]:
+        """
+        Report status for every managed index.
+        """
+        statuses = [await self.get_status(table) for table in ANN_INDEXES]
+        if self.tenant_indexes:
+            statuses.extend(await self.get_tenant_status())
+        return statuses
+
+    async def build_index(
+        self,
+        table: str,
+        method: Optional[str] = None,
+        params: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build (or rebuild) an index concurrently, swapping it in when ready.
+
+        Build parameters are sized from the row count unless given explicitly.
+        """
+        spec = self._get_spec(table)
+        method = method or settings.ANN_INDEX_METHOD
+        self._validate(method, params)
+
+        async with self._build_lock:
+            status = await self.get_status(table)
+            await self._create_index(
+                table, spec["column"], spec["index_name"], method, params, status["rows"]
+            )
+
+        return await self.get_status(table)
+
+    async def get_tenant_status(self) -> List[Dict[str, Any]]:
+        """
+        Report per-tenant partial indexes and tenants large enough to need one.
+        """
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text("""
+                    SELECT user_id, COUNT(*) AS rows
+                    FROM doc_chunks
+                    WHERE user_id IS NOT NULL AND embedding IS NOT NULL
+                    GROUP BY user_id
+                    HAVING COUNT(*) >= :min_rows
+                """),
+                {"min_rows": settings.ANN_TENANT_INDEX_MIN_ROWS // 2},
+            )
+            tenants = {row.user_id: row.rows for row in result.fetchall()}
+
+            result = await conn.execute(
+                text("""
+                    SELECT
+                        c.relname AS index_name,
+                        am.amname AS method,
+                        pg_get_indexdef(c.oid) AS definition,
+                        i.indisvalid AS is_valid,
+                        pg_relation_size(c.oid) AS size_bytes,
+                        obj_description(c.oid, 'pg_class') AS comment
+                    FROM pg_class c
+                    JOIN pg_index i ON i.indexrelid = c.oid
+                    JOIN pg_am am ON am.oid = c.relam
+                    WHERE c.relname LIKE :prefix
+                """),
+                {"prefix": f"{TENANT_INDEX_PREFIX}%"},
+            )
+            indexes = {row.index_name: row for row in result.fetchall()}
+
+        statuses = []
+        for user_id, rows in tenants.items():
+            index_name = self.tenant_index_name(user_id)
+            row = indexes.pop(index_name, None)
+            status: Dict[str, Any] = {
+                "table": "doc_chunks",
+                "user_id": user_id,
+                "index_name": index_name,
+                "rows": rows,
+                "exists": row is not None,
+            }
+            if row is not None:
+                built_rows = self._parse_built_rows(row.comment)
+                status.update({
+                    "method": row.method,
+                    "params": self._parse_params(row.definition),
+                    "is_valid": row.is_valid,
+                    "size_bytes": row.size_bytes,
+                    "built_rows": built_rows,
+                    "needs_rebuild": (
+                        not row.is_valid
+                        or built_rows is None
+                        or rows >= built_rows * settings.ANN_REBUILD_GROWTH_FACTOR
+                    ),
+                })
+            else:
+                status["needs_rebuild"] = rows >= settings.ANN_TENANT_INDEX_MIN_ROWS
+            statuses.append(status)
+
+        # Tenants that shrank well below the threshold or were deleted
+        for index_name, row in indexes.items():
+            statuses.append({
+                "table": "doc_chunks",
+                "user_id": None,
+                "index_name": index_name,
+                "exists": True,
+                "method": row.method,
+                "size_bytes": row.size_bytes,
+                "needs_rebuild": False,
+                "obsolete": True,
+            })
+        return statuses
+
+    async def build_tenant_index(
+        self,
+        user_id: str,
+        method: Optional[str] = None,
+        params: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build (or rebuild) a partial index over one tenant's doc_chunks rows.
+        """
+        method = method or settings.ANN_INDEX_METHOD
+        self._validate(method, params)
+
+        async with self._build_lock:
+            async with engine.connect() as conn:
+                result = await conn.execute(
+                    text("""
+                        SELECT quote_literal(:user_id) AS literal, COUNT(dc.id) AS rows
+                        FROM (SELECT 1) one
+                        LEFT JOIN doc_chunks dc
+                            ON dc.user_id = :user_id AND dc.embedding IS NOT NULL
+                    """),
+                    {"user_id": user_id},
+                )
+                row = result.one()
+
+            await self._create_index(
+                "doc_chunks",
+                ANN_INDEXES["doc_chunks"]["column"],
+                self.tenant_index_name(user_id),
+                method,
+                params,
+                row.rows,
+                where_sql=f"user_id = {row.literal}",
+            )
+
+        return {"user_id": user_id, "index_name": self.tenant_index_name(user_id), "rows": row.rows}
+
+    async def maintain(self) -> List[Dict[str, Any]]:
+        """
+        Build missing indexes and rebuild ones the data has outgrown.
+        """
+        statuses = []
+        for table in ANN_INDEXES:
+            status = await self.get_status(table)
+            if status["needs_rebuild"]:
+                status = await self.build_index(table, status.get("method"))
+            statuses.append(status)
+
+        if self.tenant_indexes:
+            for status in await self.get_tenant_status():
+                if status.get("obsolete"):
+                    await self._drop_index(status["index_name"])
+                    status["exists"] = False
+                elif status["needs_rebuild"]:
+                    status.update(await self.build_tenant_index(status["user_id"], status.get("method")))
+                    status["needs_rebuild"] = False
+                statuses.append(status)
+        return statuses
+
+    @staticmethod
+    def tenant_index_name(user_id: str) -> str:
+        """
+        Stable, identifier-safe partial index name for a tenant.
+        """
+        digest = hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).hexdigest()
+        return f"{TENANT_INDEX_PREFIX}{digest}_idx"
+
+    async def run_maintenance_loop(self):
+        """
+        Periodically run maintain() until cancelled.
+        """
+        while True:
+            try:
+                await self.maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("ANN index maintenance failed", error=str(e))
+            await asyncio.sleep(settings.ANN_MAINTENANCE_INTERVAL)
+
+    async def apply_search_tier(
+        self,
+        db: AsyncSession,
+        tier: Optional[str] = None,
+        limit: int = 10,
+        table: str = "doc_chunks",
+    ) -> None:
+        """
+        Set ivfflat.probes / hnsw.ef_search for the current transaction.
+        """
+        tier_params = RECALL_TIERS.get(tier or settings.ANN_DEFAULT_TIER)
+        if tier_params is None:
+            raise ValueError(f"Unknown recall tier: {tier}")
+
+        lists = self._status.get(table, {}).get("params", {}).get("lists", 100)
+        probes = max(1, min(lists, round(math.sqrt(lists) * tier_params["probes_factor"])))
+        # hnsw can never return more rows than ef_search
+        ef_search = max(tier_params["ef_search"], limit)
+
+        await self.apply_search_params(
+            db,
+            probes=probes,
+            ef_search=ef_search,
+            iterative_scan=await self.iterative_scan_mode(db),
+            force_custom_plan=self.tenant_indexes,
+        )
+
+    async def iterative_scan_mode(self, db: AsyncSession) -> str:
+        """
+        ANN_ITERATIVE_SCAN, or relaxed_order when the server's pgvector supports it.
+        
+        Without iterative scans a filtered HNSW scan stops after ef_search
+        rows and can return fewer than top_k matches for selective filters.
+        """
+        if settings.ANN_ITERATIVE_SCAN is not None:
+            return settings.ANN_ITERATIVE_SCAN
+        if self._pgvector_version is None:
+            result = await db.execute(
+                text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            )
+            version = result.scalar() or "0"
+            self._pgvector_version = tuple(
+                int(part) for part in re.findall(r"\d+", version)[:3]
+            )
+        return "relaxed_order" if self._pgvector_version >= (0, 8) else "off"
+
+    async def apply_search_params(
+        self,
+        db: AsyncSession,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        force_custom_plan: bool = False,
+    ) -> None:
+        """
+        Set explicit ivfflat.probes / hnsw.ef_search values for the current transaction.
+        
+        iterative_scan ("strict_order" or "relaxed_order", pgvector >= 0.8)
+        lets a filtered ANN scan keep reading the index until LIMIT rows pass
+        the filter. force_custom_plan plans each execution with its bound
+        user_id, so per-tenant partial indexes can match the WHERE clause.
+        """
+        calls = []
+        params: Dict[str, str] = {}
+        if probes is not None:
+            calls.append("set_config('ivfflat.probes', :probes, true)")
+            params["probes"] = str(probes)
+        if ef_search is not None:
+            calls.append("set_config('hnsw.ef_search', :ef_search, true)")
+            params["ef_search"] = str(ef_search)
+        if iterative_scan and iterative_scan != "off":
+            calls.append("set_config('hnsw.iterative_scan', :hnsw_iterative_scan, true)")
+            # ivfflat only supports relaxed ordering; callers re-sort the rows
+            calls.append("set_config('ivfflat.iterative_scan', 'relaxed_order', true)")
+            params["hnsw_iterative_scan"] = iterative_scan
+        if force_custom_plan:
+            calls.append("set_config('plan_cache_mode', 'force_custom_plan', true)")
+
+        if calls:
+            await db.execute(text(f"SELECT {', '.join(calls)}"), params)
+
+    async def _create_index(
+        self,
+        table: str,
+        column: str,
+        index_name: str,
+        method: str,
+        params: Optional[Dict[str, int]],
+        rows: int,
+        where_sql: Optional[str] = None,
+    ) -> None:
+        """
+        Create an index concurrently under a temporary name and swap it in.
+        
+        Build parameters are sized from rows unless given explicitly.
+        Callers hold the build lock.
+        """
+        build_name = f"{index_name}_new"
+        started = time.perf_counter()
+        params = {
+            **self.choose_params(method, rows),
+            **{key: int(value) for key, value in (params or {}).items()},
+        }
+        with_sql = ", ".join(f"{key} = {value}" for key, value in params.items())
+        where_clause = f"WHERE {where_sql}" if where_sql else ""
+
+        try:
+            async with engine.connect() as conn:
+                # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(
+                    text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                    {"value": settings.ANN_MAINTENANCE_WORK_MEM},
+                )
+                # Clear out any invalid leftover from an interrupted build
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {build_name}"))
+                await conn.execute(text(f"""
+                    CREATE INDEX CONCURRENTLY {build_name}
+                    ON {table} USING {method} ({column} vector_cosine_ops)
+                    WITH ({with_sql})
+                    {where_clause}
+                """))
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+                await conn.execute(text(f"ALTER INDEX {build_name} RENAME TO {index_name}"))
+                await conn.execute(
+                    text(f"COMMENT ON INDEX {index_name} IS 'built_rows={rows}'")
+                )
+
+            logger.info(
+                "ANN index built",
+                table=table,
+                index_name=index_name,
+                method=method,
+                params=params,
+                rows=rows,
+                build_time_s=round(time.perf_counter() - started, 2),
+            )
+
+        except Exception as e:
+            logger.error("ANN index build failed", table=table, index_name=index_name, error=str(e))
+            raise
+
+    async def _drop_index(self, index_name: str) -> None:
+        """
+        Drop a managed index concurrently.
+        """
+        async with self._build_lock:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+        logger.info("ANN index dropped", index_name=index_name)
+
+    def _validate(self, method: str, params: Optional[Dict[str, int]]) -> None:
+        """
+        Reject unknown index methods and build parameters.
+        """
+        if method not in INDEX_METHODS:
+            raise ValueError(f"Unsupported ANN index method: {method}")
+        if params is not None:
+            unknown = set(params) - set(BUILD_PARAMS[method])
+            if unknown:
+                raise ValueError(f"Unsupported {method} parameters: {sorted(unknown)}")
+
+    def _get_spec(self, table: str) -> Dict[str, str]:
+        """
+        Look up a managed table, rejecting anything else.
+        """
+        spec = ANN_INDEXES.get(table)
+        if spec is None:
+            raise ValueError(f"No ANN index is managed for table: {table}")
+        return spec
+
+    async def _count_rows(self, conn, table: str) -> int:
+        """
+        Estimate the row count from planner statistics, counting if never analyzed.
+        """
+        result = await conn.execute(
+            text("SELECT reltuples::bigint AS estimate FROM pg_class WHERE relname = :table"),
+            {"table": table},
+        )
+        estimate = result.scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+
+        result = await conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
+        return int(result.scalar())
+
+    @staticmethod
+    def _parse_params(definition: str) -> Dict[str, int]:
+        """
+        Extract WITH (...) storage parameters from an index definition.
+        """
+        match = re.search(r"WITH \((.*)\)", definition or "")
+        if not match:
+            return {}
+        return {
+            key: int(value)
+            for key, value in re.findall(r"(\w+)='?(\d+)'?", match.group(1))
+        }
+
+    @staticmethod
+    def _parse_built_rows(comment: Optional[str]) -> Optional[int]:
+        """
+        Read the row count recorded in the index comment at build time.
+        """
+        match = re.search(r"built_rows=(\d+)", comment or "")
+        return int(match.group(1)) if match else None
+
+
+ann_index_manager = AnnIndexManager()
@@ -0,0 +1,533 @@
+# @author: fatima bashir
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import math
+import os
+import pickle
+import time
+import numpy as np
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bulk_writer import get_asyncpg_connection
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.services.chunk_changes import DOCUMENT_CHUNKS_FILTER, deleted_chunk_ids, live_chunk_ids
+from app.services.hash_embeddings import tokenize
+
+logger = structlog.get_logger()
+
+SNAPSHOT_VERSION = 2
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its of on or "
+    "that the their this to was were will with you your".split()
+)
+
+# Rows indexed for keyword search, with the owning user and artifact type
+BM25_LOAD_SQL = """
+    SELECT dc.id, dc.content, dc.artifact_id, dc.metadata->>'document_id' AS document_id,
+           a.user_id, a.type AS artifact_type
+    FROM doc_chunks dc
+    LEFT JOIN artifacts a ON dc.artifact_id = a.id
+"""
+
+
+def analyze(content: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords."""
+    return [token for token in tokenize(content) if token not in STOPWORDS]
+
+
+class Segment:
+    """
+    Inverted index over one tenant's chunks.
+
+    Postings are append-only int32 arrays of (local doc, term frequency),
+    so doc ids within a posting list are ascending. Deleted docs stay in
+    the postings, masked by `alive`, until the segment is compacted.
+    """
+
+    def __init__(self):
+        self.chunk_ids: List[Optional[str]] = []
+        self.lengths = array("i")
+        self.type_codes = array("i")
+        self.alive = bytearray()
+        self.doc_terms: List[Optional[Tuple[array, array]]] = []
+        self.postings: Dict[int, Tuple[array, array]] = {}
+        self.df: Dict[int, int] = {}
+        # Per-term bounds for MaxScore; never lowered, so they stay valid after deletes
+        self.tf_max: Dict[int, int] = {}
+        self.min_length: Dict[int, int] = {}
+        self.live = 0
+        self.total_length = 0
+        self._arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_arrays"] = {}
+        state["_doc_arrays"] = None
+        return state
+
+    @property
+    def dead(self) -> int:
+        return len(self.chunk_ids) - self.live
+
+    def add(self, chunk_id: str, type_code: int, term_counts: Dict[int, int]) -> int:
+        """
+        Append a document and return its local id.
+        """
+        doc = len(self.chunk_ids)
+        length = sum(term_counts.values())
+        terms = array("i", term_counts.keys())
+        counts = array("i", term_counts.values())
+
+        self.chunk_ids.append(chunk_id)
+        self.lengths.append(length)
+        self.type_codes.append(type_code)
+        self.alive.append(1)
+        self.doc_terms.append((terms, counts))
+        for term, count in zip(terms, counts):
+            docs, tfs = self.postings.setdefault(term, (array("i"), array("i")))
+            docs.append(doc)
+            tfs.append(count)
+            self.df[term] = self.df.get(term, 0) + 1
+            self.tf_max[term] = max(self.tf_max.get(term, 0), count)
+            self.min_length[term] = min(self.min_length.get(term, length), length)
+            self._arrays.pop(term, None)
+
+        self.live += 1
+        self.total_length += length
+        self._doc_arrays = None
+        return doc
+
+    def remove(self, doc: int) -> Optional[Tuple[array, array]]:
+        """
+        Mark a document deleted, returning its (terms, counts) for global statistics.
+        """
+        if not self.alive[doc]:
+            return None
+        terms, counts = self.doc_terms[doc]
+        for term in terms:
+            self.df[term] -= 1
+        self.alive[doc] = 0
+        self.chunk_ids[doc] = None
+        self.doc_terms[doc] = None
+        self.live -= 1
+        self.total_length -= self.lengths[doc]
+        self._doc_arrays = None
+        return terms, counts
+
+    def compacted(self) -> "Segment":
+        """
+        Return a copy without deleted documents (local ids change).
+        """
+        segment = Segment()
+        for doc, chunk_id in enumerate(self.chunk_ids):
+            if self.alive[doc]:
+                terms, counts = self.doc_terms[doc]
+                segment.add(chunk_id, self.type_codes[doc], dict(zip(terms, counts)))
+        return segment
+
+    def search(
+        self,
+        terms: List[int],
+        idf: Dict[int, float],
+        avgdl: float,
+        top_k: int,
+        k1: float,
+        b: float,
+        type_code: Optional[int] = None,
+        floor: float = 0.0,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k (local doc, score) above floor by BM25 with MaxScore pruning.
+
+        Terms are processed in decreasing order of their score upper bound,
+        and scores are accumulated only for documents drawn from the posting
+        lists. Once the bounds of the remaining terms add up to less than the
+        current k-th best score (or floor, the k-th best score found in other
+        segments), a document not yet matched cannot reach the top k, so the
+        remaining (typically long, low-IDF) posting lists are only probed for
+        the surviving candidates by binary search.
+        """
+        terms = [term for term in terms if self.df.get(term)]
+        if not terms or not self.live:
+            return []
+
+        lengths, types, alive = self._document_arrays()
+
+        def saturation(tfs: np.ndarray, doc_lengths: np.ndarray) -> np.ndarray:
+            return tfs * (k1 + 1) / (tfs + k1 * (1 - b + b * doc_lengths / avgdl))
+
+        bounds = {
+            term: idf[term] * float(saturation(
+                np.float32(self.tf_max[term]), np.float32(self.min_length[term])
+            ))
+            for term in terms
+        }
+        terms.sort(key=bounds.get, reverse=True)
+        remaining = np.cumsum([bounds[term] for term in reversed(terms)])[::-1]
+
+        # Sorted candidate docs and their partial scores
+        candidates = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float32)
+        threshold = floor
+        for i, term in enumerate(terms):
+            docs, tfs = self._posting_arrays(term)
+            if threshold > 0 and remaining[i] < threshold:
+                # Non-essential term: only probe candidates that can still make the top k
+                keep = scores + remaining[i] >= threshold
+                candidates, scores = candidates[keep], scores[keep]
+                if not len(candidates):
+                    return []
+                positions = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+                matched = docs[positions] == candidates
+                scores[matched] += idf[term] * saturation(
+                    tfs[positions[matched]], lengths[candidates[matched]]
+                )
+            else:
+                usable = alive[docs] if type_code is None else alive[docs] & (types[docs] == type_code)
+                docs, tfs = docs[usable], tfs[usable]
+                candidates, inverse = np.unique(
+                    np.concatenate([candidates, docs]), return_inverse=True
+                )
+                scores = np.bincount(
+                    inverse,
+                    weights=np.concatenate([scores, idf[term] * saturation(tfs, lengths[docs])]),
+                ).astype(np.float32)
+
+            if len(scores) >= top_k:
+                kth = float(np.partition(scores, len(scores) - top_k)[len(scores) - top_k])
+                threshold = max(threshold, kth)
+
+        k = min(top_k, len(scores))
+        if not k:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            (int(candidates[i]), float(scores[i]))
+            for i in best
+            if scores[i] > 0 and scores[i] >= floor
+        ]
+
+    def _posting_arrays(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term not in self._arrays:
+            docs, tfs = self.postings[term]
+            self._arrays[term] = (
+                np.array(docs, dtype=np.int64),
+                np.array(tfs, dtype=np.float32),
+            )
+        return self._arrays[term]
+
+    def _document_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._doc_arrays is None:
+            self._doc_arrays = (
+                np.array(self.lengths, dtype=np.float32),
+                np.array(self.type_codes, dtype=np.int32),
+                np.frombuffer(bytes(self.alive), dtype=np.uint8).astype(bool),
+            )
+        return self._doc_arrays
+
+
+class BM25Index:
+    """
+    In-process BM25 keyword index with one segment per user.
+
+    User-scoped searches score with their segment's statistics; unscoped
+    searches use corpus-wide statistics across every segment. The index is
+    loaded from a snapshot (or built from doc_chunks) at startup, updated on
+    ingest and delete, and refreshed from the database for other workers' writes.
+    """
+
+    def __init__(self, k1: float = settings.BM25_K1, b: float = settings.BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.loaded = False
+        self.vocabulary: Dict[str, int] = {}
+        self.segments: Dict[Optional[str], Segment] = {}
+        self.df: Dict[int, int] = {}
+        # Users whose segment has live postings for a term, for unscoped searches
+        self.term_segments: Dict[int, Set[Optional[str]]] = {}
+        self.live = 0
+        self.total_length = 0
+        self.locations: Dict[str, Tuple[Optional[str], int]] = {}
+        self.documents: Dict[str, Set[str]] = {}
+        self.type_codes: Dict[Optional[str], int] = {}
+        self.watermark = None
+
+    def add(
+        self,
+        chunk_id: str,
+        content: str,
+        user_id: Optional[str] = None,
+        artifact_type: Optional[str] = None,
+        document_id: Optional[str] = None,
+    ) -> None:
+        """
+        Index a chunk, replacing any earlier version of it.
+        """
+        self.remove(chunk_id)
+        counts = Counter(analyze(content))
+        term_counts = {
+            self.vocabulary.setdefault(token, len(self.vocabulary)): count
+            for token, count in counts.items()
+        }
+        type_code = self.type_codes.setdefault(artifact_type, len(self.type_codes))
+
+        segment = self.segments.setdefault(user_id, Segment())
+        doc = segment.add(chunk_id, type_code, term_counts)
+        self.locations[chunk_id] = (user_id, doc)
+        if document_id:
+            self.documents.setdefault(document_id, set()).add(chunk_id)
+
+        for term in term_counts:
+            self.df[term] = self.df.get(term, 0) + 1
+            self.term_segments.setdefault(term, set()).add(user_id)
+        self.live += 1
+        self.total_length += sum(term_counts.values())
+
+    async def add_document(self, db: AsyncSession, document_id: str) -> int:
+        """
+        Index a newly committed document's chunks, returning how many were added.
+
+        Rows are streamed in batches through the writer's session; the read
+        replica may not have them yet.
+        """
+        if not self.loaded:
+            return 0
+        added = 0
+        connection = await get_asyncpg_connection(db)
+        async with connection.transaction():
+            cursor = await connection.cursor(
+                BM25_LOAD_SQL + f" WHERE {DOCUMENT_CHUNKS_FILTER}", document_id
+            )
+            while True:
+                records = await cursor.fetch(settings.BULK_WRITE_BATCH_SIZE)
+                if not records:
+                    break
+                self._add_records(records)
+                added += len(records)
+        return added
+
+    def remove(self, chunk_id: str) -> bool:
+        """
+        Remove a chunk; compacts its segment once a quarter of it is deleted.
+        """
+        location = self.locations.pop(chunk_id, None)
+        if location is None:
+            return False
+        user_id, doc = location
+        segment = self.segments[user_id]
+        removed = segment.remove(doc)
+        if removed is not None:
+            terms, counts = removed
+            for term in terms:
+                self.df[term] -= 1
+                if not segment.df[term]:
+                    self.term_segments[term].discard(user_id)
+            self.live -= 1
+            self.total_length -= sum(counts)
+
+        if segment.live == 0:
+            del self.segments[user_id]
+        elif segment.dead > 1000 and segment.dead * 4 > len(segment.chunk_ids):
+            self._compact(user_id)
+        return True
+
+    def remove_document(self, document_id: str) -> int:
+        """
+        Remove a document's chunks, returning how many were removed.
+        """
+        chunk_ids = self.documents.pop(document_id, set())
+        return sum(self.remove(chunk_id) for chunk_id in chunk_ids)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        user_id: Optional[str] = None,
+        artifact_type: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Return up to top_k (chunk id, BM25 score), best first.
+        """
+        tokens = set(analyze(query))
+        terms = [self.vocabulary[token] for token in tokens if token in self.vocabulary]
+        type_code = None
+        if artifact_type is not None:
+            type_code = self.type_codes.get(artifact_type)
+            if type_code is None:
+                return []
+        if not terms:
+            return []
+
+        if user_id is not None:
+            segment = self.segments.get(user_id)
+            if segment is None:
+                return []
+            scoped = [(segment, self._idf(terms, segment.df, segment.live),
+                       segment.total_length / segment.live)]
+        else:
+            idf = self._idf(terms, self.df, self.live)
+            avgdl = self.total_length / max(self.live, 1)
+            # Only segments that contain a query term
+            users = set().union(*(self.term_segments.get(term, ()) for term in terms))
+            scoped = [(self.segments[user], idf, avgdl) for user in users]
+
+        # Min-heap of the best (score, chunk id) so far; its k-th score lets
+        # later segments prune against hits already found
+        heap: List[Tuple[float, str]] = []
+        for segment, idf, avgdl in scoped:
+            floor = heap[0][0] if len(heap) >= top_k else 0.0
+            for doc, score in segment.search(
+                terms, idf, avgdl, top_k, self.k1, self.b, type_code, floor
+            ):
+                hit = (score, segment.chunk_ids[doc])
+                if len(heap) < top_k:
+                    heapq.heappush(heap, hit)
+                elif hit > heap[0]:
+                    heapq.heapreplace(heap, hit)
+        return [(chunk_id, score) for score, chunk_id in sorted(heap, reverse=True)]
+
+    def save(self, path: str = settings.BM25_SNAPSHOT_PATH) -> None:
+        """
+        Write a snapshot atomically (temp file, then rename).
+        """
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            **{
+                key: getattr(self, key)
+                for key in ("vocabulary", "segments", "df", "term_segments", "live", "total_length",
+                            "locations", "documents", "type_codes", "watermark")
+            },
+        }
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    def restore(self, path: str = settings.BM25_SNAPSHOT_PATH) -> bool:
+        """
+        Load a snapshot written by save(); returns False when unusable.
+        """
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        if state.get("version") != SNAPSHOT_VERSION or (state["k1"], state["b"]) != (self.k1, self.b):
+            logger.warning("Ignoring incompatible BM25 snapshot", path=path)
+            return False
+        for key in ("vocabulary", "segments", "df", "term_segments", "live", "total_length",
+                    "locations", "documents", "type_codes", "watermark"):
+            setattr(self, key, state[key])
+        return True
+
+    async def load(self) -> Dict[str, Any]:
+        """
+        Restore the snapshot and catch up from the database, or build from scratch.
+        """
+        started = time.perf_counter()
+        snapshot = bool(settings.BM25_SNAPSHOT_PATH) and self.restore()
+        if snapshot:
+            await self.refresh()
+        else:
+            async with ReadSessionLocal() as session:
+                self.watermark = (await session.execute(text("SELECT now()"))).scalar()
+                connection = await get_asyncpg_connection(session)
+                async with connection.transaction():
+                    cursor = await connection.cursor(BM25_LOAD_SQL)
+                    while True:
+                        records = await cursor.fetch(settings.BULK_WRITE_BATCH_SIZE * 10)
+                        if not records:
+                            break
+                        self._add_records(records)
+
+        self.loaded = True
+        if settings.BM25_SNAPSHOT_PATH:
+            self.save()
+
+        status = {
+            "chunks": self.live,
+            "terms": len(self.vocabulary),
+            "segments": len(self.segments),
+            "from_snapshot": snapshot,
+            "load_time_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        logger.info("BM25 index loaded", **status)
+        return status
+
+    async def refresh(self) -> None:
+        """
+        Apply chunks written or deleted by other processes since the watermark.
+        """
+        async with ReadSessionLocal() as session:
+            now = (await session.execute(text("SELECT now()"))).scalar()
+            connection = await get_asyncpg_connection(session)
+            async with connection.transaction():
+                deleted = await deleted_chunk_ids(connection, self.watermark)
+                live = None if deleted is not None else await live_chunk_ids(connection)
+                changed = await connection.fetch(
+                    BM25_LOAD_SQL + " WHERE dc.updated_at > $1", self.watermark
+                )
+
+        if live is not None:
+            stale = [chunk_id for chunk_id in self.locations if chunk_id not in live]
+        else:
+            stale = [chunk_id for chunk_id in deleted if chunk_id in self.locations]
+        for chunk_id in stale:
+            self.remove(chunk_id)
+        self._add_records(changed)
+        self.watermark = now
+
+        if stale or changed:
+            logger.debug("BM25 index refreshed", removed=len(stale), upserted=len(changed))
+
+    async def run_refresh_loop(self):
+        """
+        Periodically run refresh() until cancelled.
+        """
+        while True:
+            await asyncio.sleep(settings.BM25_REFRESH_INTERVAL)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("BM25 index refresh failed", error=str(e))
+
+    def _add_records(self, records: List[Any]) -> None:
+        for record in records:
+            self.add(
+                record["id"],
+                record["content"],
+                user_id=record["user_id"],
+                artifact_type=record["artifact_type"],
+                document_id=record["artifact_id"] or record["document_id"],
+            )
+
+    def _idf(self, terms: List[int], df: Dict[int, int], docs: int) -> Dict[int, float]:
+        """
+        Okapi BM25 IDF, floored at zero by the +1 inside the log.
+        """
+        return {
+            term: math.log(1 + (docs - df.get(term, 0) + 0.5) / (df.get(term, 0) + 0.5))
+            for term in terms
+        }
+
+    def _compact(self, user_id: Optional[str]) -> None:
+        segment = self.segments[user_id].compacted()
+        self.segments[user_id] = segment
+        for doc, chunk_id in enumerate(segment.chunk_ids):
+            self.locations[chunk_id] = (user_id, doc)
+
+
+bm25_index = BM25Index()
@@ -0,0 +1,52 @@
+# @author: fatima bashir
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from app.core.config import settings
+
+# Tombstones kept by packages/database/chunk-tombstones.sql
+CHUNK_TOMBSTONE_RETENTION = timedelta(days=7)
+# Deletes committed shortly after a refresh can carry an earlier deleted_at
+CHUNK_TOMBSTONE_OVERLAP = timedelta(minutes=1)
+
+# One document's chunks; both sides are indexed by document-chunk-indexes.sql
+DOCUMENT_CHUNKS_FILTER = "(dc.artifact_id = $1 OR dc.metadata->>'document_id' = $1)"
+
+
+async def deleted_chunk_ids(connection, since: Optional[datetime]) -> Optional[List[str]]:
+    """
+    Ids deleted from doc_chunks since `since`, read from the tombstone table.
+
+    Returns None when the tombstones cannot cover the interval (no table,
+    or `since` is older than their retention); callers then diff every id.
+    """
+    if since is None:
+        return None
+    covered = await connection.fetchval(
+        "SELECT to_regclass('doc_chunk_deletions') IS NOT NULL"
+        " AND $1::timestamptz > now() - $2::interval",
+        since,
+        CHUNK_TOMBSTONE_RETENTION,
+    )
+    if not covered:
+        return None
+    records = await connection.fetch(
+        "SELECT DISTINCT chunk_id FROM doc_chunk_deletions"
+        " WHERE deleted_at > $1::timestamptz - $2::interval",
+        since,
+        CHUNK_TOMBSTONE_OVERLAP,
+    )
+    return [record["chunk_id"] for record in records]
+
+
+async def live_chunk_ids(connection) -> Set[str]:
+    """
+    Every doc_chunks id, for diffing when tombstones are unavailable (inside a transaction).
+    """
+    live: Set[str] = set()
+    cursor = await connection.cursor("SELECT id FROM doc_chunks")
+    while True:
+        records = await cursor.fetch(settings.BULK_WRITE_BATCH_SIZE * 10)
+        if not records:
+            return live
+        live.update(record["id"] for record in records)
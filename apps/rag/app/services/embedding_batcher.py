@@ -0,0 +1,134 @@
+# @author: fatima bashir
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_QUEUE_WAIT
+from app.services.embeddings import EmbeddingService
+
+logger = structlog.get_logger()
+
+
+class EmbeddingCoalescer:
+    """Coalesces concurrent single-text embedding requests into batched calls."""
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        window_ms: float = settings.EMBEDDING_COALESCE_WINDOW_MS,
+        max_batch: int = settings.EMBEDDING_COALESCE_MAX_BATCH,
+    ):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            "requests": 0,
+            "batches": 0,
+            "max_batch_size": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+        }
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text, sharing a provider call with concurrent requests.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        self.stats["requests"] += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts; requests that already fill a batch skip the queue.
+        """
+        if len(texts) >= self.max_batch:
+            return await self.embedding_service.embed_texts(texts)
+        return list(await asyncio.gather(*[self.embed(text) for text in texts]))
+
+    def _flush(self) -> None:
+        """
+        Send everything queued so far as one batch.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        """
+        Embed a coalesced batch and fan the results out to waiting callers.
+        """
+        started = time.perf_counter()
+        self._record_batch(batch, started)
+
+        # Identical concurrent queries only need to be embedded once
+        unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+
+        try:
+            embeddings = await self.embedding_service.embed_texts(unique_texts)
+        except Exception as e:
+            logger.error("Coalesced embedding batch failed", error=str(e), batch_size=len(batch))
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(unique_texts, embeddings))
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+        logger.debug(
+            "Coalesced embedding batch completed",
+            batch_size=len(batch),
+            unique_texts=len(unique_texts),
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+
+    def _record_batch(self, batch: List[Tuple[str, asyncio.Future, float]], started: float) -> None:
+        """
+        Update batch size and queue wait metrics.
+        """
+        size = len(batch)
+        self.stats["batches"] += 1
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], size)
+        EMBEDDING_BATCH_SIZE.observe(size)
+
+        for _, _, enqueued_at in batch:
+            EMBEDDING_QUEUE_WAIT.observe(started - enqueued_at)
+            wait_ms = (started - enqueued_at) * 1000
+            self.stats["queue_wait_ms_total"] += wait_ms
+            self.stats["queue_wait_ms_max"] = max(self.stats["queue_wait_ms_max"], wait_ms)
+
+    def get_stats(self) -> Dict:
+        """
+        Return batch size and queue wait metrics.
+        """
+        requests = self.stats["requests"] or 1
+        batches = self.stats["batches"] or 1
+        return {
+            **self.stats,
+            "avg_batch_size": round(self.stats["requests"] / batches, 2),
+            "avg_queue_wait_ms": round(self.stats["queue_wait_ms_total"] / requests, 3),
+        }
+
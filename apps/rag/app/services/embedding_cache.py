@@ -0,0 +1,127 @@
+# @author: fatima bashir
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import unicodedata
+import structlog
+import numpy as np
+
+from app.core.config import settings
+from app.core.cache import get_redis
+from app.core.metrics import CACHE_EVENTS
+
+logger = structlog.get_logger()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: bounded in-process LRU backed by Redis."""
+
+    def __init__(
+        self,
+        model: str = settings.EMBEDDING_MODEL,
+        dimension: int = settings.EMBEDDING_DIMENSION,
+        max_entries: int = settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl: int = settings.REDIS_CACHE_TTL,
+    ):
+        self.model = model
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "redis_errors": 0,
+        }
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize text so trivially different queries share a cache entry.
+        """
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def make_key(self, text: str) -> str:
+        """
+        Build the cache key from model name, dimension and normalized text hash.
+        """
+        digest = hashlib.sha256(self.normalize(text).encode("utf-8")).hexdigest()
+        return f"emb:{self.model}:{self.dimension}:{digest}"
+
+    async def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for texts, returning None for each miss.
+        """
+        keys = [self.make_key(text) for text in texts]
+        found: List[Optional[List[float]]] = [None] * len(texts)
+        remote: Dict[str, List[int]] = {}
+
+        for i, key in enumerate(keys):
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                found[i] = vector.tolist()
+                self.stats["local_hits"] += 1
+                CACHE_EVENTS.labels(cache="embedding", outcome="local_hit").inc()
+            else:
+                remote.setdefault(key, []).append(i)
+
+        if remote:
+            remote_keys = list(remote)
+            try:
+                packed_values = await get_redis().mget(remote_keys)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                CACHE_EVENTS.labels(cache="embedding", outcome="error").inc()
+                logger.warning("Embedding cache Redis lookup failed", error=str(e))
+                packed_values = [None] * len(remote_keys)
+
+            for key, packed in zip(remote_keys, packed_values):
+                positions = remote[key]
+                if packed is None:
+                    self.stats["misses"] += len(positions)
+                    CACHE_EVENTS.labels(cache="embedding", outcome="miss").inc(len(positions))
+                    continue
+                vector = np.frombuffer(packed, dtype=np.float32)
+                self._remember(key, vector)
+                for i in positions:
+                    found[i] = vector.tolist()
+                self.stats["redis_hits"] += len(positions)
+                CACHE_EVENTS.labels(cache="embedding", outcome="redis_hit").inc(len(positions))
+
+        return found
+
+    async def set_many(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Store embeddings in both cache tiers.
+        """
+        if not texts:
+            return
+
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for text, embedding in zip(texts, embeddings):
+                key = self.make_key(text)
+                vector = np.asarray(embedding, dtype=np.float32)
+                self._remember(key, vector)
+                pipe.set(key, vector.tobytes(), ex=self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning("Embedding cache Redis write failed", error=str(e))
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        """
+        Insert into the in-process LRU tier, evicting the oldest entries.
+        """
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters and the current LRU size.
+        """
+        return {**self.stats, "local_size": len(self._lru)}
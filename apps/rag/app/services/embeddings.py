@@ -1,50 +1,273 @@
 # @author: fatima bashir
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 import asyncio
+import random
+import time
+import httpx
 import openai
 import structlog
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
 from app.core.config import settings
+from app.core.http import create_http_client
+from app.core.metrics import FALLBACKS, MODEL_LOADS
+from app.services.embedding_cache import EmbeddingCache
+from app.services.hash_embeddings import hash_embed_texts
+from app.services.similarity import CandidateMatrix, top_k_similar
 
 logger = structlog.get_logger()
 
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def _retry_after(error: Exception) -> float:
+    """Read the Retry-After header from an OpenAI error, if present."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+class TokenRateLimiter:
+    """Token bucket that keeps embedding traffic under a tokens-per-minute budget."""
+    
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.refill_rate = tokens_per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until the bucket holds enough tokens for the next request.
+        """
+        if self.capacity <= 0:
+            return
+        
+        # A single oversized batch may drain the bucket but must not deadlock
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated_at) * self.refill_rate,
+                )
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.refill_rate)
+
+
+_rate_limiter = TokenRateLimiter(settings.EMBEDDING_TOKENS_PER_MINUTE)
+
+def create_openai_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP/2 client shared by the process's OpenAI clients."""
+    return create_http_client(
+        "openai",
+        http2=settings.OPENAI_HTTP2,
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        connect_timeout=settings.OPENAI_CONNECT_TIMEOUT,
+        read_timeout=settings.OPENAI_READ_TIMEOUT,
+        write_timeout=settings.OPENAI_WRITE_TIMEOUT,
+        pool_timeout=settings.OPENAI_POOL_TIMEOUT,
+    )
+
+
+def create_openai_client(http_client: Optional[httpx.AsyncClient] = None) -> openai.AsyncOpenAI:
+    """Create an OpenAI client for embedding calls, on a shared HTTP client if given."""
+    # Retries are handled per batch by the embedding scheduler
+    return openai.AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        max_retries=0,
+        http_client=http_client,
+    )
+
+
+# Process-wide cache so the LRU tier survives across per-request services
+# Hash vectors are keyed separately so they never mix with OpenAI ones
+_shared_cache: Optional[EmbeddingCache] = (
+    EmbeddingCache(
+        model=settings.EMBEDDING_MODEL if settings.EMBEDDING_PROVIDER == "openai" else "hash"
+    )
+    if settings.EMBEDDING_CACHE_ENABLED
+    else None
+)
+
 
 class EmbeddingService:
     """Service for generating text embeddings."""
     
-    def __init__(self):
-        self.openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        # Initialize sentence transformer as fallback
-        self.st_model = None
+    def __init__(
+        self,
+        openai_client: Optional[openai.AsyncOpenAI] = None,
+        st_model: Optional[SentenceTransformer] = None,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.openai_client = openai_client or create_openai_client()
+        # Sentence transformer fallback, loaded lazily unless provided
+        self.st_model = st_model
+        self.cache = cache if cache is not None else _shared_cache
         
     async def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding for a single text.
         """
-        return await self.embed_texts([text])[0]
+        embeddings = await self.embed_texts([text])
+        return embeddings[0]
     
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts using OpenAI API.
+        
+        If any batch fails, the whole request is re-embedded with the
+        fallback model, cache hits included, so one call never returns
+        vectors from two models.
         """
         try:
-            # Batch process texts
-            embeddings = []
-            batch_size = 50  # OpenAI's batch limit
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                batch_embeddings = await self._embed_batch_openai(batch)
-                embeddings.extend(batch_embeddings)
-            
-            return embeddings
+            if self.cache is None:
+                return await self._embed_texts_openai(texts)
+            return await self._embed_texts_cached(texts)
             
         except Exception as e:
             logger.error("OpenAI embedding failed, falling back to sentence-transformers", error=str(e))
+            FALLBACKS.labels(component="embedding").inc()
             return await self._embed_texts_fallback(texts)
     
+    async def _embed_texts_cached(self, texts: List[str]) -> List[List[float]]:
+        """
+        Serve embeddings from the cache and only send misses to OpenAI.
+        """
+        embeddings = await self.cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            fresh = await self._embed_texts_batched(missing_texts)
+            
+            await self.cache.set_many(missing_texts, fresh)
+            for i, embedding in zip(missing, fresh):
+                embeddings[i] = embedding
+        
+        logger.debug(
+            "Embedding cache lookup",
+            requested=len(texts),
+            cache_hits=len(texts) - len(missing),
+        )
+        
+        return embeddings
+    
+    async def _embed_texts_openai(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for texts in concurrent, token-sized batches.
+        """
+        return await self._embed_texts_batched(texts)
+    
+    async def _embed_texts_batched(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts with bounded concurrency, retrying each batch.
+        
+        Returns the embeddings in input order. When a batch exhausts its
+        retries the remaining batches are cancelled and the error is raised,
+        since a partial result would mix models.
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        semaphore = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
+        
+        async def run_batch(start: int, end: int, tokens: int):
+            batch = texts[start:end]
+            async with semaphore:
+                try:
+                    embeddings[start:end] = await self._embed_batch_with_retry(batch, tokens)
+                except Exception as e:
+                    logger.error(
+                        "OpenAI embedding batch exhausted retries",
+                        error=str(e),
+                        batch_size=len(batch),
+                    )
+                    raise
+        
+        tasks = [
+            asyncio.ensure_future(run_batch(start, end, tokens))
+            for start, end, tokens in self._plan_batches(texts)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        
+        return embeddings
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """
+        Cheap token estimate (~4 characters per token for English text).
+        """
+        return len(text) // 4 + 1
+    
+    def _plan_batches(self, texts: List[str]) -> List[Tuple[int, int, int]]:
+        """
+        Split texts into contiguous (start, end, tokens) batches by token budget.
+        """
+        batches = []
+        start = 0
+        tokens = 0
+        
+        for i, text in enumerate(texts):
+            text_tokens = self._estimate_tokens(text)
+            batch_full = (
+                tokens + text_tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+                or i - start >= settings.EMBEDDING_BATCH_MAX_ITEMS
+            )
+            if i > start and batch_full:
+                batches.append((start, i, tokens))
+                start, tokens = i, 0
+            tokens += text_tokens
+        
+        if start < len(texts):
+            batches.append((start, len(texts), tokens))
+        
+        return batches
+    
+    async def _embed_batch_with_retry(self, texts: List[str], tokens: int) -> List[List[float]]:
+        """
+        Embed one batch, backing off on rate limits and transient errors.
+        """
+        if settings.EMBEDDING_PROVIDER == "hash":
+            return hash_embed_texts(texts, settings.EMBEDDING_DIMENSION)
+        
+        attempt = 0
+        while True:
+            await _rate_limiter.acquire(tokens)
+            try:
+                return await self._embed_batch_openai(texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= settings.EMBEDDING_MAX_RETRIES:
+                    raise
+                delay = settings.EMBEDDING_RETRY_BASE_DELAY * (2 ** attempt)
+                delay = max(delay, _retry_after(e)) * random.uniform(1.0, 1.5)
+                logger.warning(
+                    "Retrying OpenAI embedding batch",
+                    attempt=attempt + 1,
+                    delay=round(delay, 2),
+                    error=str(e),
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+    
     async def _embed_batch_openai(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings using OpenAI API.
@@ -76,7 +299,8 @@ class EmbeddingService:
         try:
             # Initialize model if not already done
             if self.st_model is None:
-                self.st_model = SentenceTransformer('all-MiniLM-L6-v2')
+                self.st_model = SentenceTransformer(settings.FALLBACK_EMBEDDING_MODEL)
+                MODEL_LOADS.labels(model=settings.FALLBACK_EMBEDDING_MODEL).inc()
             
             # Run in thread pool to avoid blocking
             loop = asyncio.get_event_loop()
@@ -90,7 +314,7 @@ class EmbeddingService:
             logger.debug(
                 "Generated fallback embeddings",
                 batch_size=len(texts),
-                model="all-MiniLM-L6-v2"
+                model=settings.FALLBACK_EMBEDDING_MODEL
             )
             
             return embeddings_list
@@ -118,21 +342,25 @@ class EmbeddingService:
     async def find_most_similar(
         self,
         query_embedding: List[float],
-        candidate_embeddings: List[List[float]],
+        candidate_embeddings: Union[List[List[float]], CandidateMatrix],
         top_k: int = 5
     ) -> List[int]:
         """
         Find indices of most similar embeddings to query.
         """
-        similarities = []
-        
-        for i, candidate in enumerate(candidate_embeddings):
-            similarity = self.cosine_similarity(query_embedding, candidate)
-            similarities.append((i, similarity))
-        
-        # Sort by similarity descending
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        indices, _ = top_k_similar(query_embedding, candidate_embeddings, top_k)
+        return indices[0].tolist()
+    
+    async def find_most_similar_batch(
+        self,
+        query_embeddings: List[List[float]],
+        candidate_embeddings: Union[List[List[float]], CandidateMatrix],
+        top_k: int = 5
+    ) -> List[List[int]]:
+        """
+        Find indices of most similar embeddings for each of many queries.
         
-        # Return top-k indices
-        return [idx for idx, _ in similarities[:top_k]]
-
+        Pass a CandidateMatrix to reuse pre-normalized candidates across calls.
+        """
+        indices, _ = top_k_similar(query_embeddings, candidate_embeddings, top_k)
+        return indices.tolist()
@@ -0,0 +1,45 @@
+# @author: fatima bashir
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+import hashlib
+import re
+
+import numpy as np
+
+# Feature hashing gives texts that share words similar vectors, so this
+# offline stand-in for the OpenAI model still returns meaningful neighbours
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=200_000)
+def token_slot(token: str, dimension: int) -> Tuple[int, float]:
+    """Map a token to its (dimension index, sign) using a stable hash."""
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimension, 1.0 if value >> 63 else -1.0
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def hash_embedding(text: str, dimension: int) -> np.ndarray:
+    """Embed one text as the normalized signed sum of its hashed tokens."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in tokenize(text):
+        index, sign = token_slot(token, dimension)
+        vector[index] += sign
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        # Texts without tokens still need a valid, deterministic direction
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+        norm = np.linalg.norm(vector)
+    return vector / norm
+
+
+def hash_embed_texts(texts: Sequence[str], dimension: int) -> List[List[float]]:
+    """Embed texts with hash_embedding."""
+    return [hash_embedding(text, dimension).tolist() for text in texts]
@@ -0,0 +1,346 @@
+# @author: fatima bashir
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import asyncio
+import os
+import tempfile
+import uuid
+import aiofiles
+import structlog
+from fastapi import UploadFile
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bulk_writer import DocChunkWriter
+from app.core.config import settings
+from app.services.embeddings import EmbeddingService
+from app.services.bm25 import bm25_index
+from app.services.result_cache import search_result_cache
+from app.services.vector_store import local_vector_store
+
+logger = structlog.get_logger()
+
+# Group this many paragraphs/rows/lines into one extracted "page"
+LINES_PER_PAGE = 200
+
+
+def extract_pages(path: str, filename: str) -> Iterator[str]:
+    """Yield the text of a document one page (or page-sized block) at a time."""
+    extension = os.path.splitext(filename or "")[1].lower()
+
+    if extension == ".pdf":
+        from PyPDF2 import PdfReader
+
+        # PdfReader parses pages lazily from the file on disk
+        for page in PdfReader(path).pages:
+            yield page.extract_text() or ""
+
+    elif extension == ".docx":
+        from docx import Document
+
+        paragraphs = (p.text for p in Document(path).paragraphs)
+        yield from _group_lines(paragraphs)
+
+    elif extension == ".xlsx":
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                rows = (
+                    " ".join(str(cell) for cell in row if cell is not None)
+                    for row in sheet.iter_rows(values_only=True)
+                )
+                yield from _group_lines(rows)
+        finally:
+            workbook.close()
+
+    elif extension in (".html", ".htm"):
+        from bs4 import BeautifulSoup
+
+        with open(path, "rb") as f:
+            yield BeautifulSoup(f, "html.parser").get_text(" ")
+
+    elif extension in (".md", ".markdown"):
+        import markdown
+        from bs4 import BeautifulSoup
+
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            # Convert block by block so large files never materialize at once
+            for block in _group_lines(f):
+                yield BeautifulSoup(markdown.markdown(block), "html.parser").get_text(" ")
+
+    else:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            yield from _group_lines(f)
+
+
+def _group_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Join an iterable of lines into page-sized blocks."""
+    block: List[str] = []
+    for line in lines:
+        block.append(line.rstrip("\n"))
+        if len(block) >= LINES_PER_PAGE:
+            yield "\n".join(block)
+            block = []
+    if block:
+        yield "\n".join(block)
+
+
+def chunk_text(
+    pages: Iterable[str],
+    chunk_size: int = settings.CHUNK_SIZE,
+    overlap: int = settings.CHUNK_OVERLAP,
+) -> Iterator[str]:
+    """
+    Yield overlapping word-window chunks from a stream of pages.
+
+    Only one chunk's worth of words is held at a time, so memory does not
+    grow with document size. Sizes are in words, a close proxy for tokens.
+    """
+    window: deque = deque()
+    fresh = 0  # Words in the window not yet emitted in a chunk
+
+    for page in pages:
+        for word in page.split():
+            window.append(word)
+            fresh += 1
+            if len(window) >= chunk_size:
+                yield " ".join(window)
+                # Keep the tail as the overlap for the next chunk
+                for _ in range(len(window) - overlap):
+                    window.popleft()
+                fresh = 0
+
+    if fresh:
+        yield " ".join(window)
+
+
+class DocumentIngestionService:
+    """Service for streaming documents into chunked, embedded doc_chunks rows and removing them."""
+
+    def __init__(self, db: AsyncSession, embedding_service: EmbeddingService):
+        self.db = db
+        self.embedding_service = embedding_service
+
+    async def ingest_upload(
+        self,
+        file: UploadFile,
+        title: str,
+        artifact_type: str,
+        user_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Spool, extract, chunk, embed and store an uploaded document.
+        """
+        path = await self._spool_upload(file)
+        try:
+            document_id = uuid.uuid4().hex
+            file_size = os.path.getsize(path)
+
+            artifact_id = None
+            if user_id:
+                artifact_id = document_id
+                await self._create_artifact(
+                    artifact_id, user_id, title, artifact_type, file, file_size
+                )
+
+            base_metadata = {
+                "document_id": document_id,
+                "title": title,
+                "type": artifact_type,
+                "filename": file.filename,
+                "source": source,
+            }
+            chunks_created = await self._ingest_file(
+                path, file.filename, artifact_id, base_metadata
+            )
+
+            await self.db.commit()
+            try:
+                # Streamed back from the database, so ingestion memory stays flat
+                await bm25_index.add_document(self.db, document_id)
+                await local_vector_store.add_document(self.db, document_id)
+            except Exception as e:
+                # The refresh loops pick the document up on their next run
+                logger.error(
+                    "In-process index update failed", error=str(e), document_id=document_id
+                )
+            # After the in-process indexes, so re-cached results include the document
+            await search_result_cache.invalidate_user(user_id)
+
+            logger.info(
+                "Document ingested",
+                document_id=document_id,
+                filename=file.filename,
+                file_size=file_size,
+                chunks_created=chunks_created,
+            )
+
+            return {"id": document_id, "chunks_created": chunks_created}
+
+        finally:
+            os.unlink(path)
+
+    async def delete_document(self, document_id: str) -> int:
+        """
+        Delete a document's chunks and artifact, returning the chunk count.
+        """
+        result = await self.db.execute(
+            text("SELECT user_id FROM artifacts WHERE id = :id"),
+            {"id": document_id},
+        )
+        user_id = result.scalar()
+
+        # Both sides are indexed (document-chunk-indexes.sql), so this is a BitmapOr
+        result = await self.db.execute(
+            text("""
+                DELETE FROM doc_chunks
+                WHERE artifact_id = :id OR metadata->>'document_id' = :id
+            """),
+            {"id": document_id},
+        )
+        chunks_deleted = result.rowcount
+
+        await self.db.execute(
+            text("DELETE FROM artifacts WHERE id = :id"),
+            {"id": document_id},
+        )
+        await self.db.commit()
+
+        await local_vector_store.remove_document(document_id)
+        bm25_index.remove_document(document_id)
+        if chunks_deleted or user_id:
+            await search_result_cache.invalidate_user(user_id)
+
+        logger.info(
+            "Document deleted",
+            document_id=document_id,
+            chunks_deleted=chunks_deleted,
+        )
+
+        return chunks_deleted
+
+    async def _spool_upload(self, file: UploadFile) -> str:
+        """
+        Copy the upload to a temporary file in fixed-size chunks.
+        """
+        suffix = os.path.splitext(file.filename or "")[1]
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+
+        async with aiofiles.open(path, "wb") as out:
+            while True:
+                data = await file.read(settings.UPLOAD_READ_SIZE)
+                if not data:
+                    break
+                await out.write(data)
+
+        return path
+
+    async def _ingest_file(
+        self,
+        path: str,
+        filename: str,
+        artifact_id: Optional[str],
+        base_metadata: Dict[str, Any],
+    ) -> int:
+        """
+        Stream chunks through embedding and storage in batches.
+
+        Extraction of the next batch overlaps with embedding and writing of
+        the previous one; at most one batch is in flight at a time.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = chunk_text(extract_pages(path, filename))
+        writer = DocChunkWriter(self.db)
+        pending: Optional[asyncio.Task] = None
+        batch: List[str] = []
+        chunk_index = 0
+
+        while True:
+            # Extraction is blocking (PDF parsing etc.), so pull chunks off-loop
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is not None:
+                batch.append(chunk)
+
+            if batch and (chunk is None or len(batch) >= settings.INGEST_BATCH_SIZE):
+                if pending is not None:
+                    await pending
+                pending = asyncio.create_task(
+                    self._store_batch(
+                        batch, chunk_index, artifact_id, base_metadata, writer
+                    )
+                )
+                chunk_index += len(batch)
+                batch = []
+
+            if chunk is None:
+                break
+
+        if pending is not None:
+            await pending
+
+        logger.debug("Document chunks written", **writer.stats.to_dict())
+
+        return chunk_index
+
+    async def _store_batch(
+        self,
+        batch: List[str],
+        start_index: int,
+        artifact_id: Optional[str],
+        base_metadata: Dict[str, Any],
+        writer: DocChunkWriter,
+    ) -> None:
+        """
+        Embed one batch of chunks and bulk-write the rows.
+        """
+        embeddings = await self.embedding_service.embed_texts(batch)
+
+        rows = [
+            {
+                "id": uuid.uuid4().hex,
+                "artifact_id": artifact_id,
+                "content": content,
+                "embedding": embedding,
+                "metadata": {**base_metadata, "chunk_index": start_index + i},
+                "chunk_index": start_index + i,
+            }
+            for i, (content, embedding) in enumerate(zip(batch, embeddings))
+        ]
+        
+        await writer.write(rows)
+
+    async def _create_artifact(
+        self,
+        artifact_id: str,
+        user_id: str,
+        title: str,
+        artifact_type: str,
+        file: UploadFile,
+        file_size: int,
+    ) -> None:
+        """
+        Create the artifacts row that owns the document's chunks.
+        """
+        await self.db.execute(
+            text("""
+                INSERT INTO artifacts
+                    (id, user_id, title, type, file_name, file_size, mime_type,
+                     tags, created_at, updated_at)
+                VALUES
+                    (:id, :user_id, :title, :type, :file_name, :file_size, :mime_type,
+                     ARRAY[]::text[], now(), now())
+            """),
+            {
+                "id": artifact_id,
+                "user_id": user_id,
+                "title": title,
+                "type": artifact_type,
+                "file_name": file.filename,
+                "file_size": file_size,
+                "mime_type": file.content_type,
+            },
+        )
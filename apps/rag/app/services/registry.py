@@ -0,0 +1,123 @@
+# @author: fatima bashir
+from typing import Optional
+import asyncio
+import time
+import httpx
+import openai
+import structlog
+from sentence_transformers import CrossEncoder, SentenceTransformer
+
+from app.core.config import settings
+from app.core.cache import close_redis
+from app.core.metrics import MODEL_LOADS
+from app.services.embeddings import (
+    EmbeddingService,
+    create_openai_client,
+    create_openai_http_client,
+)
+from app.services.embedding_batcher import EmbeddingCoalescer
+from app.services.rerank import RerankService
+from app.services.rerank_pool import RerankWorkerPool
+
+logger = structlog.get_logger()
+
+
+class ModelRegistry:
+    """Process-wide owner of models, API clients and the services built on them."""
+
+    def __init__(self):
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.openai_client: Optional[openai.AsyncOpenAI] = None
+        self.sentence_transformer: Optional[SentenceTransformer] = None
+        self.cross_encoder: Optional[CrossEncoder] = None
+        self.embedding_service: Optional[EmbeddingService] = None
+        self.embedding_coalescer: Optional[EmbeddingCoalescer] = None
+        self.rerank_pool: Optional[RerankWorkerPool] = None
+        self.rerank_service: Optional[RerankService] = None
+        self.ready = False
+
+    async def startup(self, warm_up: bool = settings.MODEL_WARMUP):
+        """
+        Construct shared clients and services, loading and warming models.
+        """
+        # Every OpenAI client in the process shares one connection pool
+        self.http_client = create_openai_http_client()
+        self.openai_client = create_openai_client(self.http_client)
+
+        if warm_up:
+            loop = asyncio.get_running_loop()
+            self.sentence_transformer, self.cross_encoder = await asyncio.gather(
+                loop.run_in_executor(None, self._load_sentence_transformer),
+                loop.run_in_executor(None, self._load_cross_encoder),
+            )
+
+        self.embedding_service = EmbeddingService(
+            openai_client=self.openai_client,
+            st_model=self.sentence_transformer,
+        )
+        self.embedding_coalescer = EmbeddingCoalescer(self.embedding_service)
+        
+        if self.cross_encoder is not None or settings.RERANK_EXECUTOR == "process":
+            self.rerank_pool = RerankWorkerPool(cross_encoder=self.cross_encoder)
+            await self.rerank_pool.start()
+        self.rerank_service = RerankService(
+            cross_encoder=self.cross_encoder,
+            worker_pool=self.rerank_pool,
+        )
+        self.ready = True
+
+        logger.info("Model registry ready", warmed_up=warm_up)
+
+    async def shutdown(self):
+        """
+        Release API clients, the shared HTTP pool and cache connections.
+        """
+        if self.rerank_pool is not None:
+            await self.rerank_pool.shutdown()
+        if self.openai_client is not None:
+            await self.openai_client.close()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        await close_redis()
+        self.ready = False
+        logger.info("Model registry shut down")
+
+    def _load_sentence_transformer(self) -> SentenceTransformer:
+        """
+        Load the fallback embedding model and run a dummy inference.
+        """
+        started = time.perf_counter()
+        model = SentenceTransformer(settings.FALLBACK_EMBEDDING_MODEL)
+        model.encode(["warm up"])
+        MODEL_LOADS.labels(model=settings.FALLBACK_EMBEDDING_MODEL).inc()
+        logger.info(
+            "Sentence transformer loaded",
+            model=settings.FALLBACK_EMBEDDING_MODEL,
+            load_time_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        return model
+
+    def _load_cross_encoder(self) -> CrossEncoder:
+        """
+        Load the rerank cross-encoder and run a dummy inference.
+        """
+        started = time.perf_counter()
+        model = CrossEncoder(settings.RERANK_MODEL)
+        model.predict([("warm up", "warm up")])
+        MODEL_LOADS.labels(model=settings.RERANK_MODEL).inc()
+        logger.info(
+            "Cross-encoder loaded",
+            model=settings.RERANK_MODEL,
+            load_time_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        return model
+
+
+registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    if not registry.ready:
+        raise RuntimeError("Model registry has not been started")
+    return registry
@@ -1,10 +1,13 @@
 # @author: fatima bashir
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import asyncio
+import time
 import structlog
 from sentence_transformers import CrossEncoder
 
 from app.core.config import settings
+from app.core.metrics import FALLBACKS, MODEL_LOADS, record_stage
+from app.services.rerank_pool import RerankWorkerPool
 
 logger = structlog.get_logger()
 
@@ -12,8 +15,14 @@ logger = structlog.get_logger()
 class RerankService:
     """Service for reranking search results."""
     
-    def __init__(self):
-        self.cross_encoder = None
+    def __init__(
+        self,
+        cross_encoder: Optional[CrossEncoder] = None,
+        worker_pool: Optional[RerankWorkerPool] = None,
+    ):
+        # Loaded lazily on first use unless provided by the model registry
+        self.cross_encoder = cross_encoder
+        self.worker_pool = worker_pool
         
     async def rerank(
         self,
@@ -24,52 +33,255 @@ class RerankService:
         """
         Rerank search results using a cross-encoder model.
         """
+        reranked_results, _ = await self.rerank_with_stats(query, results, top_k)
+        return reranked_results
+    
+    async def rerank_with_stats(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        top_k: int = 5,
+        prefilter_top_n: int = settings.RERANK_PREFILTER_TOP_N,
+        max_passage_tokens: int = settings.RERANK_MAX_PASSAGE_TOKENS,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Rerank in stages and report per-stage latency.
+        
+        Stage 1 keeps the prefilter_top_n candidates with the highest vector
+        similarity to the query (already computed by the search), with
+        RERANK_PREFILTER_KEYWORD_SLOTS of them reserved for the best keyword
+        matches, stage 2 truncates passages to the model's window, and only
+        then does the cross-encoder score them.
+        """
+        stats: Dict[str, Any] = {"candidates": len(results)}
         try:
             if len(results) <= 1:
-                return results
+                return results, stats
             
-            # Initialize model if needed
-            if self.cross_encoder is None:
-                await self._initialize_model()
+            # Stage 1: cheap vector prefilter
+            started = time.perf_counter()
+            candidates, rest = self._prefilter(results, prefilter_top_n)
+            stats["prefiltered"] = len(candidates)
+            stats["prefilter_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            
+            # Stage 2: truncate passages to the model's token window
+            started = time.perf_counter()
+            passages = self._truncate_passages(
+                [result["content"] for result in candidates], max_passage_tokens
+            )
+            stats["truncated_passages"] = sum(
+                len(passage) < len(result["content"])
+                for passage, result in zip(passages, candidates)
+            )
+            stats["truncate_ms"] = round((time.perf_counter() - started) * 1000, 3)
             
             # Prepare query-document pairs
-            query_doc_pairs = [
-                (query, result["content"]) for result in results
-            ]
+            query_doc_pairs = [(query, passage) for passage in passages]
             
-            # Run reranking in thread pool
-            loop = asyncio.get_event_loop()
-            scores = await loop.run_in_executor(
-                None, self.cross_encoder.predict, query_doc_pairs
-            )
+            # Stage 3: cross-encoder
+            started = time.perf_counter()
+            scores = await self._predict(query_doc_pairs)
+            stats["cross_encoder_ms"] = round((time.perf_counter() - started) * 1000, 3)
             
-            # Update results with rerank scores
-            for i, result in enumerate(results):
-                result["rerank_score"] = float(scores[i])
-                # Combine with original score
-                result["final_score"] = (
-                    0.7 * float(scores[i]) + 0.3 * result.get("score", 0.0)
-                )
+            reranked_results = self._apply_scores(candidates, rest, scores, top_k)
             
-            # Sort by final score
-            reranked_results = sorted(
-                results,
-                key=lambda x: x["final_score"],
-                reverse=True
+            # Quality proxy: how much of the final top_k the prefilter alone would have picked
+            prefilter_ids = {id(result) for result in (candidates + rest)[:top_k]}
+            stats["prefilter_agreement"] = round(
+                sum(id(result) in prefilter_ids for result in reranked_results)
+                / max(len(reranked_results), 1),
+                3,
             )
             
+            for stage in ("prefilter", "truncate", "cross_encoder"):
+                record_stage(f"rerank_{stage}", stats[f"{stage}_ms"] / 1000)
+            
             logger.info(
                 "Reranking completed",
                 original_count=len(results),
-                reranked_count=min(len(reranked_results), top_k)
+                reranked_count=len(reranked_results),
+                **stats,
             )
             
-            return reranked_results[:top_k]
+            return reranked_results, stats
             
         except Exception as e:
             logger.error("Reranking failed, returning original results", error=str(e))
+            FALLBACKS.labels(component="rerank").inc()
+            stats["fallback"] = True
             # Fallback to original results
-            return results[:top_k]
+            return results[:top_k], stats
+    
+    async def rerank_batch(
+        self,
+        queries: List[str],
+        results: List[List[Dict[str, Any]]],
+        top_k: List[int],
+        prefilter_top_n: int = settings.RERANK_PREFILTER_TOP_N,
+        max_passage_tokens: int = settings.RERANK_MAX_PASSAGE_TOKENS,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Rerank the results of several queries with a single cross-encoder call.
+        
+        Each query goes through the same prefilter and truncation stages as
+        rerank_with_stats; the pairs of all queries are then scored together
+        and split back out per query.
+        """
+        try:
+            prepared: List[Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]] = []
+            query_doc_pairs: List[Tuple[str, str]] = []
+            for query, query_results in zip(queries, results):
+                if len(query_results) <= 1:
+                    prepared.append(None)
+                    continue
+                candidates, rest = self._prefilter(query_results, prefilter_top_n)
+                passages = self._truncate_passages(
+                    [result["content"] for result in candidates], max_passage_tokens
+                )
+                query_doc_pairs.extend((query, passage) for passage in passages)
+                prepared.append((candidates, rest))
+            
+            started = time.perf_counter()
+            scores = await self._predict(query_doc_pairs) if query_doc_pairs else []
+            record_stage("rerank_cross_encoder", time.perf_counter() - started)
+            
+            reranked: List[List[Dict[str, Any]]] = []
+            offset = 0
+            for query_results, query_top_k, item in zip(results, top_k, prepared):
+                if item is None:
+                    reranked.append(query_results[:query_top_k])
+                    continue
+                candidates, rest = item
+                reranked.append(self._apply_scores(
+                    candidates,
+                    rest,
+                    scores[offset:offset + len(candidates)],
+                    query_top_k,
+                ))
+                offset += len(candidates)
+            
+            logger.info(
+                "Batch reranking completed",
+                queries=len(queries),
+                pairs=len(query_doc_pairs),
+            )
+            
+            return reranked
+            
+        except Exception as e:
+            logger.error("Batch reranking failed, returning original results", error=str(e))
+            FALLBACKS.labels(component="rerank").inc()
+            return [query_results[:k] for query_results, k in zip(results, top_k)]
+    
+    async def _predict(self, query_doc_pairs: List[Tuple[str, str]]) -> List[float]:
+        """
+        Score query/document pairs on the worker pool or the local model.
+        """
+        if self.worker_pool is not None:
+            # Shared workers merge pairs from concurrent requests
+            return await self.worker_pool.predict(query_doc_pairs)
+        
+        # Initialize model if needed
+        if self.cross_encoder is None:
+            await self._initialize_model()
+        
+        # Run reranking in thread pool
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, self.cross_encoder.predict, query_doc_pairs
+        )
+    
+    @classmethod
+    def _prefilter(
+        cls,
+        results: List[Dict[str, Any]],
+        top_n: int,
+        keyword_slots: int = settings.RERANK_PREFILTER_KEYWORD_SLOTS,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split results into cross-encoder candidates and the rest, both in vector order.
+        
+        Keyword-only hits from the parallel hybrid path carry no vector
+        similarity and would always sort last, so the best keyword matches
+        get up to keyword_slots of the top_n places.
+        """
+        by_similarity = sorted(results, key=cls._similarity, reverse=True)
+        if len(by_similarity) <= top_n:
+            return by_similarity, []
+        
+        keyword_hits = sorted(
+            (result for result in results if result.get("keyword_score")),
+            key=lambda result: result["keyword_score"],
+            reverse=True,
+        )[:min(keyword_slots, top_n)]
+        reserved = {id(result) for result in keyword_hits}
+        vector_hits = [result for result in by_similarity if id(result) not in reserved]
+        
+        chosen = reserved | {id(result) for result in vector_hits[:top_n - len(keyword_hits)]}
+        candidates = [result for result in by_similarity if id(result) in chosen]
+        rest = [result for result in by_similarity if id(result) not in chosen]
+        return candidates, rest
+    
+    @staticmethod
+    def _apply_scores(
+        candidates: List[Dict[str, Any]],
+        rest: List[Dict[str, Any]],
+        scores: List[float],
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Attach cross-encoder scores to the candidates and order the final results.
+        """
+        # Update results with rerank scores
+        for i, result in enumerate(candidates):
+            result["rerank_score"] = float(scores[i])
+            # Combine with original score
+            result["final_score"] = (
+                0.7 * float(scores[i]) + 0.3 * result.get("score", 0.0)
+            )
+        
+        # Sort by final score; anything cut by the prefilter follows in vector order
+        reranked_results = sorted(
+            candidates,
+            key=lambda x: x["final_score"],
+            reverse=True
+        ) + rest
+        return reranked_results[:top_k]
+    
+    @staticmethod
+    def _similarity(result: Dict[str, Any]) -> float:
+        """
+        Vector similarity to the query, falling back to the retrieval score.
+        """
+        for key in ("similarity", "semantic_score", "score"):
+            if result.get(key) is not None:
+                return float(result[key])
+        return 0.0
+    
+    def _truncate_passages(self, passages: List[str], max_tokens: int) -> List[str]:
+        """
+        Cut passages to at most max_tokens using the model's fast tokenizer.
+        """
+        # Bound tokenizer work on very long chunks; tokens rarely exceed 8 chars
+        passages = [passage[:max_tokens * 8] for passage in passages]
+        
+        tokenizer = getattr(self.cross_encoder, "tokenizer", None)
+        if tokenizer is None or not getattr(tokenizer, "is_fast", False):
+            # Roughly 0.75 words per token
+            word_limit = int(max_tokens * 0.75)
+            return [" ".join(passage.split()[:word_limit]) for passage in passages]
+        
+        encoded = tokenizer(
+            passages,
+            add_special_tokens=False,
+            truncation=True,
+            max_length=max_tokens,
+            return_offsets_mapping=True,
+        )
+        return [
+            passage[:offsets[-1][1]] if offsets else passage
+            for passage, offsets in zip(passages, encoded["offset_mapping"])
+        ]
     
     async def _initialize_model(self):
         """
@@ -80,8 +292,9 @@ class RerankService:
             self.cross_encoder = await loop.run_in_executor(
                 None,
                 CrossEncoder,
-                'cross-encoder/ms-marco-MiniLM-L-2-v2'
+                settings.RERANK_MODEL
             )
+            MODEL_LOADS.labels(model=settings.RERANK_MODEL).inc()
             logger.info("Cross-encoder model initialized successfully")
             
         except Exception as e:
@@ -0,0 +1,195 @@
+# @author: fatima bashir
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import asyncio
+import multiprocessing
+import time
+import structlog
+from sentence_transformers import CrossEncoder
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+Pair = Tuple[str, str]
+
+# Cross-encoder owned by a worker process (process executor only)
+_worker_model: Optional[CrossEncoder] = None
+
+
+def _init_worker(model_name: str, torch_threads: int) -> None:
+    """Pin torch threads and load the cross-encoder in a worker process."""
+    global _worker_model
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    _worker_model = CrossEncoder(model_name)
+    _worker_model.predict([("warm up", "warm up")])
+
+
+def _predict_in_worker(pairs: List[Pair]) -> List[float]:
+    """Score pairs with the worker process's cross-encoder."""
+    return [float(score) for score in _worker_model.predict(pairs)]
+
+
+class RerankWorkerPool:
+    """Fixed pool of cross-encoder workers fed by a bounded, batch-merging queue."""
+
+    def __init__(
+        self,
+        cross_encoder: Optional[CrossEncoder] = None,
+        executor_type: str = settings.RERANK_EXECUTOR,
+        workers: int = settings.RERANK_WORKERS,
+        torch_threads: int = settings.RERANK_TORCH_THREADS,
+        max_batch_pairs: int = settings.RERANK_MAX_BATCH_PAIRS,
+        window_ms: float = settings.RERANK_BATCH_WINDOW_MS,
+        max_queue: int = settings.RERANK_MAX_QUEUE,
+    ):
+        self.cross_encoder = cross_encoder
+        self.executor_type = executor_type
+        self.workers = workers
+        self.torch_threads = torch_threads
+        self.max_batch_pairs = max_batch_pairs
+        self.window = window_ms / 1000.0
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"requests": 0, "batches": 0, "pairs": 0, "rejected": 0}
+
+    async def start(self):
+        """
+        Start the executor and the dispatcher task.
+        """
+        if self.executor_type == "process":
+            # spawn, not fork: forking a process with torch loaded can deadlock
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.RERANK_MODEL, self.torch_threads),
+            )
+            loop = asyncio.get_running_loop()
+            # Start every worker process now rather than on the first request
+            await asyncio.gather(*[
+                loop.run_in_executor(self._executor, _predict_in_worker, [("warm up", "warm up")])
+                for _ in range(self.workers)
+            ])
+        else:
+            if self.cross_encoder is None:
+                raise ValueError("Thread executor requires a loaded cross-encoder")
+            import torch
+
+            # Intra-op threads are process-wide, so this bounds every worker together
+            torch.set_num_threads(self.torch_threads)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="rerank"
+            )
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+        logger.info(
+            "Rerank worker pool started",
+            executor=self.executor_type,
+            workers=self.workers,
+            torch_threads=self.torch_threads,
+        )
+
+    async def shutdown(self):
+        """
+        Stop dispatching and shut the executor down.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Rerank worker pool stopped")
+
+    async def predict(self, pairs: List[Pair]) -> List[float]:
+        """
+        Score query/document pairs, sharing a predict batch with concurrent callers.
+
+        Raises asyncio.QueueFull when the queue is saturated so callers can
+        degrade instead of piling up latency.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((pairs, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise
+        self.stats["requests"] += 1
+        return await future
+
+    async def _dispatch(self):
+        """
+        Merge queued requests into batches and hand them to free workers.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free worker first so requests keep merging while all are busy
+            await self._slots.acquire()
+            jobs = [await self._queue.get()]
+            pair_count = len(jobs[0][0])
+
+            deadline = loop.time() + self.window
+            while pair_count < self.max_batch_pairs:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        job = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    job = self._queue.get_nowait()
+                jobs.append(job)
+                pair_count += len(job[0])
+
+            task = asyncio.create_task(self._run_batch(jobs))
+            task.add_done_callback(lambda _: self._slots.release())
+
+    async def _run_batch(self, jobs: List[Tuple[List[Pair], asyncio.Future, float]]):
+        """
+        Run one merged predict call and split the scores back out.
+        """
+        pairs = [pair for job_pairs, _, _ in jobs for pair in job_pairs]
+        loop = asyncio.get_running_loop()
+
+        try:
+            if self.executor_type == "process":
+                scores = await loop.run_in_executor(self._executor, _predict_in_worker, pairs)
+            else:
+                scores = await loop.run_in_executor(
+                    self._executor, self.cross_encoder.predict, pairs
+                )
+        except Exception as e:
+            logger.error("Rerank batch failed", error=str(e), pairs=len(pairs))
+            for _, future, _ in jobs:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["pairs"] += len(pairs)
+
+        offset = 0
+        for job_pairs, future, _ in jobs:
+            if not future.done():
+                future.set_result(
+                    [float(score) for score in scores[offset:offset + len(job_pairs)]]
+                )
+            offset += len(job_pairs)
+
+        logger.debug(
+            "Rerank batch completed",
+            requests=len(jobs),
+            pairs=len(pairs),
+            max_queue_wait_ms=round(
+                max(time.perf_counter() - enqueued for _, _, enqueued in jobs) * 1000, 2
+            ),
+        )
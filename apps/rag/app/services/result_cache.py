@@ -0,0 +1,173 @@
+# @author: fatima bashir
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import json
+import structlog
+
+from app.core.config import settings
+from app.core.cache import get_redis
+from app.core.metrics import CACHE_EVENTS
+from app.services.embedding_cache import EmbeddingCache
+
+logger = structlog.get_logger()
+
+# Generation counter for searches not scoped to a user (they see every document)
+GLOBAL_SCOPE = "__all__"
+
+# Read the scope's generation and the result stored under it in one round trip
+LOOKUP_SCRIPT = """
+local generation = redis.call('GET', KEYS[1]) or '0'
+local value = redis.call('GET', ARGV[1] .. ':' .. generation .. ':' .. ARGV[2])
+return {generation, value}
+"""
+
+
+class SearchResultCache:
+    """Redis cache of final search results, invalidated by per-user generations."""
+
+    def __init__(self, ttl: int = settings.REDIS_CACHE_TTL, prefix: str = "search"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lookup = None
+        self._pending: Set[asyncio.Task] = set()
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def make_digest(
+        self,
+        query: str,
+        user_id: Optional[str],
+        filters: Optional[Dict],
+        top_k: int,
+        variant: str,
+    ) -> str:
+        """
+        Hash everything that determines a search's results.
+        """
+        payload = json.dumps(
+            {
+                "query": EmbeddingCache.normalize(query),
+                "user_id": user_id,
+                "filters": filters or {},
+                "top_k": top_k,
+                "variant": variant,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(
+        self,
+        query: str,
+        user_id: Optional[str],
+        filters: Optional[Dict],
+        top_k: int,
+        variant: str = "hybrid",
+    ) -> Tuple[Optional[int], Optional[List[Dict[str, Any]]]]:
+        """
+        Return (generation, cached results or None) for the scope.
+
+        Pass the generation back to set() so results computed while a
+        document change lands are stored under the old, dead generation.
+        """
+        scope = user_id or GLOBAL_SCOPE
+        digest = self.make_digest(query, user_id, filters, top_k, variant)
+
+        try:
+            if self._lookup is None:
+                self._lookup = get_redis().register_script(LOOKUP_SCRIPT)
+            generation, value = await self._lookup(
+                keys=[self._generation_key(scope)],
+                args=[f"{self.prefix}:{scope}", digest],
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            CACHE_EVENTS.labels(cache="search", outcome="error").inc()
+            logger.warning("Search cache lookup failed", error=str(e))
+            return None, None
+
+        if value is None:
+            self.stats["misses"] += 1
+            CACHE_EVENTS.labels(cache="search", outcome="miss").inc()
+            return int(generation), None
+
+        self.stats["hits"] += 1
+        CACHE_EVENTS.labels(cache="search", outcome="hit").inc()
+        return int(generation), json.loads(value)
+
+    async def set(
+        self,
+        query: str,
+        user_id: Optional[str],
+        filters: Optional[Dict],
+        top_k: int,
+        results: List[Dict[str, Any]],
+        generation: Optional[int],
+        variant: str = "hybrid",
+    ) -> None:
+        """
+        Store results under the generation observed by get().
+        """
+        if generation is None:
+            return
+
+        scope = user_id or GLOBAL_SCOPE
+        digest = self.make_digest(query, user_id, filters, top_k, variant)
+
+        try:
+            await get_redis().set(
+                f"{self.prefix}:{scope}:{generation}:{digest}",
+                json.dumps(results, default=str),
+                ex=self.ttl,
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning("Search cache write failed", error=str(e))
+
+    async def invalidate_user(self, user_id: Optional[str]) -> None:
+        """
+        Bump generations so no cached result predating a document change is served.
+
+        Unscoped searches see every user's documents, so the global
+        generation is bumped on every change. Stale entries expire via TTL.
+        With a read replica, searches during replication lag can cache
+        pre-change results under the new generation, so it is bumped again
+        once the lag has passed.
+
+        Called after the change has committed, so Redis errors are logged
+        rather than raised; stale entries then live until their TTL.
+        """
+        await self._bump_generations(user_id)
+
+        if settings.DATABASE_READ_URL:
+            task = asyncio.create_task(self._bump_after_lag(user_id))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _bump_generations(self, user_id: Optional[str]) -> None:
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            if user_id:
+                pipe.incr(self._generation_key(user_id))
+            pipe.incr(self._generation_key(GLOBAL_SCOPE))
+            await pipe.execute()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error("Search cache invalidation failed", error=str(e), user_id=user_id)
+
+    async def _bump_after_lag(self, user_id: Optional[str]) -> None:
+        await asyncio.sleep(settings.READ_REPLICA_MAX_LAG)
+        await self._bump_generations(user_id)
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self.prefix}:gen:{scope}"
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters.
+        """
+        return dict(self.stats)
+
+
+search_result_cache = SearchResultCache()
@@ -1,24 +1,253 @@
 # @author: fatima bashir
-from typing import List, Dict, Optional, Any
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Tuple
 import asyncio
+import time
 from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
-import openai
 
 from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.core.metrics import stage_timer
+from app.services.ann_index import ann_index_manager
+from app.services.bm25 import bm25_index
 from app.services.embeddings import EmbeddingService
+from app.services.embedding_batcher import EmbeddingCoalescer
+from app.services.registry import registry
+from app.services.vector_store import (
+    RESCORE_SQL,
+    build_filters,
+    local_vector_store,
+    select_vector_store,
+)
 
 logger = structlog.get_logger()
 
+# SQL templates. {filter_sql} comes from SearchService._build_filters, so each
+# template has only a handful of distinct renderings; building each statement
+# once keeps the SQL text stable and lets asyncpg reuse its prepared statement.
+KEYWORD_SQL = {
+    # Trigram similarity over the whole content
+    "trigram": """
+        SELECT
+            dc.id,
+            dc.content,
+            dc.metadata,
+            a.title as source,
+            SIMILARITY(dc.content, :query) as bm25_score
+        FROM doc_chunks dc
+        LEFT JOIN artifacts a ON dc.artifact_id = a.id
+        WHERE SIMILARITY(dc.content, :query) > 0.1
+            {filter_sql}
+        ORDER BY bm25_score DESC
+        LIMIT :top_k
+    """,
+    # Full-text match on the stored tsvector (GIN index), ranked by cover
+    # density; normalization 32 maps the rank into 0-1 like the other scores
+    "fulltext": """
+        SELECT
+            dc.id,
+            dc.content,
+            dc.metadata,
+            a.title as source,
+            ts_rank_cd(dc.content_tsv, websearch_to_tsquery('english', :query), 32) as bm25_score
+        FROM doc_chunks dc
+        LEFT JOIN artifacts a ON dc.artifact_id = a.id
+        WHERE dc.content_tsv @@ websearch_to_tsquery('english', :query)
+            {filter_sql}
+        ORDER BY bm25_score DESC
+        LIMIT :top_k
+    """,
+    # Typo-tolerant fallback: best trigram match of the query within the
+    # content (word_similarity), served by the trigram GIN index via <%
+    "fuzzy": """
+        SELECT
+            dc.id,
+            dc.content,
+            dc.metadata,
+            a.title as source,
+            word_similarity(:query, dc.content) as bm25_score
+        FROM doc_chunks dc
+        LEFT JOIN artifacts a ON dc.artifact_id = a.id
+        WHERE :query <% dc.content
+            {filter_sql}
+        ORDER BY bm25_score DESC
+        LIMIT :top_k
+    """,
+}
+
+# Keyword leg of the fused statement: (id, score) candidates per engine
+KEYWORD_LEG_SQL = {
+    "trigram": """
+            SELECT dc.id, SIMILARITY(dc.content, :query) AS score
+            FROM doc_chunks dc
+            LEFT JOIN artifacts a ON dc.artifact_id = a.id
+            WHERE SIMILARITY(dc.content, :query) > 0.1
+                {filter_sql}
+            ORDER BY score DESC
+            LIMIT :candidates""",
+    "fulltext": """
+            SELECT
+                dc.id,
+                ts_rank_cd(dc.content_tsv, websearch_to_tsquery('english', :query), 32) AS score
+            FROM doc_chunks dc
+            LEFT JOIN artifacts a ON dc.artifact_id = a.id
+            WHERE dc.content_tsv @@ websearch_to_tsquery('english', :query)
+                {filter_sql}
+            ORDER BY score DESC
+            LIMIT :candidates""",
+}
+
+# Semantic leg of the fused statement: (id, score) candidates, either from
+# the full-precision index or, like QUANTIZED_SEMANTIC_SQL, from a Hamming
+# prefilter on embedding_bits rescored with {rescore_sql}
+SEMANTIC_LEG_SQL = {
+    "exact": """
+            SELECT
+                dc.id,
+                1 - (dc.embedding <=> (SELECT embedding FROM query_vector)) AS score
+            FROM doc_chunks dc
+            LEFT JOIN artifacts a ON dc.artifact_id = a.id
+            WHERE dc.embedding IS NOT NULL
+                {filter_sql}
+                AND 1 - (dc.embedding <=> (SELECT embedding FROM query_vector))
+                    > :similarity_threshold
+            ORDER BY dc.embedding <=> (SELECT embedding FROM query_vector)
+            LIMIT :candidates""",
+    "quantized": """
+            SELECT dc.id, 1 - ({rescore_sql}) AS score
+            FROM (
+                SELECT dc.id
+                FROM doc_chunks dc
+                LEFT JOIN artifacts a ON dc.artifact_id = a.id
+                WHERE dc.embedding_bits IS NOT NULL
+                    {filter_sql}
+                ORDER BY dc.embedding_bits <~> binary_quantize((SELECT embedding FROM query_vector))
+                LIMIT :quantized_candidates
+            ) bit_candidates
+            JOIN doc_chunks dc ON dc.id = bit_candidates.id
+            WHERE 1 - ({rescore_sql}) > :similarity_threshold
+            ORDER BY score DESC
+            LIMIT :candidates""",
+}
+
+HYDRATE_SQL = text("""
+    SELECT dc.id, dc.content, dc.metadata, a.title as source
+    FROM doc_chunks dc
+    LEFT JOIN artifacts a ON dc.artifact_id = a.id
+    WHERE dc.id = ANY(CAST(:ids AS text[]))
+""")
+
+FUSION_SQL = {
+    # Reciprocal rank fusion, weighted by the same helper
+    "rrf": """hybrid_search_score(
+        COALESCE(1.0 / (:rrf_k + s.rank), 0),
+        COALESCE(1.0 / (:rrf_k + k.rank), 0),
+        :semantic_weight
+    )""",
+    "weighted": """hybrid_search_score(
+        COALESCE(s.score, 0), COALESCE(k.score, 0), :semantic_weight
+    )""",
+}
+
+FUSED_SQL = """
+    WITH query_vector AS (
+        SELECT CAST(:embedding AS vector) AS embedding
+    ),
+    semantic AS (
+        SELECT id, score, ROW_NUMBER() OVER (ORDER BY score DESC) AS rank
+        FROM ({semantic_leg_sql}
+        ) semantic_candidates
+    ),
+    keyword AS (
+        SELECT id, score, ROW_NUMBER() OVER (ORDER BY score DESC) AS rank
+        FROM ({keyword_leg_sql}
+        ) keyword_candidates
+    ),
+    fused AS (
+        SELECT
+            COALESCE(s.id, k.id) AS id,
+            COALESCE(s.score, 0) AS semantic_score,
+            COALESCE(k.score, 0) AS keyword_score,
+            {fusion_sql} AS hybrid_score
+        FROM semantic s
+        FULL OUTER JOIN keyword k ON s.id = k.id
+        ORDER BY hybrid_score DESC
+        LIMIT :top_k
+    )
+    SELECT
+        dc.id,
+        dc.content,
+        dc.metadata,
+        a.title as source,
+        f.semantic_score,
+        f.keyword_score,
+        f.hybrid_score,
+        1 - (dc.embedding <=> (SELECT embedding FROM query_vector)) AS similarity
+    FROM fused f
+    JOIN doc_chunks dc ON dc.id = f.id
+    LEFT JOIN artifacts a ON dc.artifact_id = a.id
+    ORDER BY f.hybrid_score DESC
+"""
+
+
+@lru_cache(maxsize=None)
+def _keyword_statement(filter_sql: str, engine: str = "trigram") -> TextClause:
+    """Keyword search statement for a filter combination and SQL engine."""
+    sql = KEYWORD_SQL.get(engine, KEYWORD_SQL["trigram"])
+    return text(sql.format(filter_sql=filter_sql))
+
+
+@lru_cache(maxsize=None)
+def _fused_statement(
+    filter_sql: str,
+    fusion: str,
+    keyword_engine: str = "trigram",
+    rescore_column: Optional[str] = None,
+) -> TextClause:
+    """
+    Fused hybrid search statement for a filter combination, fusion method and
+    keyword leg. With a rescore_column the semantic leg is quantized.
+    """
+    fusion_sql = FUSION_SQL["rrf" if fusion == "rrf" else "weighted"]
+    keyword_leg_sql = KEYWORD_LEG_SQL.get(keyword_engine, KEYWORD_LEG_SQL["trigram"])
+    if rescore_column is None:
+        semantic_leg_sql = SEMANTIC_LEG_SQL["exact"].format(filter_sql=filter_sql)
+    else:
+        semantic_leg_sql = SEMANTIC_LEG_SQL["quantized"].format(
+            filter_sql=filter_sql,
+            rescore_sql=RESCORE_SQL.get(rescore_column, RESCORE_SQL["embedding_half"]),
+        )
+    return text(FUSED_SQL.format(
+        fusion_sql=fusion_sql,
+        semantic_leg_sql=semantic_leg_sql,
+        keyword_leg_sql=keyword_leg_sql.format(filter_sql=filter_sql),
+    ))
+
 
 class SearchService:
     """Service for hybrid search combining BM25 and semantic search."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        embedding_service: Optional[EmbeddingService] = None,
+        embedding_coalescer: Optional[EmbeddingCoalescer] = None,
+    ):
         self.db = db
-        self.embedding_service = EmbeddingService()
-        self.openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.embedding_service = (
+            embedding_service or registry.embedding_service or EmbeddingService()
+        )
+        if embedding_coalescer is None:
+            # Share the process-wide coalescer so concurrent requests batch together
+            shared = registry.embedding_coalescer
+            if shared is not None and shared.embedding_service is self.embedding_service:
+                embedding_coalescer = shared
+            else:
+                embedding_coalescer = EmbeddingCoalescer(self.embedding_service)
+        self.embedding_coalescer = embedding_coalescer
         
     async def hybrid_search(
         self,
@@ -26,27 +255,43 @@ class SearchService:
         user_id: Optional[str] = None,
         top_k: int = 10,
         filters: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Perform hybrid search combining BM25 and semantic search.
+        
+        A precomputed query_embedding skips the embedding call.
         """
-        try:
-            # Run both searches in parallel
-            semantic_task = asyncio.create_task(
-                self.semantic_search(query, user_id, top_k * 2, filters)
-            )
-            keyword_task = asyncio.create_task(
-                self.keyword_search(query, user_id, top_k * 2, filters)
+        # The in-process BM25 and local vector store legs cannot run inside
+        # the fused statement, so those searches take the two-leg path
+        if (
+            settings.HYBRID_SEARCH_MODE == "fused"
+            and not self._uses_bm25()
+            and not self.serves_locally(user_id)
+        ):
+            return await self._hybrid_search_fused(
+                query, user_id, top_k, filters, query_embedding
             )
+        
+        try:
+            candidates = top_k * settings.HYBRID_CANDIDATE_MULTIPLIER
             
+            # A session cannot run two statements at once, so the legs run
+            # concurrently on separate sessions: semantic on self.db, which
+            # carries the recall tier, and keyword on its own read session.
+            # A locally served semantic leg leaves self.db free for keywords.
             semantic_results, keyword_results = await asyncio.gather(
-                semantic_task, keyword_task
+                self.semantic_search(
+                    query, user_id, candidates, filters, query_embedding=query_embedding
+                ),
+                self._keyword_search_leg(query, user_id, candidates, filters),
             )
             
             # Combine and rerank results
-            combined_results = self._combine_search_results(
-                semantic_results, keyword_results, query
-            )
+            with stage_timer("fusion"):
+                combined_results = self._combine_search_results(
+                    semantic_results, keyword_results, query
+                )
             
             # Return top-k results
             return combined_results[:top_k]
@@ -55,7 +300,7 @@ class SearchService:
             logger.error("Hybrid search failed", error=str(e), query=query)
             raise
     
-    async def semantic_search(
+    async def _keyword_search_leg(
         self,
         query: str,
         user_id: Optional[str] = None,
@@ -63,66 +308,242 @@ class SearchService:
         filters: Optional[Dict] = None,
     ) -> List[Dict[str, Any]]:
         """
-        Perform semantic search using vector similarity.
+        Keyword leg of the two-leg hybrid path, on a session semantic search leaves free.
+        """
+        if self.serves_locally(user_id):
+            return await self.keyword_search(query, user_id, top_k, filters)
+        async with ReadSessionLocal() as session:
+            keyword_service = SearchService(
+                session, self.embedding_service, self.embedding_coalescer
+            )
+            return await keyword_service.keyword_search(query, user_id, top_k, filters)
+    
+    async def _hybrid_search_fused(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        top_k: int = 10,
+        filters: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run both retrieval legs and rank fusion in a single SQL statement.
+        
+        The query vector is bound once, each leg only returns ids and scores,
+        and full rows are fetched for the final top_k only. With
+        QUANTIZED_SEARCH the semantic leg prefilters on embedding_bits and
+        rescores, like the pgvector store.
         """
         try:
-            # Generate query embedding
-            query_embedding = await self.embedding_service.embed_text(query)
+            if query_embedding is None:
+                with stage_timer("embedding"):
+                    query_embedding = await self.embedding_coalescer.embed(query)
             
-            # Build SQL query
-            sql_query = """
-                SELECT 
-                    dc.id,
-                    dc.content,
-                    dc.metadata,
-                    a.title as source,
-                    (1 - (dc.embedding <=> %s::vector)) as similarity_score
-                FROM doc_chunks dc
-                LEFT JOIN artifacts a ON dc.artifact_id = a.id
-                WHERE dc.embedding IS NOT NULL
-            """
+            filter_sql, params = self._build_filters(user_id, filters)
             
-            params = [str(query_embedding)]
+            if settings.HYBRID_FUSION == "rrf":
+                params["rrf_k"] = settings.RRF_K
             
-            # Add user filter if provided
-            if user_id:
-                sql_query += " AND a.user_id = %s"
-                params.append(user_id)
+            candidates = top_k * settings.HYBRID_CANDIDATE_MULTIPLIER
+            params.update({
+                "embedding": str(query_embedding),
+                "query": query,
+                "similarity_threshold": settings.SIMILARITY_THRESHOLD,
+                "semantic_weight": settings.SEMANTIC_SEARCH_WEIGHT,
+                "candidates": candidates,
+                "top_k": top_k,
+            })
             
-            # Add additional filters
-            if filters:
-                for key, value in filters.items():
-                    if key == "artifact_type":
-                        sql_query += " AND a.type = %s"
-                        params.append(value)
+            rescore_column = None
+            if settings.QUANTIZED_SEARCH:
+                rescore_column = settings.QUANTIZED_RESCORE_COLUMN
+                params["quantized_candidates"] = (
+                    candidates * settings.QUANTIZED_CANDIDATE_MULTIPLIER
+                )
             
-            # Add similarity threshold and ordering
-            sql_query += f"""
-                AND (1 - (dc.embedding <=> %s::vector)) > {settings.SIMILARITY_THRESHOLD}
-                ORDER BY dc.embedding <=> %s::vector
-                LIMIT %s
-            """
-            params.extend([str(query_embedding), str(query_embedding), top_k])
-            
-            # Execute query
-            result = await self.db.execute(text(sql_query), params)
+            with stage_timer("fused_sql"):
+                result = await self.db.execute(
+                    _fused_statement(
+                        filter_sql,
+                        settings.HYBRID_FUSION,
+                        settings.KEYWORD_ENGINE,
+                        rescore_column,
+                    ),
+                    params,
+                )
             rows = result.fetchall()
             
-            # Format results
             results = []
             for row in rows:
                 results.append({
                     "id": row.id,
                     "content": row.content,
-                    "score": float(row.similarity_score),
+                    "score": float(row.hybrid_score),
+                    "semantic_score": float(row.semantic_score),
+                    "keyword_score": float(row.keyword_score),
+                    "similarity": float(row.similarity) if row.similarity is not None else None,
                     "metadata": row.metadata,
                     "source": row.source,
+                    "search_type": "hybrid"
+                })
+            
+            logger.info(
+                "Fused hybrid search completed",
+                query=query,
+                fusion=settings.HYBRID_FUSION,
+                results_count=len(results)
+            )
+            
+            return results
+            
+        except Exception as e:
+            logger.error("Fused hybrid search failed", error=str(e), query=query)
+            raise
+    
+    async def hybrid_search_batch(
+        self,
+        queries: List[Dict[str, Any]],
+        concurrency: int = settings.SEARCH_BATCH_CONCURRENCY,
+    ) -> List[Tuple[List[Dict[str, Any]], float]]:
+        """
+        Run hybrid search for many queries, returning (results, elapsed_ms) in order.
+        
+        Each query is a dict with query, user_id, top_k, filters and
+        recall_tier. All queries are embedded in one embed_texts call; the
+        queries then run on their own read sessions, at most concurrency at
+        a time, since a session cannot run statements concurrently. On the
+        two-leg path each query holds a second session for its keyword leg.
+        """
+        with stage_timer("embedding"):
+            embeddings = await self.embedding_service.embed_texts(
+                [query["query"] for query in queries]
+            )
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run(query: Dict[str, Any], query_embedding: List[float]):
+            async with semaphore:
+                started = time.perf_counter()
+                async with ReadSessionLocal() as session:
+                    search_service = SearchService(
+                        session, self.embedding_service, self.embedding_coalescer
+                    )
+                    await search_service.set_recall_tier(
+                        query.get("recall_tier"),
+                        search_service.semantic_ann_limit(
+                            query["top_k"] * settings.HYBRID_CANDIDATE_MULTIPLIER
+                        ),
+                    )
+                    results = await search_service.hybrid_search(
+                        query=query["query"],
+                        user_id=query.get("user_id"),
+                        top_k=query["top_k"],
+                        filters=query.get("filters"),
+                        query_embedding=query_embedding,
+                    )
+                return results, round((time.perf_counter() - started) * 1000, 3)
+        
+        with stage_timer("search_batch_sql"):
+            outcomes = await asyncio.gather(*[
+                run(query, query_embedding)
+                for query, query_embedding in zip(queries, embeddings)
+            ])
+        
+        logger.info("Batch hybrid search completed", queries=len(queries))
+        return list(outcomes)
+    
+    async def set_recall_tier(self, tier: Optional[str] = None, limit: int = 10):
+        """
+        Tune ANN index search parameters for this session's transaction.
+        """
+        await ann_index_manager.apply_search_tier(self.db, tier, limit)
+    
+    def serves_locally(self, user_id: Optional[str] = None) -> bool:
+        """
+        Whether semantic search for user_id runs on the in-process vector store.
+        """
+        return select_vector_store(self.db, user_id) is local_vector_store
+    
+    def semantic_ann_limit(self, top_k: int) -> int:
+        """
+        Rows the semantic ANN scan must return for top_k results.
+        
+        The quantized path reads a larger candidate pool from the bit index,
+        so ef_search has to cover it rather than top_k.
+        """
+        if settings.QUANTIZED_SEARCH:
+            return top_k * settings.QUANTIZED_CANDIDATE_MULTIPLIER
+        return top_k
+    
+    def _build_filters(
+        self,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the user and artifact filters as SQL with named parameters.
+        """
+        return build_filters(user_id, filters)
+    
+    async def semantic_search(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        top_k: int = 10,
+        filters: Optional[Dict] = None,
+        query_embedding: Optional[List[float]] = None,
+        similarity_threshold: Optional[float] = None,
+        quantized: Optional[bool] = None,
+        candidate_multiplier: Optional[int] = None,
+        backend: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform semantic search using vector similarity.
+        
+        The search runs on the in-process vector store when it holds the
+        user's chunks, otherwise in pgvector; backend ("local" or "pgvector")
+        forces one. A precomputed query_embedding skips the embedding call,
+        and similarity_threshold overrides SIMILARITY_THRESHOLD (recall
+        evaluation). With quantized (default QUANTIZED_SEARCH), pgvector
+        prefilters by Hamming distance over embedding_bits and rescores.
+        """
+        try:
+            # Generate query embedding
+            if query_embedding is None:
+                with stage_timer("embedding"):
+                    query_embedding = await self.embedding_coalescer.embed(query)
+            
+            store = select_vector_store(self.db, user_id, backend)
+            rows = await store.search(
+                query_embedding,
+                top_k,
+                user_id=user_id,
+                filters=filters,
+                similarity_threshold=(
+                    settings.SIMILARITY_THRESHOLD
+                    if similarity_threshold is None
+                    else similarity_threshold
+                ),
+                quantized=quantized,
+                candidate_multiplier=candidate_multiplier,
+            )
+            
+            # Format results
+            results = []
+            for row in rows:
+                results.append({
+                    "id": row["id"],
+                    "content": row["content"],
+                    "score": row["similarity_score"],
+                    "metadata": row["metadata"],
+                    "source": row["source"],
                     "search_type": "semantic"
                 })
             
             logger.info(
                 "Semantic search completed",
                 query=query,
+                backend=store.name,
                 results_count=len(results)
             )
             
@@ -138,49 +559,35 @@ class SearchService:
         user_id: Optional[str] = None,
         top_k: int = 10,
         filters: Optional[Dict] = None,
+        engine: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         Perform keyword search using PostgreSQL full-text search.
+        
+        engine overrides KEYWORD_ENGINE: "trigram", "fulltext", "fuzzy"
+        (trigram word similarity) or "bm25". A fulltext query that matches
+        nothing, typically because of typos, is retried as fuzzy when
+        KEYWORD_FUZZY_FALLBACK is on.
         """
+        engine = engine or settings.KEYWORD_ENGINE
+        if self._uses_bm25(engine):
+            return await self._keyword_search_bm25(query, user_id, top_k, filters)
+        
         try:
-            # Build SQL query with trigram similarity
-            sql_query = """
-                SELECT 
-                    dc.id,
-                    dc.content,
-                    dc.metadata,
-                    a.title as source,
-                    SIMILARITY(dc.content, %s) as bm25_score
-                FROM doc_chunks dc
-                LEFT JOIN artifacts a ON dc.artifact_id = a.id
-                WHERE SIMILARITY(dc.content, %s) > 0.1
-            """
-            
-            params = [query, query]
-            
-            # Add user filter if provided
-            if user_id:
-                sql_query += " AND a.user_id = %s"
-                params.append(user_id)
-            
-            # Add additional filters
-            if filters:
-                for key, value in filters.items():
-                    if key == "artifact_type":
-                        sql_query += " AND a.type = %s"
-                        params.append(value)
-            
-            # Order by similarity and limit
-            sql_query += """
-                ORDER BY SIMILARITY(dc.content, %s) DESC
-                LIMIT %s
-            """
-            params.extend([query, top_k])
+            filter_sql, params = self._build_filters(user_id, filters)
+            params.update({"query": query, "top_k": top_k})
             
             # Execute query
-            result = await self.db.execute(text(sql_query), params)
+            with stage_timer("keyword_sql"):
+                result = await self.db.execute(_keyword_statement(filter_sql, engine), params)
             rows = result.fetchall()
             
+            if not rows and engine == "fulltext" and settings.KEYWORD_FUZZY_FALLBACK:
+                engine = "fuzzy"
+                with stage_timer("keyword_fuzzy_sql"):
+                    result = await self.db.execute(_keyword_statement(filter_sql, engine), params)
+                rows = result.fetchall()
+            
             # Format results
             results = []
             for row in rows:
@@ -196,6 +603,7 @@ class SearchService:
             logger.info(
                 "Keyword search completed",
                 query=query,
+                engine=engine,
                 results_count=len(results)
             )
             
@@ -205,6 +613,68 @@ class SearchService:
             logger.error("Keyword search failed", error=str(e), query=query)
             raise
     
+    def _uses_bm25(self, engine: Optional[str] = None) -> bool:
+        return (engine or settings.KEYWORD_ENGINE) == "bm25" and bm25_index.loaded
+    
+    async def _keyword_search_bm25(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        top_k: int = 10,
+        filters: Optional[Dict] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank with the in-process BM25 index and fetch only the top_k rows.
+        
+        Scores are divided by the best score so they combine with semantic
+        similarities on the same 0-1 scale; the raw score is kept as bm25_score.
+        """
+        try:
+            with stage_timer("bm25"):
+                hits = bm25_index.search(
+                    query,
+                    top_k,
+                    user_id=user_id,
+                    artifact_type=(filters or {}).get("artifact_type"),
+                )
+            if not hits:
+                return []
+            
+            with stage_timer("keyword_sql"):
+                result = await self.db.execute(
+                    HYDRATE_SQL, {"ids": [chunk_id for chunk_id, _ in hits]}
+                )
+            rows = {row.id: row for row in result.fetchall()}
+            
+            best = hits[0][1]
+            results = []
+            for chunk_id, score in hits:
+                row = rows.get(chunk_id)
+                if row is None:
+                    # Deleted since the index was last refreshed
+                    continue
+                results.append({
+                    "id": row.id,
+                    "content": row.content,
+                    "score": score / best,
+                    "bm25_score": score,
+                    "metadata": row.metadata,
+                    "source": row.source,
+                    "search_type": "keyword"
+                })
+            
+            logger.info(
+                "BM25 keyword search completed",
+                query=query,
+                results_count=len(results)
+            )
+            
+            return results
+            
+        except Exception as e:
+            logger.error("BM25 keyword search failed", error=str(e), query=query)
+            raise
+    
     def _combine_search_results(
         self,
         semantic_results: List[Dict],
@@ -0,0 +1,172 @@
+# @author: fatima bashir
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import hashlib
+import time
+import unicodedata
+
+import numpy as np
+import structlog
+
+from app.core.metrics import CACHE_EVENTS
+
+logger = structlog.get_logger()
+
+EmbedFunction = Callable[[str], Awaitable[List[float]]]
+
+
+class SemanticCache:
+    """
+    In-process semantic cache of chat answers.
+
+    Messages are embedded and matched by cosine similarity against earlier
+    messages with the same context hash (e.g. the same resume). Entries live
+    in a fixed-capacity matrix with TTL expiry and least-recently-used eviction.
+    """
+
+    def __init__(
+        self,
+        embed: EmbedFunction,
+        dimension: int,
+        threshold: float = 0.92,
+        max_entries: int = 5000,
+        ttl: float = 24 * 3600,
+        name: str = "semantic_chat",
+    ):
+        self.embed = embed
+        self.dimension = dimension
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+
+        self._vectors = np.zeros((max_entries, dimension), dtype=np.float32)
+        self._contexts = np.zeros(max_entries, dtype=np.int64)
+        self._answers: List[Optional[str]] = [None] * max_entries
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        # Exact (normalized message, context) -> slot, to skip embedding repeats
+        self._exact: Dict[Tuple[str, int], int] = {}
+        self._keys: List[Optional[Tuple[str, int]]] = [None] * max_entries
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "errors": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize a message so casing and spacing variants share an entry.
+        """
+        return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+    @staticmethod
+    def context_hash(context: Optional[str]) -> int:
+        """
+        Hash the conversation context; answers are only shared within one context.
+        """
+        digest = hashlib.sha256((context or "").encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "little", signed=True)
+
+    async def lookup(
+        self, message: str, context: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Return (cached answer or None, message embedding).
+
+        Pass the embedding back to store() on a miss so the message is not
+        embedded twice. The embedding is None for exact hits and errors.
+        """
+        now = time.time()
+        key = (self.normalize(message), self.context_hash(context))
+
+        slot = self._exact.get(key)
+        if slot is not None and self._expires_at[slot] > now:
+            return self._hit(slot, now, "exact_hits"), None
+
+        try:
+            vector = self._unit(await self.embed(key[0]))
+        except Exception as e:
+            self.stats["errors"] += 1
+            CACHE_EVENTS.labels(cache=self.name, outcome="error").inc()
+            logger.warning("Semantic cache embedding failed", error=str(e))
+            return None, None
+
+        live = (self._contexts == key[1]) & (self._expires_at > now)
+        if live.any():
+            scores = self._vectors @ vector
+            scores[~live] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                logger.debug("Semantic cache hit", similarity=round(float(scores[best]), 4))
+                return self._hit(best, now, "semantic_hits"), vector
+
+        self.stats["misses"] += 1
+        CACHE_EVENTS.labels(cache=self.name, outcome="miss").inc()
+        return None, vector
+
+    async def store(
+        self,
+        message: str,
+        answer: str,
+        context: Optional[str] = None,
+        vector: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Cache an answer, evicting the expired or least recently used entry when full.
+        """
+        key = (self.normalize(message), self.context_hash(context))
+        if vector is None:
+            try:
+                vector = self._unit(await self.embed(key[0]))
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning("Semantic cache embedding failed", error=str(e))
+                return
+
+        now = time.time()
+        slot = self._exact.get(key)
+        if slot is None:
+            slot = self._free_slot(now)
+
+        old_key = self._keys[slot]
+        if old_key is not None and old_key != key:
+            self._exact.pop(old_key, None)
+
+        self._vectors[slot] = vector
+        self._contexts[slot] = key[1]
+        self._answers[slot] = answer
+        self._keys[slot] = key
+        self._expires_at[slot] = now + self.ttl
+        self._last_used[slot] = now
+        self._exact[key] = slot
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Return hit/miss counters, hit rate and the number of live entries.
+        """
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": int((self._expires_at > time.time()).sum()),
+            "max_entries": self.max_entries,
+        }
+
+    def _hit(self, slot: int, now: float, counter: str) -> str:
+        self._last_used[slot] = now
+        self.stats[counter] += 1
+        CACHE_EVENTS.labels(cache=self.name, outcome="hit").inc()
+        return self._answers[slot]
+
+    def _free_slot(self, now: float) -> int:
+        """
+        Pick an empty or expired slot, otherwise evict the least recently used.
+        """
+        expired = np.flatnonzero(self._expires_at <= now)
+        if expired.size:
+            return int(expired[0])
+        self.stats["evictions"] += 1
+        return int(np.argmin(self._last_used))
+
+    def _unit(self, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
@@ -0,0 +1,68 @@
+# @author: fatima bashir
+from typing import List, Tuple, Union
+import numpy as np
+
+ArrayLike = Union[np.ndarray, List[List[float]], List[float]]
+
+
+def normalize_rows(vectors: ArrayLike) -> np.ndarray:
+    """Return a float32 copy of vectors scaled to unit L2 norm (zero rows stay zero)."""
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class CandidateMatrix:
+    """Pre-normalized float32 candidate embeddings, reusable across queries."""
+
+    def __init__(self, embeddings: ArrayLike, normalized: bool = False):
+        if len(embeddings) == 0:
+            # np.array([], ndmin=2) would be a single zero-width row
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+        elif normalized:
+            self.matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        else:
+            self.matrix = normalize_rows(embeddings)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+
+def top_k_similar(
+    queries: ArrayLike,
+    candidates: Union[CandidateMatrix, ArrayLike],
+    top_k: int = 5,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the top-k candidates by cosine similarity for one or many queries.
+
+    Scores all queries with a single matrix product and selects the top-k
+    with argpartition, so only k items per query are ever sorted.
+    Returns (indices, scores), each of shape (num_queries, k), best first.
+    """
+    if not isinstance(candidates, CandidateMatrix):
+        candidates = CandidateMatrix(candidates)
+
+    query_matrix = normalize_rows(queries)
+    num_candidates = len(candidates)
+    k = min(top_k, num_candidates)
+    if k <= 0:
+        empty = np.empty((query_matrix.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+
+    scores = query_matrix @ candidates.matrix.T
+
+    if k < num_candidates:
+        partition = np.argpartition(scores, num_candidates - k, axis=1)[:, -k:]
+    else:
+        partition = np.broadcast_to(np.arange(num_candidates), scores.shape)
+    partition_scores = np.take_along_axis(scores, partition, axis=1)
+
+    order = np.argsort(-partition_scores, axis=1, kind="stable")
+    indices = np.take_along_axis(partition, order, axis=1)
+    return indices, np.take_along_axis(partition_scores, order, axis=1)
@@ -0,0 +1,701 @@
+# @author: fatima bashir
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import asyncio
+import os
+import time
+import numpy as np
+import structlog
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bulk_writer import vector_connection
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.core.metrics import LOCAL_VECTOR_ROWS, VECTOR_STORE_QUERIES, stage_timer
+from app.services.chunk_changes import DOCUMENT_CHUNKS_FILTER, deleted_chunk_ids, live_chunk_ids
+from app.services.similarity import normalize_rows
+
+try:
+    import hnswlib
+except ImportError:  # Exact scans only
+    hnswlib = None
+
+logger = structlog.get_logger()
+
+# SQL templates. {filter_sql} comes from build_filters, so each template has
+# only a handful of distinct renderings; building each statement once keeps
+# the SQL text stable and lets asyncpg reuse its prepared statement. The
+# artifacts join stays in every template: with TENANT_FILTER_PUSHDOWN the
+# filters only read doc_chunks columns and Postgres removes the unused join.
+SEMANTIC_SQL = """
+    WITH query_vector AS (
+        SELECT CAST(:embedding AS vector) AS embedding
+    )
+    SELECT
+        dc.id,
+        dc.content,
+        dc.metadata,
+        a.title as source,
+        1 - (dc.embedding <=> (SELECT embedding FROM query_vector)) as similarity_score
+    FROM doc_chunks dc
+    LEFT JOIN artifacts a ON dc.artifact_id = a.id
+    WHERE dc.embedding IS NOT NULL
+        {filter_sql}
+        AND 1 - (dc.embedding <=> (SELECT embedding FROM query_vector))
+            > :similarity_threshold
+    ORDER BY dc.embedding <=> (SELECT embedding FROM query_vector)
+    LIMIT :top_k
+"""
+
+# Two-stage semantic search over the compact columns: nearest candidates by
+# Hamming distance from the bit-vector index, then exact cosine rescoring of
+# those candidates only.
+QUANTIZED_SEMANTIC_SQL = """
+    WITH query_vector AS (
+        SELECT CAST(:embedding AS vector) AS embedding
+    ),
+    candidates AS (
+        SELECT dc.id
+        FROM doc_chunks dc
+        LEFT JOIN artifacts a ON dc.artifact_id = a.id
+        WHERE dc.embedding_bits IS NOT NULL
+            {filter_sql}
+        ORDER BY dc.embedding_bits <~> binary_quantize((SELECT embedding FROM query_vector))
+        LIMIT :candidates
+    ),
+    rescored AS (
+        SELECT dc.id, 1 - ({rescore_sql}) AS similarity_score
+        FROM candidates c
+        JOIN doc_chunks dc ON dc.id = c.id
+    )
+    SELECT
+        dc.id,
+        dc.content,
+        dc.metadata,
+        a.title as source,
+        r.similarity_score
+    FROM rescored r
+    JOIN doc_chunks dc ON dc.id = r.id
+    LEFT JOIN artifacts a ON dc.artifact_id = a.id
+    WHERE r.similarity_score > :similarity_threshold
+    ORDER BY r.similarity_score DESC
+    LIMIT :top_k
+"""
+
+RESCORE_SQL = {
+    "embedding_half": "dc.embedding_half <=> CAST((SELECT embedding FROM query_vector) AS halfvec)",
+    "embedding": "dc.embedding <=> (SELECT embedding FROM query_vector)",
+}
+
+# Rows loaded into the local store, with the owning user and artifact type
+LOCAL_LOAD_SQL = """
+    SELECT dc.id, dc.content, dc.metadata, dc.embedding, dc.artifact_id,
+           a.user_id, a.type AS artifact_type, a.title AS source
+    FROM doc_chunks dc
+    LEFT JOIN artifacts a ON dc.artifact_id = a.id
+    WHERE dc.embedding IS NOT NULL
+"""
+
+
+@lru_cache(maxsize=None)
+def _semantic_statement(filter_sql: str) -> TextClause:
+    """Semantic search statement for a filter combination."""
+    return text(SEMANTIC_SQL.format(filter_sql=filter_sql))
+
+
+@lru_cache(maxsize=None)
+def _quantized_semantic_statement(filter_sql: str, rescore_column: str) -> TextClause:
+    """Quantized two-stage semantic search statement for a filter combination."""
+    rescore_sql = RESCORE_SQL.get(rescore_column, RESCORE_SQL["embedding_half"])
+    return text(QUANTIZED_SEMANTIC_SQL.format(filter_sql=filter_sql, rescore_sql=rescore_sql))
+
+
+def build_filters(
+    user_id: Optional[str] = None,
+    filters: Optional[Dict] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the user and artifact filters as SQL with named parameters."""
+    clauses = []
+    params: Dict[str, Any] = {}
+    # Denormalized doc_chunks columns (tenant-columns.sql) or the artifacts join
+    if settings.TENANT_FILTER_PUSHDOWN:
+        user_column, type_column = "dc.user_id", "dc.artifact_type"
+    else:
+        user_column, type_column = "a.user_id", "a.type"
+
+    if user_id:
+        clauses.append(f"AND {user_column} = :user_id")
+        params["user_id"] = user_id
+
+    if filters and "artifact_type" in filters:
+        clauses.append(f"AND {type_column} = :artifact_type")
+        params["artifact_type"] = filters["artifact_type"]
+
+    return " ".join(clauses), params
+
+
+class VectorStore:
+    """Nearest-neighbour search over doc_chunks embeddings."""
+
+    name = "base"
+
+    def can_serve(self, user_id: Optional[str] = None) -> bool:
+        """
+        Whether this store holds every chunk a search for user_id could return.
+        """
+        raise NotImplementedError
+
+    async def search(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        similarity_threshold: float = settings.SIMILARITY_THRESHOLD,
+        **options: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return up to top_k rows (id, content, metadata, source, similarity_score), best first.
+        """
+        raise NotImplementedError
+
+
+class PgVectorStore(VectorStore):
+    """Semantic search in Postgres with pgvector (full precision or quantized)."""
+
+    name = "pgvector"
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def can_serve(self, user_id: Optional[str] = None) -> bool:
+        return True
+
+    async def search(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        similarity_threshold: float = settings.SIMILARITY_THRESHOLD,
+        quantized: Optional[bool] = None,
+        candidate_multiplier: Optional[int] = None,
+        **options: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the semantic SQL; with quantized (default QUANTIZED_SEARCH) the
+        bit-vector prefilter and rescoring statement is used instead.
+        """
+        filter_sql, params = build_filters(user_id, filters)
+        params.update({
+            "embedding": str(list(query_embedding)),
+            "similarity_threshold": similarity_threshold,
+            "top_k": top_k,
+        })
+
+        if settings.QUANTIZED_SEARCH if quantized is None else quantized:
+            params["candidates"] = top_k * (
+                candidate_multiplier or settings.QUANTIZED_CANDIDATE_MULTIPLIER
+            )
+            statement = _quantized_semantic_statement(
+                filter_sql, settings.QUANTIZED_RESCORE_COLUMN
+            )
+        else:
+            statement = _semantic_statement(filter_sql)
+
+        with stage_timer("semantic_sql"):
+            result = await self.db.execute(statement, params)
+        VECTOR_STORE_QUERIES.labels(backend=self.name).inc()
+
+        results = [
+            {
+                "id": row.id,
+                "content": row.content,
+                "metadata": row.metadata,
+                "source": row.source,
+                "similarity_score": float(row.similarity_score),
+            }
+            for row in result.fetchall()
+        ]
+        # Iterative index scans with relaxed ordering can return rows slightly out of order
+        results.sort(key=lambda result: result["similarity_score"], reverse=True)
+        return results
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index for small and medium tenants.
+
+    Embeddings live in a memory-mapped float32 matrix (so cold rows can be
+    paged out by the OS) with an hnswlib HNSW graph over it. Tenants up to
+    LOCAL_VECTOR_MAX_TENANT_ROWS chunks are loaded at startup and kept up to
+    date by ingestion and deletes in this process; refresh() picks up writes
+    made by other processes. Filtered searches over small subsets are exact
+    scans of those rows; larger ones use the graph with a filter.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        path: str = settings.LOCAL_VECTOR_PATH,
+        dimension: int = settings.EMBEDDING_DIMENSION,
+    ):
+        self.path = path
+        self.dimension = dimension
+        self.loaded = False
+        # Every chunk in the database is loaded; unscoped searches can run here
+        self.complete = False
+
+        self._size = 0
+        self._capacity = 0
+        self._matrix: Optional[np.memmap] = None
+        self._graph = None
+        self._live = 0
+        self._ids: List[Optional[str]] = []
+        self._owners: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._payloads: List[Optional[Tuple[str, Any, Optional[str]]]] = []
+        self._user_codes = np.zeros(0, dtype=np.int32)
+        self._type_codes = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._slots: Dict[str, int] = {}
+        self._user_codes_by_id: Dict[Optional[str], int] = {}
+        self._type_codes_by_name: Dict[Optional[str], int] = {}
+        self._tenant_rows: Dict[Optional[str], int] = {}
+        self._excluded: Set[Optional[str]] = set()
+        self._watermark = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def rows(self) -> int:
+        return self._live
+
+    def can_serve(self, user_id: Optional[str] = None) -> bool:
+        if not self.loaded:
+            return False
+        if user_id is None:
+            return self.complete
+        return user_id not in self._excluded
+
+    async def load(self) -> Dict[str, Any]:
+        """
+        Load every tenant small enough to serve locally from the database.
+        """
+        started = time.perf_counter()
+        async with ReadSessionLocal() as session:
+            result = await session.execute(text("""
+                SELECT a.user_id, count(*) AS rows
+                FROM doc_chunks dc
+                LEFT JOIN artifacts a ON dc.artifact_id = a.id
+                WHERE dc.embedding IS NOT NULL
+                GROUP BY a.user_id
+                ORDER BY count(*)
+            """))
+            tenants = result.fetchall()
+
+            # Smallest tenants first, until the row budget runs out
+            budget = settings.LOCAL_VECTOR_MAX_ROWS
+            included: Set[Optional[str]] = set()
+            excluded: Set[Optional[str]] = set()
+            for tenant in tenants:
+                if tenant.rows <= min(settings.LOCAL_VECTOR_MAX_TENANT_ROWS, budget):
+                    included.add(tenant.user_id)
+                    budget -= tenant.rows
+                else:
+                    excluded.add(tenant.user_id)
+
+            self._reset(sum(t.rows for t in tenants if t.user_id in included))
+            self._excluded = excluded
+            self._watermark = (await session.execute(text("SELECT now()"))).scalar()
+
+            async with vector_connection(session) as connection:
+                async with connection.transaction():
+                    cursor = await connection.cursor(LOCAL_LOAD_SQL)
+                    while True:
+                        records = await cursor.fetch(settings.BULK_WRITE_BATCH_SIZE * 10)
+                        if not records:
+                            break
+                        records = [r for r in records if r["user_id"] in included]
+                        if records:
+                            await self._add_records(records)
+
+        self.complete = not excluded
+        self.loaded = True
+        LOCAL_VECTOR_ROWS.set(self.rows)
+        status = {
+            "rows": self.rows,
+            "tenants": len(included),
+            "excluded_tenants": len(excluded),
+            "complete": self.complete,
+            "graph": self._graph is not None,
+            "load_time_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        logger.info("Local vector store loaded", **status)
+        return status
+
+    async def refresh(self) -> None:
+        """
+        Apply chunks written or deleted by other processes since the last load or refresh.
+        """
+        async with ReadSessionLocal() as session:
+            now = (await session.execute(text("SELECT now()"))).scalar()
+            async with vector_connection(session) as connection:
+                async with connection.transaction():
+                    deleted = await deleted_chunk_ids(connection, self._watermark)
+                    live = None if deleted is not None else await live_chunk_ids(connection)
+                    changed = await connection.fetch(
+                        LOCAL_LOAD_SQL + " AND dc.updated_at > $1", self._watermark
+                    )
+
+        async with self._write_lock:
+            if live is not None:
+                stale = [chunk_id for chunk_id in self._slots if chunk_id not in live]
+            else:
+                stale = [chunk_id for chunk_id in deleted if chunk_id in self._slots]
+            self._remove_slots([self._slots[chunk_id] for chunk_id in stale])
+        records = [r for r in changed if self.can_serve(r["user_id"])]
+        if records:
+            await self._add_records(records)
+        self._watermark = now
+        LOCAL_VECTOR_ROWS.set(self.rows)
+
+        if stale or records:
+            logger.debug("Local vector store refreshed", removed=len(stale), upserted=len(records))
+
+    async def run_refresh_loop(self):
+        """
+        Periodically run refresh() until cancelled.
+        """
+        while True:
+            await asyncio.sleep(settings.LOCAL_VECTOR_REFRESH_INTERVAL)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Local vector store refresh failed", error=str(e))
+
+    async def add(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        user_id: Optional[str] = None,
+        artifact_type: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> None:
+        """
+        Add or replace committed doc_chunks rows (dicts as given to DocChunkWriter).
+        """
+        if not self.loaded or user_id in self._excluded:
+            return
+        records = [
+            {
+                "id": row["id"],
+                "content": row["content"],
+                "metadata": row.get("metadata"),
+                "embedding": row["embedding"],
+                "artifact_id": row.get("artifact_id"),
+                "user_id": user_id,
+                "artifact_type": artifact_type,
+                "source": source,
+            }
+            for row in rows
+            if row.get("embedding") is not None
+        ]
+        if records:
+            await self._add_records(records)
+            LOCAL_VECTOR_ROWS.set(self.rows)
+
+    async def add_document(self, db: AsyncSession, document_id: str) -> int:
+        """
+        Load a newly committed document's chunks, returning how many were added.
+
+        Rows are streamed in batches through the writer's session; the read
+        replica may not have them yet.
+        """
+        if not self.loaded:
+            return 0
+        added = 0
+        async with vector_connection(db) as connection:
+            async with connection.transaction():
+                cursor = await connection.cursor(
+                    LOCAL_LOAD_SQL + f" AND {DOCUMENT_CHUNKS_FILTER}", document_id
+                )
+                while True:
+                    records = await cursor.fetch(settings.BULK_WRITE_BATCH_SIZE)
+                    if not records:
+                        break
+                    records = [r for r in records if r["user_id"] not in self._excluded]
+                    if records:
+                        await self._add_records(records)
+                        added += len(records)
+        LOCAL_VECTOR_ROWS.set(self.rows)
+        return added
+
+    async def remove_document(self, document_id: str) -> int:
+        """
+        Drop a document's chunks, returning how many were removed.
+        """
+        if not self.loaded:
+            return 0
+        async with self._write_lock:
+            slots = [
+                slot
+                for slot in np.flatnonzero(self._alive[: self._size])
+                if self._documents[slot] == document_id
+            ]
+            self._remove_slots(slots)
+        LOCAL_VECTOR_ROWS.set(self.rows)
+        return len(slots)
+
+    async def search(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        user_id: Optional[str] = None,
+        filters: Optional[Dict] = None,
+        similarity_threshold: float = settings.SIMILARITY_THRESHOLD,
+        **options: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the in-process index; same results contract as PgVectorStore.
+        """
+        with stage_timer("local_vector_search"):
+            query = normalize_rows(query_embedding)[0]
+            mask = self._filter_mask(user_id, filters)
+            candidates = int(mask.sum()) if mask is not None else self.rows
+
+            if candidates == 0:
+                slots, scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            elif self._graph is None or candidates <= settings.LOCAL_VECTOR_EXACT_MAX_ROWS:
+                slots, scores = self._exact_search(query, top_k, mask)
+            else:
+                slots, scores = self._graph_search(query, min(top_k, candidates), mask)
+
+        VECTOR_STORE_QUERIES.labels(backend=self.name).inc()
+
+        results = []
+        for slot, score in zip(slots, scores):
+            if score <= similarity_threshold:
+                break
+            content, metadata, source = self._payloads[slot]
+            results.append({
+                "id": self._ids[slot],
+                "content": content,
+                "metadata": metadata,
+                "source": source,
+                "similarity_score": float(score),
+            })
+        return results
+
+    async def close(self) -> None:
+        """
+        Drop the index and remove the memory-mapped matrix file.
+        """
+        self.loaded = False
+        self._graph = None
+        if self._matrix is not None:
+            del self._matrix
+            self._matrix = None
+            os.unlink(self._matrix_path)
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.path, f"vectors-{os.getpid()}.f32")
+
+    def _reset(self, expected_rows: int) -> None:
+        """
+        Start an empty store with room for expected_rows.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self._size = 0
+        self._capacity = 0
+        self._matrix = None
+        self._graph = None
+        self._live = 0
+        self._ids, self._owners, self._documents, self._payloads = [], [], [], []
+        self._user_codes = np.zeros(0, dtype=np.int32)
+        self._type_codes = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._slots = {}
+        self._user_codes_by_id = {}
+        self._type_codes_by_name = {}
+        self._tenant_rows = {}
+
+        if os.path.exists(self._matrix_path):
+            os.unlink(self._matrix_path)
+        if hnswlib is not None:
+            self._graph = hnswlib.Index(space="ip", dim=self.dimension)
+            self._graph.init_index(
+                max_elements=max(expected_rows, 1024),
+                M=settings.LOCAL_VECTOR_HNSW_M,
+                ef_construction=settings.LOCAL_VECTOR_HNSW_EF_CONSTRUCTION,
+            )
+            self._graph.set_ef(settings.LOCAL_VECTOR_HNSW_EF_SEARCH)
+        self._grow(max(expected_rows, 1024))
+
+    def _grow(self, needed: int) -> None:
+        """
+        Resize the matrix file, the graph and the per-row arrays to fit needed rows.
+        """
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2)
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(capacity * self.dimension * 4)
+        self._matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+        )
+        if self._graph is not None and capacity > self._graph.get_max_elements():
+            self._graph.resize_index(capacity)
+
+        extra = capacity - self._capacity
+        self._ids.extend([None] * extra)
+        self._owners.extend([None] * extra)
+        self._documents.extend([None] * extra)
+        self._payloads.extend([None] * extra)
+        self._user_codes = np.concatenate([self._user_codes, np.full(extra, -1, dtype=np.int32)])
+        self._type_codes = np.concatenate([self._type_codes, np.full(extra, -1, dtype=np.int32)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        self._capacity = capacity
+
+    @staticmethod
+    def _code(codes: Dict[Optional[str], int], value: Optional[str]) -> int:
+        """
+        Small integer code for a user id or artifact type, for vectorized filtering.
+        """
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    async def _add_records(self, records: List[Any]) -> None:
+        """
+        Append rows to the matrix and insert them into the graph off the event loop.
+        """
+        vectors = normalize_rows([record["embedding"] for record in records])
+
+        async with self._write_lock:
+            replaced = [self._slots[r["id"]] for r in records if r["id"] in self._slots]
+            self._remove_slots(replaced)
+
+            start = self._size
+            self._grow(start + len(records))
+            slots = np.arange(start, start + len(records))
+            self._matrix[start : start + len(records)] = vectors
+
+            for slot, record in zip(slots, records):
+                metadata = record["metadata"]
+                self._ids[slot] = record["id"]
+                self._owners[slot] = record["user_id"]
+                self._documents[slot] = record["artifact_id"] or (
+                    metadata.get("document_id") if isinstance(metadata, dict) else None
+                )
+                self._payloads[slot] = (record["content"], metadata, record["source"])
+                self._user_codes[slot] = self._code(self._user_codes_by_id, record["user_id"])
+                self._type_codes[slot] = self._code(
+                    self._type_codes_by_name, record["artifact_type"]
+                )
+                self._slots[record["id"]] = int(slot)
+                self._tenant_rows[record["user_id"]] = self._tenant_rows.get(record["user_id"], 0) + 1
+
+            if self._graph is not None:
+                # hnswlib releases the GIL while inserting
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._graph.add_items, vectors, slots
+                )
+            self._alive[slots] = True
+            self._size = start + len(records)
+            self._live += len(records)
+
+            # Tenants that outgrow the local budget move to pgvector
+            for user_id in {record["user_id"] for record in records}:
+                if self._tenant_rows.get(user_id, 0) > settings.LOCAL_VECTOR_MAX_TENANT_ROWS:
+                    self._drop_tenant(user_id)
+
+    def _remove_slots(self, slots: Sequence[int]) -> None:
+        """
+        Mark slots deleted in the arrays and the graph; space is reclaimed on the next load.
+        """
+        for slot in slots:
+            if not self._alive[slot]:
+                continue
+            self._alive[slot] = False
+            self._live -= 1
+            self._slots.pop(self._ids[slot], None)
+            self._payloads[slot] = None
+            owner = self._owners[slot]
+            self._tenant_rows[owner] = self._tenant_rows.get(owner, 1) - 1
+            if self._graph is not None:
+                self._graph.mark_deleted(int(slot))
+
+    def _drop_tenant(self, user_id: Optional[str]) -> None:
+        """
+        Stop serving a tenant locally and free its rows.
+        """
+        code = self._user_codes_by_id.get(user_id, -2)
+        self._remove_slots(np.flatnonzero(self._alive & (self._user_codes == code)))
+        self._excluded.add(user_id)
+        self.complete = False
+        logger.info("Tenant moved to pgvector", user_id=user_id)
+
+    def _filter_mask(self, user_id: Optional[str], filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """
+        Boolean mask of live rows matching the filters, or None when unfiltered.
+        """
+        artifact_type = (filters or {}).get("artifact_type")
+        if user_id is None and artifact_type is None:
+            return None
+
+        mask = self._alive[: self._size].copy()
+        if user_id is not None:
+            mask &= self._user_codes[: self._size] == self._user_codes_by_id.get(user_id, -2)
+        if artifact_type is not None:
+            mask &= self._type_codes[: self._size] == self._type_codes_by_name.get(
+                artifact_type, -2
+            )
+        return mask
+
+    def _exact_search(
+        self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every matching row and return the top_k slots and similarities.
+        """
+        slots = np.flatnonzero(mask if mask is not None else self._alive[: self._size])
+        scores = self._matrix[slots] @ query
+        k = min(top_k, len(slots))
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(slots) else np.arange(len(slots))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return slots[best], scores[best]
+
+    def _graph_search(
+        self, query: np.ndarray, top_k: int, mask: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Query the HNSW graph, restricted to the mask's rows when filtered.
+        """
+        allowed = (lambda slot: bool(mask[slot])) if mask is not None else None
+        labels, distances = self._graph.knn_query(query, k=top_k, filter=allowed)
+        # Inner-product space returns 1 - dot product of the unit vectors
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+
+local_vector_store = LocalVectorStore()
+
+
+def select_vector_store(
+    db: AsyncSession,
+    user_id: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> VectorStore:
+    """Route a search to the local store when it holds the tenant, else to pgvector."""
+    if backend == "local" or (
+        backend is None and settings.LOCAL_VECTOR_STORE and local_vector_store.can_serve(user_id)
+    ):
+        return local_vector_store
+    return PgVectorStore(db)
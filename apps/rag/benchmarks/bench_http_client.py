@@ -0,0 +1,144 @@
+# @author: fatima bashir
+"""
+Micro-benchmark: a new httpx.AsyncClient per request vs. one shared pooled client.
+
+Starts a local mock of the OpenAI chat endpoint and measures per-request
+latency both ways. --connect-delay-ms adds a delay to every new connection
+to model the TCP + TLS handshake round trips to a remote API; with 0 the
+difference is client construction (SSL context) plus the local connect.
+
+Run from apps/rag:
+    python -m benchmarks.bench_http_client --requests 500 --connect-delay-ms 60
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+
+from app.core.http import create_http_client
+
+MOCK_COMPLETION = json.dumps({
+    "choices": [{"message": {"role": "assistant", "content": "Mock career advice."}}]
+}).encode()
+
+
+async def handle_connection(reader, writer, connect_delay: float, stats: dict):
+    """Serve keep-alive HTTP/1.1 requests with a canned chat completion."""
+    stats["connections"] += 1
+    # Stand-in for handshake round trips on a fresh connection
+    await asyncio.sleep(connect_delay)
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value.strip())
+            if length:
+                await reader.readexactly(length)
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                + f"Content-Length: {len(MOCK_COMPLETION)}\r\n\r\n".encode()
+                + MOCK_COMPLETION
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def per_request_clients(url: str, payload: dict, requests: int, concurrency: int):
+    """The old simple_server behaviour: a fresh client for every call."""
+    async def call():
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+
+    return await run_load(call, requests, concurrency)
+
+
+async def shared_client(url: str, payload: dict, requests: int, concurrency: int, http2: bool):
+    """One app-scoped pooled client reused by every call."""
+    client = create_http_client("bench", http2=http2)
+    try:
+        async def call():
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+
+        return await run_load(call, requests, concurrency)
+    finally:
+        await client.aclose()
+
+
+async def run_load(call, requests: int, concurrency: int) -> np.ndarray:
+    """Run `requests` calls from `concurrency` workers; return latencies in ms."""
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return np.array(latencies)
+
+
+def describe(name: str, latencies: np.ndarray, connections: int) -> str:
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return (
+        f"{name:<22} {latencies.mean():>8.2f} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}"
+        f" {connections:>12}"
+    )
+
+
+async def main_async(args):
+    stats = {"connections": 0}
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(r, w, args.connect_delay_ms / 1000, stats),
+        "127.0.0.1",
+        0,
+    )
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/v1/chat/completions"
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "resume tips"}]}
+
+    print(f"{'mode':<22} {'mean ms':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'connections':>12}")
+    async with server:
+        stats["connections"] = 0
+        fresh = await per_request_clients(url, payload, args.requests, args.concurrency)
+        print(describe("client per request", fresh, stats["connections"]))
+
+        stats["connections"] = 0
+        # Cleartext mock, so HTTP/2 would need prior knowledge; measure pooling on HTTP/1.1
+        pooled = await shared_client(url, payload, args.requests, args.concurrency, http2=False)
+        print(describe("shared pooled client", pooled, stats["connections"]))
+
+    print(f"\nOverhead removed per request: {fresh.mean() - pooled.mean():.2f} ms mean,"
+          f" {np.percentile(fresh, 95) - np.percentile(pooled, 95):.2f} ms p95")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--connect-delay-ms",
+        type=float,
+        default=0.0,
+        help="Simulated handshake cost per new connection (e.g. 60 for TLS to a remote API)",
+    )
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# @author: fatima bashir
+"""
+Micro-benchmark: vectorized top-k similarity vs. the per-candidate Python loop.
+
+Run from apps/rag:
+    python -m benchmarks.bench_similarity --sizes 1000 100000 1000000 --dim 384
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.similarity import CandidateMatrix, top_k_similar
+
+
+def loop_top_k(query, candidates, top_k):
+    """The original EmbeddingService.find_most_similar implementation."""
+    similarities = []
+    for i, candidate in enumerate(candidates):
+        a_np = np.array(query)
+        b_np = np.array(candidate)
+        norm_a = np.linalg.norm(a_np)
+        norm_b = np.linalg.norm(b_np)
+        similarity = 0.0 if norm_a == 0 or norm_b == 0 else np.dot(a_np, b_np) / (norm_a * norm_b)
+        similarities.append((i, similarity))
+    similarities.sort(key=lambda x: x[1], reverse=True)
+    return [idx for idx, _ in similarities[:top_k]]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=32, help="Batch size for the batched run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--baseline-max",
+        type=int,
+        default=100_000,
+        help="Skip the Python loop above this many candidates",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'candidates':>11} {'loop ms':>10} {'matrix ms':>10} {'speedup':>8} {'batch ms/q':>11}")
+
+    for size in args.sizes:
+        candidates = rng.standard_normal((size, args.dim), dtype=np.float32)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+        # Normalize in place so large runs only hold one copy of the matrix
+        candidates /= np.linalg.norm(candidates, axis=1, keepdims=True)
+        matrix = CandidateMatrix(candidates, normalized=True)
+
+        vector_ms, (indices, _) = timed(
+            lambda: top_k_similar(queries[0], matrix, args.top_k), args.repeat
+        )
+        batch_ms, _ = timed(lambda: top_k_similar(queries, matrix, args.top_k), args.repeat)
+
+        if size <= args.baseline_max:
+            candidate_list = candidates.tolist()
+            query_list = queries[0].tolist()
+            loop_ms, expected = timed(
+                lambda: loop_top_k(query_list, candidate_list, args.top_k), 1
+            )
+            assert set(expected) == set(indices[0].tolist()), "top-k mismatch"
+            loop_col = f"{loop_ms:10.2f}"
+            speedup_col = f"{loop_ms / vector_ms:7.0f}x"
+        else:
+            loop_col = f"{'skipped':>10}"
+            speedup_col = f"{'-':>8}"
+
+        print(
+            f"{size:>11} {loop_col} {vector_ms:10.2f} {speedup_col} "
+            f"{batch_ms / args.queries:11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# @author: fatima bashir
+"""
+Generate a synthetic artifacts/doc_chunks corpus for the search benchmarks.
+
+Rows are written through the service's binary COPY writer, with hash
+embeddings matching EMBEDDING_PROVIDER="hash". The same --seed always
+produces the same corpus. Existing benchmark rows (ids starting "bench-")
+are replaced.
+
+Run from apps/rag with the service's environment (DATABASE_URL, ...):
+    python -m benchmarks.corpus --chunks 100000 --create-schema --build-index
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.bulk_writer import DocChunkWriter, get_asyncpg_connection
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, close_db
+from app.services.ann_index import ann_index_manager
+from benchmarks.synthetic import ARTIFACT_TYPES, SyntheticCorpus
+
+SCHEMA_PATH = Path(__file__).with_name("schema.sql")
+ID_PREFIX = "bench-"
+
+
+async def create_schema(dimension: int) -> None:
+    """Create the tables and helpers the search queries need."""
+    script = SCHEMA_PATH.read_text().replace("{dimension}", str(dimension))
+    async with AsyncSessionLocal() as session:
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.execute(script)
+        await session.commit()
+
+
+async def clear_corpus() -> None:
+    """Delete previously generated benchmark rows."""
+    async with AsyncSessionLocal() as session:
+        for table in ("doc_chunks", "artifacts", "users"):
+            await session.execute(
+                text(f"DELETE FROM {table} WHERE id LIKE :prefix"),
+                {"prefix": f"{ID_PREFIX}%"},
+            )
+        await session.commit()
+
+
+async def generate(args) -> dict:
+    """Write users, artifacts and chunks in batches, committing each batch."""
+    corpus = SyntheticCorpus(
+        dimension=settings.EMBEDDING_DIMENSION,
+        vocab_size=args.vocab_size,
+        words_per_chunk=args.words_per_chunk,
+        seed=args.seed,
+    )
+    rng = np.random.default_rng(args.seed)
+    users = [(f"{ID_PREFIX}u-{i}", f"{ID_PREFIX}u-{i}@example.com") for i in range(args.users)]
+
+    started = time.perf_counter()
+    chunk_seconds = 0.0
+
+    async with AsyncSessionLocal() as session:
+        connection = await get_asyncpg_connection(session)
+        await connection.copy_records_to_table(
+            "users", records=users, columns=("id", "email")
+        )
+        await session.commit()
+
+        written = 0
+        while written < args.chunks:
+            count = min(args.batch_size, args.chunks - written)
+            texts, embeddings = corpus.chunk_batch(rng, count)
+
+            positions = np.arange(written, written + count)
+            artifact_ids = positions // args.chunks_per_artifact
+            # Artifacts whose first chunk falls in this batch
+            new_artifacts = range(
+                -(-written // args.chunks_per_artifact),
+                -(-(written + count) // args.chunks_per_artifact),
+            )
+
+            connection = await get_asyncpg_connection(session)
+            await connection.copy_records_to_table(
+                "artifacts",
+                records=[
+                    (
+                        f"{ID_PREFIX}a-{a}",
+                        users[a % len(users)][0],
+                        f"Benchmark document {a}",
+                        ARTIFACT_TYPES[a % len(ARTIFACT_TYPES)],
+                    )
+                    for a in new_artifacts
+                ],
+                columns=("id", "user_id", "title", "type"),
+            )
+
+            rows = (
+                {
+                    "id": f"{ID_PREFIX}c-{position}",
+                    "artifact_id": f"{ID_PREFIX}a-{artifact}",
+                    "content": content,
+                    "embedding": embedding,
+                    "metadata": {
+                        "document_id": f"{ID_PREFIX}a-{artifact}",
+                        "title": f"Benchmark document {artifact}",
+                        "chunk_index": int(position % args.chunks_per_artifact),
+                        "source": "benchmark",
+                    },
+                    "chunk_index": int(position % args.chunks_per_artifact),
+                }
+                for position, artifact, content, embedding in zip(
+                    positions, artifact_ids, texts, embeddings
+                )
+            )
+            writer = DocChunkWriter(session, batch_size=args.batch_size)
+            stats = await writer.write(rows)
+            await session.commit()
+
+            chunk_seconds += stats.seconds
+            written += count
+            print(
+                f"{written:>10,} / {args.chunks:,} chunks"
+                f"  {written / (time.perf_counter() - started):,.0f} rows/s",
+                flush=True,
+            )
+
+        await session.execute(text("ANALYZE users, artifacts, doc_chunks"))
+        await session.commit()
+
+    return {
+        "chunks": args.chunks,
+        "artifacts": (args.chunks + args.chunks_per_artifact - 1) // args.chunks_per_artifact,
+        "users": args.users,
+        "seconds": round(time.perf_counter() - started, 2),
+        "copy_seconds": round(chunk_seconds, 2),
+    }
+
+
+async def main_async(args) -> None:
+    try:
+        if args.create_schema:
+            await create_schema(settings.EMBEDDING_DIMENSION)
+        await clear_corpus()
+        summary = await generate(args)
+
+        if args.build_index:
+            summary["index"] = await ann_index_manager.build_index("doc_chunks", args.index_method)
+
+        summary.update(
+            seed=args.seed,
+            dimension=settings.EMBEDDING_DIMENSION,
+            vocab_size=args.vocab_size,
+            words_per_chunk=args.words_per_chunk,
+        )
+        print(json.dumps(summary, indent=2, default=str))
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10_000, help="10k to 5M")
+    parser.add_argument("--chunks-per-artifact", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--words-per-chunk", type=int, default=120)
+    parser.add_argument("--vocab-size", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=2_000)
+    parser.add_argument("--create-schema", action="store_true", help="Apply benchmarks/schema.sql first")
+    parser.add_argument("--build-index", action="store_true", help="Build the ANN index afterwards")
+    parser.add_argument("--index-method", choices=["hnsw", "ivfflat"], default=None)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
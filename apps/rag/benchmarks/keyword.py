@@ -0,0 +1,174 @@
+# @author: fatima bashir
+"""
+Keyword search latency: trigram SIMILARITY vs. the stored tsvector index.
+
+Runs SearchService.keyword_search for every engine over clean queries and
+over typo'd copies of them (one character changed per word), and reports
+latency, empty-result rate and top-k overlap with the trigram baseline.
+The fulltext engine retries empty matches with the fuzzy engine when
+KEYWORD_FUZZY_FALLBACK is on; the report counts how often that happened.
+
+Needs packages/database/fulltext-search.sql on the corpus (benchmark
+schemas created by python -m benchmarks.corpus --create-schema have it).
+Run from apps/rag:
+    python -m benchmarks.keyword --queries 200 --top-k 10 --out keyword.json
+    python -m benchmarks.keyword --engines trigram fulltext --explain
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, close_db
+from app.services.search import KEYWORD_SQL, SearchService, _keyword_statement
+from benchmarks.report import build_report, summarize
+from benchmarks.synthetic import make_queries
+
+ENGINES = ("trigram", "fulltext", "fuzzy")
+
+
+def add_typos(query: str, rng: np.random.Generator) -> str:
+    """Replace one inner character of every word of four or more letters."""
+    words = []
+    for word in query.split():
+        if len(word) >= 4:
+            position = int(rng.integers(1, len(word) - 1))
+            replacement = "xq"[word[position] == "x"]
+            word = word[:position] + replacement + word[position + 1:]
+        words.append(word)
+    return " ".join(words)
+
+
+async def run_engine(
+    engine: str, queries: List[str], top_k: int
+) -> Dict[str, Any]:
+    """
+    Run every query through one engine, recording latency and result ids.
+    """
+    latencies: List[float] = []
+    result_ids: List[List[str]] = []
+    fallbacks = 0
+
+    async with AsyncSessionLocal() as session:
+        search_service = SearchService(session)
+        for query in queries:
+            started = time.perf_counter()
+            results = await search_service.keyword_search(query, top_k=top_k, engine=engine)
+            latencies.append((time.perf_counter() - started) * 1000)
+            result_ids.append([result["id"] for result in results])
+
+        if engine == "fulltext" and settings.KEYWORD_FUZZY_FALLBACK:
+            # Queries the tsvector index alone could not answer
+            for query in queries:
+                result = await session.execute(
+                    text("SELECT NOT EXISTS ("
+                         " SELECT 1 FROM doc_chunks"
+                         " WHERE content_tsv @@ websearch_to_tsquery('english', :query))"),
+                    {"query": query},
+                )
+                fallbacks += bool(result.scalar())
+
+    return {
+        "latency_ms": summarize(latencies),
+        "empty_rate": round(sum(not ids for ids in result_ids) / len(result_ids), 4),
+        "mean_results": round(float(np.mean([len(ids) for ids in result_ids])), 2),
+        "fallback_rate": round(fallbacks / len(queries), 4) if engine == "fulltext" else None,
+        "ids": result_ids,
+    }
+
+
+def overlap(results: List[List[str]], baseline: List[List[str]]) -> Optional[float]:
+    """Mean fraction of baseline top-k ids also returned, over queries the baseline answered."""
+    scores = [
+        len(set(found) & set(expected)) / len(expected)
+        for found, expected in zip(results, baseline)
+        if expected
+    ]
+    return round(float(np.mean(scores)), 4) if scores else None
+
+
+async def explain(engine: str, query: str, top_k: int) -> None:
+    """Print the executed plan of one query, to confirm which index serves it."""
+    statement = _keyword_statement("", engine)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS) {statement.text}"),
+            {"query": query, "top_k": top_k},
+        )
+        print(f"\n-- {engine}: {query!r}")
+        for row in result.fetchall():
+            print(row[0])
+
+
+async def main_async(args) -> Dict[str, Any]:
+    try:
+        rng = np.random.default_rng(args.seed)
+        clean = make_queries(args.queries, vocab_size=args.vocab_size, seed=args.seed)
+        query_sets = {"clean": clean, "typo": [add_typos(query, rng) for query in clean]}
+
+        results: Dict[str, Dict[str, Any]] = {}
+        print(f"{'engine':<10} {'queries':<6} {'p50 ms':>9} {'p95 ms':>9} {'empty':>7}"
+              f" {'overlap':>8} {'fallback':>9}")
+        for engine in args.engines:
+            results[engine] = {}
+            for name, queries in query_sets.items():
+                # Warm the plan and buffer caches before timing
+                await run_engine(engine, queries[: min(10, len(queries))], args.top_k)
+                results[engine][name] = await run_engine(engine, queries, args.top_k)
+
+        baseline = results.get("trigram")
+        for engine, by_set in results.items():
+            for name, result in by_set.items():
+                result["overlap_with_trigram"] = (
+                    overlap(result["ids"], baseline[name]["ids"]) if baseline else None
+                )
+                print(
+                    f"{engine:<10} {name:<6} {result['latency_ms'].get('p50', 0):>9.2f}"
+                    f" {result['latency_ms'].get('p95', 0):>9.2f} {result['empty_rate']:>7.2%}"
+                    f" {result['overlap_with_trigram'] if result['overlap_with_trigram'] is not None else '-':>8}"
+                    f" {result['fallback_rate'] if result['fallback_rate'] is not None else '-':>9}"
+                )
+                if not args.keep_ids:
+                    del result["ids"]
+
+        if args.explain:
+            for engine in args.engines:
+                await explain(engine, clean[0], args.top_k)
+
+        config = {key: value for key, value in vars(args).items() if key not in ("out", "label")}
+        config.update(fuzzy_fallback=settings.KEYWORD_FUZZY_FALLBACK)
+        return build_report(results, config, label=args.label)
+    finally:
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--vocab-size", type=int, default=20_000, help="Must match the corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=sorted(KEYWORD_SQL))
+    parser.add_argument("--explain", action="store_true", help="Print EXPLAIN ANALYZE for one query per engine")
+    parser.add_argument("--keep-ids", action="store_true", help="Keep per-query result ids in the report")
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--out", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+        print(f"Report written to {args.out}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
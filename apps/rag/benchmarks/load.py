@@ -0,0 +1,176 @@
+# @author: fatima bashir
+"""
+Closed-loop load test for the search endpoints.
+
+Drives /api/v1/search/{hybrid,semantic,keyword} at fixed concurrency levels
+and records throughput plus p50/p95/p99 end-to-end and per pipeline stage
+(from the Server-Timing header) into a JSON report.
+
+Start the service against a benchmark corpus (python -m benchmarks.corpus)
+with the deterministic embedder, e.g.:
+    EMBEDDING_PROVIDER=hash SEARCH_CACHE_ENABLED=false uvicorn app.main:app
+
+then run from apps/rag:
+    python -m benchmarks.load --concurrency 1 8 32 --requests 500 --out run.json
+and compare runs with python -m benchmarks.report.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.report import build_report, summarize
+from benchmarks.synthetic import make_queries
+
+ENDPOINTS = ("hybrid", "semantic", "keyword")
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Parse 'stage;dur=1.23, other;dur=4.5' into {stage: milliseconds}."""
+    timings: Dict[str, float] = {}
+    if not header:
+        return timings
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+class LoadRun:
+    """One endpoint at one concurrency level."""
+
+    def __init__(self, client: httpx.AsyncClient, endpoint: str, payloads: List[Dict[str, Any]]):
+        self.client = client
+        self.endpoint = endpoint
+        self.payloads = payloads
+        self.latencies: List[float] = []
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def _worker(self, offsets):
+        for offset in offsets:
+            payload = self.payloads[offset % len(self.payloads)]
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(f"/api/v1/search/{self.endpoint}", json=payload)
+            except httpx.HTTPError as e:
+                self.errors[type(e).__name__] += 1
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+
+            if response.status_code != 200:
+                self.errors[str(response.status_code)] += 1
+                continue
+            self.latencies.append(elapsed)
+            for stage, duration in parse_server_timing(response.headers.get("server-timing")).items():
+                self.stages[stage].append(duration)
+
+    async def run(self, concurrency: int, requests: int, start: int = 0) -> Dict[str, Any]:
+        """
+        Issue `requests` requests from `concurrency` workers sharing one sequence.
+        """
+        offsets = iter(range(start, start + requests))
+        started = time.perf_counter()
+        await asyncio.gather(*[self._worker(offsets) for _ in range(concurrency)])
+        wall = time.perf_counter() - started
+
+        return {
+            "concurrency": concurrency,
+            "requests": requests,
+            "completed": len(self.latencies),
+            "errors": dict(self.errors),
+            "wall_seconds": round(wall, 3),
+            "throughput_rps": round(len(self.latencies) / wall, 2) if wall > 0 else 0.0,
+            "latency_ms": summarize(self.latencies),
+            "stages": {stage: summarize(values) for stage, values in sorted(self.stages.items())},
+        }
+
+
+def build_payloads(args) -> List[Dict[str, Any]]:
+    """Deterministic request bodies; identical across runs with the same seed."""
+    queries = make_queries(args.queries, vocab_size=args.vocab_size, seed=args.seed)
+    rng = np.random.default_rng(args.seed + 2)
+    payloads = []
+    for query in queries:
+        payload: Dict[str, Any] = {"query": query, "top_k": args.top_k}
+        if args.users and rng.random() < args.scoped_fraction:
+            payload["user_id"] = f"bench-u-{rng.integers(args.users)}"
+        if args.recall_tier:
+            payload["recall_tier"] = args.recall_tier
+        payloads.append(payload)
+    return payloads
+
+
+async def main_async(args) -> Dict[str, Any]:
+    payloads = build_payloads(args)
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for endpoint in args.endpoints:
+            results[endpoint] = {}
+            # Warm connections, caches and lazy model loads outside the measurement
+            await LoadRun(client, endpoint, payloads).run(min(args.concurrency), args.warmup)
+
+            for concurrency in args.concurrency:
+                # Every level replays the same query sequence after the warm-up
+                summary = await LoadRun(client, endpoint, payloads).run(
+                    concurrency, args.requests, start=args.warmup
+                )
+                results[endpoint][str(concurrency)] = summary
+                latency = summary["latency_ms"]
+                print(
+                    f"{endpoint:<9} c={concurrency:<4} {summary['throughput_rps']:>8.1f} req/s"
+                    f"  p50 {latency.get('p50', 0):>8.2f}  p95 {latency.get('p95', 0):>8.2f}"
+                    f"  p99 {latency.get('p99', 0):>8.2f} ms  errors {sum(summary['errors'].values())}",
+                    flush=True,
+                )
+
+    config = {
+        key: value for key, value in vars(args).items() if key not in ("out", "label")
+    }
+    return build_report(results, config, label=args.label)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per level")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=2_000, help="Distinct queries in the pool")
+    parser.add_argument("--vocab-size", type=int, default=20_000, help="Must match the corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Must match the corpus")
+    parser.add_argument("--users", type=int, default=100, help="Benchmark users in the corpus")
+    parser.add_argument("--scoped-fraction", type=float, default=0.0, help="Share of queries with a user_id")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--recall-tier", choices=["fast", "balanced", "accurate"], default=None)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--label", default=None, help="Free-form run label stored in the report")
+    parser.add_argument("--out", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+        print(f"Report written to {args.out}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+# @author: fatima bashir
+"""
+ANN recall-versus-latency evaluation.
+
+Computes exact top-k neighbours for a query set by streaming every
+doc_chunks embedding through NumPy, then runs SearchService.semantic_search
+under each index build, search parameter and similarity threshold, and
+reports recall@k against latency. The cheapest configuration meeting
+--target-recall is printed at the end.
+
+--quantized adds the two-stage path (Hamming prefilter over embedding_bits,
+then rescoring) for each candidate multiplier, and reports the per-row and
+index storage of the full, halfvec and bit columns. It needs
+packages/database/quantized-embeddings.sql applied to the corpus.
+
+--local loads the in-process vector store (LOCAL_VECTOR_* settings) and
+evaluates it alongside pgvector.
+
+Run from apps/rag against a corpus (python -m benchmarks.corpus), ideally
+with EMBEDDING_PROVIDER=hash:
+    python -m benchmarks.recall --queries 200 --top-k 10 --out recall.json
+    python -m benchmarks.recall --indexes hnsw:m=16,ef_construction=64 ivfflat --plot recall.png
+    python -m benchmarks.recall --quantized 4 10 20 --exact
+
+--indexes rebuilds doc_chunks_embedding_idx for each entry; the last build is left in place.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.bulk_writer import vector_connection
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, close_db
+from app.services.ann_index import ann_index_manager
+from app.services.embeddings import EmbeddingService
+from app.services.search import SearchService
+from app.services.vector_store import local_vector_store
+from app.services.similarity import CandidateMatrix, normalize_rows, top_k_similar
+from benchmarks.report import build_report, summarize
+from benchmarks.synthetic import make_queries
+
+
+async def exact_neighbors(
+    queries: np.ndarray, top_k: int, fetch_rows: int
+) -> Tuple[List[List[str]], int]:
+    """
+    Brute-force top-k chunk ids per query, streaming embeddings in blocks.
+
+    Only one block of embeddings is held in memory, so this scales to
+    corpora that do not fit in RAM.
+    """
+    query_matrix = normalize_rows(queries)
+    best_scores = np.full((len(query_matrix), top_k), -np.inf, dtype=np.float32)
+    best_ids = np.full((len(query_matrix), top_k), None, dtype=object)
+    scanned = 0
+
+    async with AsyncSessionLocal() as session:
+        async with vector_connection(session) as connection:
+            async with connection.transaction():
+                cursor = await connection.cursor(
+                    "SELECT id, embedding FROM doc_chunks WHERE embedding IS NOT NULL"
+                )
+                while True:
+                    records = await cursor.fetch(fetch_rows)
+                    if not records:
+                        break
+                    ids = np.array([record["id"] for record in records], dtype=object)
+                    block = CandidateMatrix(np.stack([record["embedding"] for record in records]))
+                    indices, scores = top_k_similar(query_matrix, block, top_k)
+
+                    # Merge the block's top-k into the running top-k
+                    merged_scores = np.concatenate([best_scores, scores], axis=1)
+                    merged_ids = np.concatenate([best_ids, ids[indices]], axis=1)
+                    order = np.argsort(-merged_scores, axis=1, kind="stable")[:, :top_k]
+                    best_scores = np.take_along_axis(merged_scores, order, axis=1)
+                    best_ids = np.take_along_axis(merged_ids, order, axis=1)
+                    scanned += len(records)
+
+    return [[i for i in row if i is not None] for row in best_ids], scanned
+
+
+async def storage_footprint() -> Dict[str, Any]:
+    """Average stored bytes per row and index size for each embedding column."""
+    async with AsyncSessionLocal() as session:
+        row = (await session.execute(text("""
+            SELECT
+                avg(pg_column_size(embedding)) AS embedding,
+                avg(pg_column_size(embedding_half)) AS embedding_half,
+                avg(pg_column_size(embedding_bits)) AS embedding_bits
+            FROM doc_chunks
+        """))).one()
+        indexes = (await session.execute(text("""
+            SELECT a.attname AS column_name, sum(pg_relation_size(i.indexrelid)) AS bytes
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = c.relam
+            WHERE i.indrelid = 'doc_chunks'::regclass
+                AND am.amname IN ('hnsw', 'ivfflat')
+            GROUP BY a.attname
+        """))).fetchall()
+
+    index_bytes = {index.column_name: int(index.bytes) for index in indexes}
+    return {
+        column: {
+            "row_bytes": round(float(getattr(row, column)), 1) if getattr(row, column) else None,
+            "index_bytes": index_bytes.get(column),
+        }
+        for column in ("embedding", "embedding_half", "embedding_bits")
+    }
+
+
+def parse_index_spec(spec: str) -> Tuple[str, Dict[str, int]]:
+    """Parse 'hnsw:m=16,ef_construction=64' into (method, params)."""
+    method, _, raw_params = spec.partition(":")
+    params = {}
+    for item in filter(None, raw_params.split(",")):
+        key, _, value = item.partition("=")
+        params[key.strip()] = int(value)
+    return method, params
+
+
+def search_settings(method: Optional[str], args) -> List[Dict[str, Any]]:
+    """Search-time parameter settings to sweep for an index method."""
+    sweep: List[Dict[str, Any]] = []
+    if args.exact:
+        sweep.append({"name": "exact", "exact": True})
+    if method == "hnsw":
+        sweep.extend({"name": f"ef_search={ef}", "ef_search": ef} for ef in args.ef_search)
+    elif method == "ivfflat":
+        sweep.extend({"name": f"probes={p}", "probes": p} for p in args.probes)
+    sweep.extend(
+        {"name": f"bits x{m}", "quantized": True, "candidate_multiplier": m}
+        for m in args.quantized or []
+    )
+    if args.local:
+        sweep.append({"name": "local", "backend": "local"})
+    return sweep
+
+
+async def run_setting(
+    search_service_args: Dict[str, Any],
+    queries: List[str],
+    embeddings: np.ndarray,
+    truth: List[List[str]],
+    setting: Dict[str, Any],
+    threshold: float,
+    top_k: int,
+) -> Dict[str, Any]:
+    """
+    Run every query under one setting inside a single transaction.
+    """
+    latencies: List[float] = []
+    recalls: List[float] = []
+
+    async with AsyncSessionLocal() as session:
+        search_service = SearchService(session, **search_service_args)
+        if setting.get("exact"):
+            # Force the sequential scan so the database returns exact results
+            await session.execute(text("SET LOCAL enable_indexscan = off"))
+        ef_search = setting.get("ef_search")
+        if setting.get("quantized"):
+            # The bit index has to return the whole candidate pool
+            ef_search = top_k * setting["candidate_multiplier"]
+        await ann_index_manager.apply_search_params(
+            session, probes=setting.get("probes"), ef_search=ef_search
+        )
+
+        for query, embedding, expected in zip(queries, embeddings, truth):
+            started = time.perf_counter()
+            results = await search_service.semantic_search(
+                query,
+                top_k=top_k,
+                query_embedding=embedding.tolist(),
+                similarity_threshold=threshold,
+                quantized=setting.get("quantized", False),
+                candidate_multiplier=setting.get("candidate_multiplier"),
+                backend=setting.get("backend", "pgvector"),
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            if expected:
+                found = {result["id"] for result in results}
+                recalls.append(len(found.intersection(expected)) / len(expected))
+
+        await session.rollback()
+
+    wall = sum(latencies) / 1000
+    return {
+        "recall": round(float(np.mean(recalls)), 4) if recalls else None,
+        "recall_min": round(float(np.min(recalls)), 4) if recalls else None,
+        "latency_ms": summarize(latencies),
+        "qps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+    }
+
+
+def plot_curves(points: List[Dict[str, Any]], top_k: int, path: str) -> None:
+    """Plot recall@k against p95 latency, one line per index and threshold."""
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping --plot")
+        return
+
+    figure, axis = plt.subplots(figsize=(8, 5))
+    series: Dict[str, List[Dict[str, Any]]] = {}
+    for point in points:
+        if point["setting"] == "exact" or point["recall"] is None:
+            continue
+        path_label = " bits" if point["setting"].startswith("bits") else ""
+        series.setdefault(
+            f"{point['index']}{path_label} threshold={point['threshold']}", []
+        ).append(point)
+
+    for label, series_points in series.items():
+        axis.plot(
+            [p["latency_ms"]["p95"] for p in series_points],
+            [p["recall"] for p in series_points],
+            marker="o",
+            label=label,
+        )
+    axis.set_xlabel("p95 latency (ms)")
+    axis.set_ylabel(f"recall@{top_k}")
+    axis.grid(True, alpha=0.3)
+    axis.legend(fontsize="small")
+    figure.tight_layout()
+    figure.savefig(path)
+    print(f"Plot written to {path}")
+
+
+async def main_async(args) -> Dict[str, Any]:
+    try:
+        queries = make_queries(args.queries, vocab_size=args.vocab_size, seed=args.seed)
+        embedding_service = EmbeddingService()
+        embeddings = np.asarray(await embedding_service.embed_texts(queries), dtype=np.float32)
+
+        started = time.perf_counter()
+        truth, scanned = await exact_neighbors(embeddings, args.top_k, args.fetch_rows)
+        print(f"Exact neighbours for {len(queries)} queries over {scanned:,} chunks"
+              f" in {time.perf_counter() - started:.1f}s")
+
+        if args.local:
+            status = await local_vector_store.load()
+            print(f"Loaded {status['rows']:,} chunks into the local store in {status['load_time_ms']:.0f} ms")
+
+        indexes = args.indexes or [None]
+        points: List[Dict[str, Any]] = []
+        search_service_args = {"embedding_service": embedding_service}
+
+        for spec in indexes:
+            if spec is None:
+                status = await ann_index_manager.get_status("doc_chunks")
+                method = status.get("method")
+                index_label = f"{method}{status.get('params', '')}" if method else "none"
+            else:
+                method, build_params = parse_index_spec(spec)
+                build_started = time.perf_counter()
+                status = await ann_index_manager.build_index("doc_chunks", method, build_params or None)
+                index_label = f"{method}{status.get('params', build_params)}"
+                print(f"Built {index_label} in {time.perf_counter() - build_started:.1f}s")
+
+            for setting in search_settings(method, args) or [{"name": "default"}]:
+                for threshold in args.thresholds:
+                    result = await run_setting(
+                        search_service_args, queries, embeddings, truth,
+                        setting, threshold, args.top_k,
+                    )
+                    point = {
+                        "index": index_label,
+                        "setting": setting["name"],
+                        "threshold": threshold,
+                        **result,
+                    }
+                    points.append(point)
+                    print(
+                        f"{index_label:<32} {setting['name']:<16} thr={threshold:<5}"
+                        f" recall@{args.top_k} {point['recall'] if point['recall'] is not None else '-':<7}"
+                        f" p50 {result['latency_ms'].get('p50', 0):>8.2f}"
+                        f" p95 {result['latency_ms'].get('p95', 0):>8.2f} ms",
+                        flush=True,
+                    )
+
+        eligible = [
+            p for p in points
+            if p["setting"] != "exact" and p["recall"] is not None and p["recall"] >= args.target_recall
+        ]
+        cheapest = min(eligible, key=lambda p: p["latency_ms"]["p95"]) if eligible else None
+        if cheapest:
+            print(
+                f"\nCheapest configuration with recall@{args.top_k} >= {args.target_recall}:"
+                f" {cheapest['index']} {cheapest['setting']} threshold={cheapest['threshold']}"
+                f" (p95 {cheapest['latency_ms']['p95']:.2f} ms)"
+            )
+        else:
+            print(f"\nNo configuration reached recall@{args.top_k} >= {args.target_recall}")
+
+        storage = None
+        if args.quantized:
+            storage = await storage_footprint()
+            print("\nStorage per column (avg bytes/row, ANN index bytes):")
+            for column, sizes in storage.items():
+                print(f"  {column:<16} {sizes['row_bytes'] or '-':>10} {sizes['index_bytes'] or '-':>14}")
+
+        if args.plot:
+            plot_curves(points, args.top_k, args.plot)
+
+        config = {key: value for key, value in vars(args).items() if key not in ("out", "plot", "label")}
+        config.update(chunks=scanned, embedding_provider=settings.EMBEDDING_PROVIDER)
+        return build_report(
+            {"points": points, "cheapest": cheapest, "storage": storage}, config, label=args.label
+        )
+    finally:
+        await local_vector_store.close()
+        await close_db()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--vocab-size", type=int, default=20_000, help="Must match the corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--indexes",
+        nargs="+",
+        default=None,
+        help="Index builds to evaluate, e.g. hnsw:m=16,ef_construction=64 ivfflat:lists=1000 "
+             "(default: the existing index)",
+    )
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160, 320])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument(
+        "--thresholds",
+        type=float,
+        nargs="+",
+        default=[-1.0, settings.SIMILARITY_THRESHOLD],
+        help="Similarity thresholds to evaluate (-1 disables the cut-off)",
+    )
+    parser.add_argument(
+        "--quantized",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Also evaluate the bit-vector prefilter with these candidate multipliers, e.g. 4 10 20",
+    )
+    parser.add_argument("--local", action="store_true", help="Also evaluate the in-process vector store")
+    parser.add_argument("--exact", action="store_true", help="Also time an exact sequential scan")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--fetch-rows", type=int, default=20_000, help="Rows per block for exact search")
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--plot", default=None, help="Write a recall/latency plot (needs matplotlib)")
+    parser.add_argument("--out", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    output = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+        print(f"Report written to {args.out}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
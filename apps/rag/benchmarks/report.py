@@ -0,0 +1,125 @@
+# @author: fatima bashir
+"""
+Benchmark JSON reports: percentile summaries, run metadata and comparison.
+
+Compare two runs (e.g. before and after a change):
+    python -m benchmarks.report baseline.json candidate.json --threshold 10
+
+Exits non-zero when any compared p95 regresses by more than --threshold percent.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import argparse
+import json
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(samples_ms: Iterable[float]) -> Dict[str, float]:
+    """Percentiles, mean and max of latency samples in milliseconds."""
+    values = np.asarray(list(samples_ms), dtype=np.float64)
+    if values.size == 0:
+        return {}
+    summary = {
+        f"p{p}": round(float(value), 3)
+        for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+    }
+    summary.update(mean=round(float(values.mean()), 3), max=round(float(values.max()), 3))
+    return summary
+
+
+def git_revision() -> Dict[str, Any]:
+    """Current commit and whether the working tree has local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain"], capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def build_report(results: Dict[str, Any], config: Dict[str, Any], label: Optional[str] = None) -> Dict[str, Any]:
+    """Wrap results with the metadata needed to compare runs."""
+    return {
+        "meta": {
+            "label": label,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            **git_revision(),
+        },
+        "config": config,
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print per endpoint/concurrency/stage deltas; return the p95 regressions.
+    """
+    regressions = []
+    header = f"{'endpoint':<9} {'conc':>4} {'stage':<16} {'metric':<6} {'base':>10} {'new':>10} {'delta':>8}"
+    print(f"baseline:  {baseline['meta'].get('commit')} {baseline['meta'].get('label') or ''}")
+    print(f"candidate: {candidate['meta'].get('commit')} {candidate['meta'].get('label') or ''}")
+    print(header)
+    print("-" * len(header))
+
+    for endpoint, levels in baseline["results"].items():
+        for concurrency, base in levels.items():
+            new = candidate["results"].get(endpoint, {}).get(concurrency)
+            if new is None:
+                continue
+
+            rows = [("throughput", "rps", base["throughput_rps"], new["throughput_rps"])]
+            stages = {"client": base["latency_ms"], **base["stages"]}
+            new_stages = {"client": new["latency_ms"], **new["stages"]}
+            for stage, base_stage in stages.items():
+                new_stage = new_stages.get(stage)
+                if not base_stage or not new_stage:
+                    continue
+                for metric in ("p50", "p95", "p99"):
+                    rows.append((stage, metric, base_stage[metric], new_stage[metric]))
+
+            for stage, metric, before, after in rows:
+                delta = (after - before) / before * 100 if before else 0.0
+                print(
+                    f"{endpoint:<9} {concurrency:>4} {stage:<16} {metric:<6}"
+                    f" {before:>10.2f} {after:>10.2f} {delta:>+7.1f}%"
+                )
+                if metric == "p95" and delta > threshold:
+                    regressions.append(f"{endpoint} c={concurrency} {stage} p95 {delta:+.1f}%")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print("\np95 regressions over threshold:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
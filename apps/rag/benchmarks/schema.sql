@@ -0,0 +1,116 @@
+-- @author: fatima bashir
+-- Minimal schema for running the search benchmarks against an empty
+-- local Postgres + pgvector (python -m benchmarks.corpus --create-schema).
+-- Column names follow the RAG service's queries; {dimension} is filled in
+-- from EMBEDDING_DIMENSION (ANN indexes need a fixed-width column).
+
+CREATE EXTENSION IF NOT EXISTS vector;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE IF NOT EXISTS users (
+    id         text PRIMARY KEY,
+    email      text UNIQUE NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS artifacts (
+    id          text PRIMARY KEY,
+    user_id     text NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    title       text NOT NULL,
+    description text,
+    type        text NOT NULL,
+    content     text,
+    file_url    text,
+    file_name   text,
+    file_size   integer,
+    mime_type   text,
+    tags        text[] NOT NULL DEFAULT ARRAY[]::text[],
+    is_public   boolean NOT NULL DEFAULT false,
+    created_at  timestamptz NOT NULL DEFAULT now(),
+    updated_at  timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS doc_chunks (
+    id          text PRIMARY KEY,
+    artifact_id text REFERENCES artifacts (id) ON DELETE CASCADE,
+    content     text NOT NULL,
+    embedding   vector({dimension}),
+    metadata    jsonb,
+    chunk_index integer NOT NULL DEFAULT 0,
+    created_at  timestamptz NOT NULL DEFAULT now(),
+    updated_at  timestamptz NOT NULL DEFAULT now(),
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED,
+    user_id       text,
+    artifact_type text
+);
+
+CREATE INDEX IF NOT EXISTS artifacts_user_id_idx ON artifacts (user_id);
+CREATE INDEX IF NOT EXISTS doc_chunks_artifact_id_idx ON doc_chunks (artifact_id);
+CREATE INDEX IF NOT EXISTS doc_chunks_document_id_idx ON doc_chunks ((metadata->>'document_id'));
+CREATE INDEX IF NOT EXISTS doc_chunks_user_id_type_idx ON doc_chunks (user_id, artifact_type);
+
+CREATE INDEX IF NOT EXISTS doc_chunks_content_tsv_idx
+ON doc_chunks USING gin (content_tsv);
+
+CREATE INDEX IF NOT EXISTS doc_chunks_content_trgm_idx
+ON doc_chunks USING gin (content gin_trgm_ops);
+
+-- Same ownership trigger as packages/database/tenant-columns.sql
+CREATE OR REPLACE FUNCTION doc_chunks_set_owner()
+RETURNS trigger AS $$
+BEGIN
+    IF NEW.artifact_id IS NULL THEN
+        NEW.user_id := NULL;
+        NEW.artifact_type := NULL;
+    ELSE
+        SELECT a.user_id, a.type INTO NEW.user_id, NEW.artifact_type
+        FROM artifacts a
+        WHERE a.id = NEW.artifact_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doc_chunks_set_owner ON doc_chunks;
+CREATE TRIGGER doc_chunks_set_owner
+BEFORE INSERT OR UPDATE OF artifact_id ON doc_chunks
+FOR EACH ROW EXECUTE FUNCTION doc_chunks_set_owner();
+
+-- Same deletion tombstones as packages/database/chunk-tombstones.sql
+CREATE TABLE IF NOT EXISTS doc_chunk_deletions (
+    chunk_id   text NOT NULL,
+    deleted_at timestamptz NOT NULL DEFAULT clock_timestamp(),
+    PRIMARY KEY (chunk_id, deleted_at)
+);
+
+CREATE INDEX IF NOT EXISTS doc_chunk_deletions_deleted_at_idx
+ON doc_chunk_deletions (deleted_at);
+
+CREATE OR REPLACE FUNCTION doc_chunks_record_deletions()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO doc_chunk_deletions (chunk_id)
+    SELECT id FROM deleted_rows;
+    DELETE FROM doc_chunk_deletions
+    WHERE deleted_at < now() - interval '7 days';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doc_chunks_record_deletions ON doc_chunks;
+CREATE TRIGGER doc_chunks_record_deletions
+AFTER DELETE ON doc_chunks
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION doc_chunks_record_deletions();
+
+CREATE OR REPLACE FUNCTION hybrid_search_score(
+    semantic_score float,
+    bm25_score float,
+    semantic_weight float DEFAULT 0.7
+)
+RETURNS float AS $$
+BEGIN
+    RETURN (semantic_weight * semantic_score) + ((1 - semantic_weight) * bm25_score);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
@@ -0,0 +1,98 @@
+# @author: fatima bashir
+"""
+Deterministic synthetic text shared by the corpus generator and load driver.
+
+Words are drawn from a Zipf distribution over a generated vocabulary, and
+embeddings use the same feature hashing as EMBEDDING_PROVIDER="hash", so
+a query embedded by the service lands near the chunks that share its words.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.hash_embeddings import token_slot
+
+SYLLABLES = [consonant + vowel for consonant in "bcdfghjklmnprstvz" for vowel in "aeiou"]
+ARTIFACT_TYPES = ("resume", "project", "certificate", "portfolio")
+
+
+def build_vocabulary(size: int, seed: int = 0) -> np.ndarray:
+    """Generate `size` distinct pronounceable words."""
+    rng = np.random.default_rng(seed)
+    words: List[str] = []
+    seen = set()
+    while len(words) < size:
+        syllables = rng.integers(0, len(SYLLABLES), rng.integers(2, 4))
+        word = "".join(SYLLABLES[i] for i in syllables)
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return np.array(words)
+
+
+class SyntheticCorpus:
+    """Generates chunk texts and their hash embeddings in vectorized batches."""
+
+    def __init__(
+        self,
+        dimension: int,
+        vocab_size: int = 20_000,
+        words_per_chunk: int = 120,
+        zipf_a: float = 1.15,
+        seed: int = 0,
+    ):
+        self.dimension = dimension
+        self.words_per_chunk = words_per_chunk
+        self.zipf_a = zipf_a
+        self.vocabulary = build_vocabulary(vocab_size, seed)
+
+        slots = [token_slot(word, dimension) for word in self.vocabulary]
+        self.slot_index = np.array([index for index, _ in slots], dtype=np.int64)
+        self.slot_sign = np.array([sign for _, sign in slots], dtype=np.float64)
+
+    def sample_word_ids(self, rng: np.random.Generator, shape) -> np.ndarray:
+        """Draw word ids with a Zipf rank-frequency distribution."""
+        return (rng.zipf(self.zipf_a, shape) - 1) % len(self.vocabulary)
+
+    def chunk_batch(self, rng: np.random.Generator, count: int) -> Tuple[List[str], np.ndarray]:
+        """
+        Generate `count` chunk texts and their normalized embeddings.
+
+        Equivalent to hash_embedding() on each text, without re-tokenizing.
+        """
+        word_ids = self.sample_word_ids(rng, (count, self.words_per_chunk))
+        texts = [" ".join(self.vocabulary[row]) for row in word_ids]
+
+        rows = np.repeat(np.arange(count), self.words_per_chunk)
+        flat = rows * self.dimension + self.slot_index[word_ids].ravel()
+        embeddings = np.bincount(
+            flat,
+            weights=self.slot_sign[word_ids].ravel(),
+            minlength=count * self.dimension,
+        ).reshape(count, self.dimension).astype(np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+        return texts, embeddings
+
+
+def make_queries(
+    count: int,
+    vocab_size: int = 20_000,
+    seed: int = 0,
+    min_terms: int = 2,
+    max_terms: int = 4,
+) -> List[str]:
+    """
+    Generate search queries from mid-frequency vocabulary words.
+
+    Very common words match everything and very rare ones almost nothing,
+    so queries draw from ranks that give realistic keyword selectivity.
+    """
+    vocabulary = build_vocabulary(vocab_size, seed)
+    rng = np.random.default_rng(seed + 1)
+    low, high = min(50, vocab_size - 1), min(5_000, vocab_size)
+    queries = []
+    for _ in range(count):
+        terms = rng.integers(low, high, rng.integers(min_terms, max_terms + 1))
+        queries.append(" ".join(vocabulary[terms]))
+    return queries
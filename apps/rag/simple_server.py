@@ -1,14 +1,30 @@
 # @author: fatima bashir
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import json
-from typing import Optional
+from typing import AsyncIterator, Optional
 import httpx
 import os
 
+from app.core.http import create_http_client
+from app.services.semantic_cache import SemanticCache
+
+# App-scoped pooled client: chat requests reuse kept-alive HTTP/2 connections
+http_client: Optional[httpx.AsyncClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client
+    http_client = create_http_client("openai_chat", read_timeout=30.0)
+    yield
+    await http_client.aclose()
+    http_client = None
+
 # Create FastAPI app
-app = FastAPI(title="Mentorly AI Backend", version="1.0.0")
+app = FastAPI(title="Mentorly AI Backend", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -27,24 +43,17 @@ class ChatMessage(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     status: str
+    cached: bool = False
 
 # OpenAI API configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+CHAT_MODEL = "gpt-4o"
+CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
+CACHE_EMBEDDING_DIMENSION = 1536
 
-@app.get("/")
-async def root():
-    return {"message": "Mentorly AI Backend Running!", "status": "healthy"}
-
-@app.get("/health")
-async def health():
-    return {"status": "healthy", "service": "mentorly-ai"}
-
-@app.post("/api/v1/chat", response_model=ChatResponse)
-async def chat(chat_message: ChatMessage):
-    try:
-        # Prepare the system prompt
-        system_prompt = """You are Mentorly, a personalized AI career mentor. You provide helpful, professional, and encouraging career advice. 
+SYSTEM_PROMPT = """You are Mentorly, a personalized AI career mentor. You provide helpful, professional, and encouraging career advice. 
 
 Key guidelines:
 - Be warm, supportive, and professional
@@ -64,29 +73,110 @@ Areas you help with:
 - Work-life balance
 - Industry insights"""
 
-        # Add resume context if provided
-        if chat_message.resume_context:
-            system_prompt += f"\n\nUser's Resume Context: {chat_message.resume_context}"
+# Canned answers used when OpenAI is unavailable
+FALLBACK_RESPONSES = {
+    "resume tips": "Here are some key resume tips: 1) Use keywords from the job description 2) Quantify your achievements with numbers 3) Use action verbs 4) Keep it to 1-2 pages 5) Ensure ATS compatibility. Would you like me to elaborate on any of these points?",
+    "interview": "For interview prep: 1) Research the company thoroughly 2) Practice STAR method answers 3) Prepare thoughtful questions 4) Practice common behavioral questions 5) Plan your outfit and route. What specific aspect of interview prep would you like to focus on?",
+    "career": "Career transitions require planning: 1) Assess your transferable skills 2) Research target industries 3) Build relevant experience through projects 4) Network with professionals in your target field 5) Consider additional certifications. What career change are you considering?",
+    "salary": "For salary negotiation: 1) Research market rates 2) Document your achievements 3) Practice your pitch 4) Consider the full package, not just salary 5) Be prepared to walk away if needed. What's your current situation?"
+}
 
-        # Prepare OpenAI request
-        headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": "gpt-4o",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": chat_message.message}
-            ],
-            "max_tokens": 1000,
-            "temperature": 0.7
-        }
+DEFAULT_FALLBACK = "I'm here to help with your career questions! I can assist with resume tips, interview preparation, career transitions, salary negotiation, and more. What specific area would you like guidance on?"
+
+
+def build_chat_request(chat_message: ChatMessage, stream: bool = False) -> dict:
+    """Build the OpenAI chat completion request body."""
+    system_prompt = SYSTEM_PROMPT
+
+    # Add resume context if provided
+    if chat_message.resume_context:
+        system_prompt += f"\n\nUser's Resume Context: {chat_message.resume_context}"
+
+    payload = {
+        "model": CHAT_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": chat_message.message}
+        ],
+        "max_tokens": 1000,
+        "temperature": 0.7
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def openai_headers() -> dict:
+    return {
+        "Authorization": f"Bearer {OPENAI_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+
+def fallback_response(message: str) -> str:
+    """Pick a canned answer by keyword when OpenAI fails."""
+    user_msg_lower = message.lower()
+    for keyword, response in FALLBACK_RESPONSES.items():
+        if keyword in user_msg_lower:
+            return response
+    return DEFAULT_FALLBACK
+
+
+async def embed_message(text: str) -> list:
+    """Embed a chat message for the semantic cache."""
+    response = await http_client.post(
+        OPENAI_EMBEDDINGS_URL,
+        headers=openai_headers(),
+        json={"model": CACHE_EMBEDDING_MODEL, "input": text},
+    )
+    response.raise_for_status()
+    return response.json()["data"][0]["embedding"]
+
+
+# Near-identical questions with the same resume context reuse an earlier answer
+chat_cache = SemanticCache(
+    embed_message,
+    dimension=CACHE_EMBEDDING_DIMENSION,
+    threshold=float(os.getenv("CHAT_CACHE_THRESHOLD", "0.92")),
+    max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "5000")),
+    ttl=float(os.getenv("CHAT_CACHE_TTL", str(24 * 3600))),
+)
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() == "true"
 
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Encode one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.get("/")
+async def root():
+    return {"message": "Mentorly AI Backend Running!", "status": "healthy"}
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy", "service": "mentorly-ai"}
+
+@app.get("/api/v1/chat/cache/stats")
+async def chat_cache_stats():
+    return chat_cache.get_stats()
+
+@app.post("/api/v1/chat", response_model=ChatResponse)
+async def chat(chat_message: ChatMessage):
+    vector = None
+    if CHAT_CACHE_ENABLED:
+        cached_answer, vector = await chat_cache.lookup(
+            chat_message.message, chat_message.resume_context
+        )
+        if cached_answer is not None:
+            return ChatResponse(response=cached_answer, status="success", cached=True)
+
+    try:
         # Make request to OpenAI
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(OPENAI_URL, headers=headers, json=payload)
+        response = await http_client.post(
+            OPENAI_URL, headers=openai_headers(), json=build_chat_request(chat_message)
+        )
             
         if response.status_code != 200:
             raise HTTPException(status_code=500, detail=f"OpenAI API error: {response.status_code}")
@@ -94,28 +184,78 @@ Areas you help with:
         result = response.json()
         ai_response = result["choices"][0]["message"]["content"]
         
+        if CHAT_CACHE_ENABLED:
+            await chat_cache.store(
+                chat_message.message, ai_response, chat_message.resume_context, vector
+            )
+        
         return ChatResponse(response=ai_response, status="success")
         
     except httpx.TimeoutException:
         raise HTTPException(status_code=408, detail="Request timeout - please try again")
     except Exception as e:
         # Fallback response if OpenAI fails
-        fallback_responses = {
-            "resume tips": "Here are some key resume tips: 1) Use keywords from the job description 2) Quantify your achievements with numbers 3) Use action verbs 4) Keep it to 1-2 pages 5) Ensure ATS compatibility. Would you like me to elaborate on any of these points?",
-            "interview": "For interview prep: 1) Research the company thoroughly 2) Practice STAR method answers 3) Prepare thoughtful questions 4) Practice common behavioral questions 5) Plan your outfit and route. What specific aspect of interview prep would you like to focus on?",
-            "career": "Career transitions require planning: 1) Assess your transferable skills 2) Research target industries 3) Build relevant experience through projects 4) Network with professionals in your target field 5) Consider additional certifications. What career change are you considering?",
-            "salary": "For salary negotiation: 1) Research market rates 2) Document your achievements 3) Practice your pitch 4) Consider the full package, not just salary 5) Be prepared to walk away if needed. What's your current situation?"
-        }
-        
-        user_msg_lower = chat_message.message.lower()
-        response_text = "I'm here to help with your career questions! I can assist with resume tips, interview preparation, career transitions, salary negotiation, and more. What specific area would you like guidance on?"
-        
-        for keyword, response in fallback_responses.items():
-            if keyword in user_msg_lower:
-                response_text = response
-                break
-                
-        return ChatResponse(response=response_text, status="success")
+        return ChatResponse(response=fallback_response(chat_message.message), status="success")
+
+@app.post("/api/v1/chat/stream")
+async def chat_stream(chat_message: ChatMessage):
+    """Stream the reply as Server-Sent Events, forwarding tokens as OpenAI produces them."""
+    return StreamingResponse(
+        stream_chat_tokens(chat_message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def stream_chat_tokens(chat_message: ChatMessage) -> AsyncIterator[str]:
+    """Yield token events from a streaming completion, then a done event."""
+    vector = None
+    if CHAT_CACHE_ENABLED:
+        cached_answer, vector = await chat_cache.lookup(
+            chat_message.message, chat_message.resume_context
+        )
+        if cached_answer is not None:
+            yield sse_event({"token": cached_answer})
+            yield sse_event({"status": "success", "cached": True}, event="done")
+            return
+
+    sent_tokens = False
+    tokens = []
+    try:
+        async with http_client.stream(
+            "POST",
+            OPENAI_URL,
+            headers=openai_headers(),
+            json=build_chat_request(chat_message, stream=True),
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"OpenAI API error: {response.status_code}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                token = choices[0].get("delta", {}).get("content")
+                if token:
+                    sent_tokens = True
+                    tokens.append(token)
+                    yield sse_event({"token": token})
+
+        yield sse_event({"status": "success", "cached": False}, event="done")
+        if CHAT_CACHE_ENABLED and tokens:
+            await chat_cache.store(
+                chat_message.message, "".join(tokens), chat_message.resume_context, vector
+            )
+
+    except Exception as e:
+        if sent_tokens:
+            # Part of the answer is already on screen; report the cut-off in-band
+            yield sse_event({"detail": str(e)}, event="error")
+        else:
+            yield sse_event({"token": fallback_response(chat_message.message)})
+            yield sse_event({"status": "fallback"}, event="done")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,240 @@
+# @author: fatima bashir
+from collections import Counter
+import math
+import random
+
+import pytest
+
+from app.core.config import settings
+from app.services import bm25
+from app.services.bm25 import BM25Index, analyze
+
+K1 = 1.2
+B = 0.75
+
+
+def build_corpus(seed: int = 7, size: int = 1500):
+    """Random Zipf-ish documents spread over three users and two artifact types."""
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(600)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    corpus = {}
+    for i in range(size):
+        words = rng.choices(vocabulary, weights, k=rng.randint(10, 80))
+        corpus[f"c{i}"] = {
+            "content": " ".join(words),
+            "user_id": f"u{i % 3}",
+            "artifact_type": "resume" if i % 2 else "note",
+            "document_id": f"d{i // 10}",
+        }
+    return corpus
+
+
+def build_index(corpus) -> BM25Index:
+    index = BM25Index(k1=K1, b=B)
+    for chunk_id, doc in corpus.items():
+        index.add(chunk_id, **doc)
+    return index
+
+
+def brute_force(corpus, query, top_k, user_id=None, artifact_type=None):
+    """Score every document directly with Okapi BM25."""
+    scope = {c: d for c, d in corpus.items() if user_id is None or d["user_id"] == user_id}
+    tokens = {c: analyze(d["content"]) for c, d in scope.items()}
+    docs = len(scope)
+    avgdl = sum(len(t) for t in tokens.values()) / docs
+    df = Counter()
+    for terms in tokens.values():
+        df.update(set(terms))
+
+    hits = []
+    for chunk_id, terms in tokens.items():
+        if artifact_type is not None and scope[chunk_id]["artifact_type"] != artifact_type:
+            continue
+        tf = Counter(terms)
+        score = 0.0
+        for term in set(analyze(query)):
+            if tf[term]:
+                idf = math.log(1 + (docs - df[term] + 0.5) / (df[term] + 0.5))
+                norm = K1 * (1 - B + B * len(terms) / avgdl)
+                score += idf * tf[term] * (K1 + 1) / (tf[term] + norm)
+        if score > 0:
+            hits.append((chunk_id, score))
+    return sorted(hits, key=lambda hit: -hit[1])[:top_k]
+
+
+def assert_same_ranking(actual, expected):
+    assert len(actual) == len(expected)
+    # Ties may order differently, so compare scores position by position
+    for (_, actual_score), (_, expected_score) in zip(actual, expected):
+        assert actual_score == pytest.approx(expected_score, rel=1e-4)
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return build_corpus()
+
+
+@pytest.mark.parametrize("user_id", [None, "u1"])
+@pytest.mark.parametrize("artifact_type", [None, "note"])
+def test_search_matches_brute_force(corpus, user_id, artifact_type):
+    index = build_index(corpus)
+    rng = random.Random(11)
+    for _ in range(15):
+        query = " ".join(f"w{rng.randint(0, 300)}" for _ in range(rng.randint(1, 5)))
+        assert_same_ranking(
+            index.search(query, 10, user_id=user_id, artifact_type=artifact_type),
+            brute_force(corpus, query, 10, user_id=user_id, artifact_type=artifact_type),
+        )
+
+
+def test_search_is_scoped_to_user_and_type(corpus):
+    index = build_index(corpus)
+    for chunk_id, _ in index.search("w1 w2 w3", 50, user_id="u2", artifact_type="resume"):
+        assert corpus[chunk_id]["user_id"] == "u2"
+        assert corpus[chunk_id]["artifact_type"] == "resume"
+
+    assert index.search("w1", 10, user_id="nobody") == []
+    assert index.search("w1", 10, artifact_type="cover_letter") == []
+
+
+def test_search_ignores_stopwords_and_unknown_terms(corpus):
+    index = build_index(corpus)
+    assert index.search("the and of", 10) == []
+    assert index.search("unseenterm", 10) == []
+
+
+def test_add_replaces_earlier_version():
+    index = BM25Index(k1=K1, b=B)
+    index.add("c1", "python developer", user_id="u1")
+    index.add("c1", "rust developer", user_id="u1")
+
+    assert index.live == 1
+    assert index.search("python", 10) == []
+    assert [c for c, _ in index.search("rust", 10)] == ["c1"]
+
+
+def test_remove_document(corpus):
+    corpus = dict(corpus)
+    index = build_index(corpus)
+
+    removed = 0
+    for document in range(0, 150, 2):
+        removed += index.remove_document(f"d{document}")
+        for i in range(document * 10, document * 10 + 10):
+            corpus.pop(f"c{i}")
+    assert removed == 750
+    assert index.live == len(corpus)
+    assert index.remove("c0") is False
+
+    for user_id in (None, "u0", "u1"):
+        query = "w4 w9 w40"
+        assert_same_ranking(
+            index.search(query, 10, user_id=user_id),
+            brute_force(corpus, query, 10, user_id=user_id),
+        )
+
+
+def test_compaction_keeps_results():
+    corpus = build_corpus(size=4500)
+    index = build_index(corpus)
+
+    # Over a quarter of u0's segment and more than 1000 rows triggers compaction
+    doomed = [c for c, d in corpus.items() if d["user_id"] == "u0"][:1100]
+    for chunk_id in doomed:
+        assert index.remove(chunk_id)
+        del corpus[chunk_id]
+
+    segment = index.segments["u0"]
+    assert len(segment.chunk_ids) < 1500
+    assert segment.live == 400
+    for user_id in (None, "u0"):
+        query = "w2 w21 w77"
+        assert_same_ranking(
+            index.search(query, 10, user_id=user_id),
+            brute_force(corpus, query, 10, user_id=user_id),
+        )
+
+
+def test_removing_last_chunk_drops_segment():
+    index = BM25Index(k1=K1, b=B)
+    index.add("c1", "kubernetes operator", user_id="u1", document_id="d1")
+    index.add("c2", "kubernetes operator", user_id="u2", document_id="d2")
+
+    assert index.remove_document("d1") == 1
+    assert "u1" not in index.segments
+    assert [c for c, _ in index.search("kubernetes", 10)] == ["c2"]
+
+
+def test_snapshot_round_trip(corpus, tmp_path):
+    index = build_index(corpus)
+    path = str(tmp_path / "bm25.pkl")
+    index.save(path)
+
+    restored = BM25Index(k1=K1, b=B)
+    assert restored.restore(path)
+    for user_id in (None, "u2"):
+        assert restored.search("w3 w14 w150", 10, user_id=user_id) == index.search(
+            "w3 w14 w150", 10, user_id=user_id
+        )
+
+    # Snapshots scored with other parameters are rejected
+    assert not BM25Index(k1=2.0, b=B).restore(path)
+    assert not BM25Index(k1=K1, b=B).restore(str(tmp_path / "missing.pkl"))
+
+
+class FakeCursorConnection:
+    """asyncpg stand-in that streams canned records through a cursor."""
+
+    def __init__(self, records):
+        self.records = list(records)
+        self.queries = []
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def cursor(self, query, *args):
+        self.queries.append((query, args))
+        connection = self
+
+        class Cursor:
+            async def fetch(self, n):
+                batch, connection.records = connection.records[:n], connection.records[n:]
+                return batch
+
+        return Cursor()
+
+
+@pytest.mark.asyncio
+async def test_add_document_streams_committed_rows(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_WRITE_BATCH_SIZE", 2)
+    records = [
+        {"id": f"c{i}", "content": f"terraform module {i}", "artifact_id": "d1",
+         "document_id": "d1", "user_id": "u1", "artifact_type": "resume"}
+        for i in range(3)
+    ]
+    connection = FakeCursorConnection(records)
+
+    async def fake_connection(db):
+        return connection
+
+    monkeypatch.setattr(bm25, "get_asyncpg_connection", fake_connection)
+    index = BM25Index(k1=K1, b=B)
+
+    # Nothing is read until the index is loaded
+    assert await index.add_document(db=None, document_id="d1") == 0
+    index.loaded = True
+    assert await index.add_document(db=None, document_id="d1") == 3
+
+    (query, args), = connection.queries
+    assert args == ("d1",)
+    assert "metadata->>'document_id' = $1" in query
+    hits = index.search("terraform", 10, user_id="u1", artifact_type="resume")
+    assert {chunk_id for chunk_id, _ in hits} == {"c0", "c1", "c2"}
+    assert index.remove_document("d1") == 3
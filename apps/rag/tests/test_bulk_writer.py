@@ -0,0 +1,163 @@
+# @author: fatima bashir
+from contextlib import asynccontextmanager
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from app.core import bulk_writer
+from app.core.bulk_writer import (
+    DOC_CHUNK_COLUMNS,
+    DocChunkWriter,
+    decode_vector,
+    encode_vector,
+    vector_connection,
+)
+
+
+class FakeConnection:
+    """Records the statements and COPY batches a writer sends."""
+
+    def __init__(self):
+        self.statements = []
+        self.copies = []
+
+    async def execute(self, statement, *args):
+        self.statements.append(" ".join(statement.split()))
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copies.append((table, list(records), columns))
+
+
+class CodecConnection:
+    """asyncpg stand-in that tracks whether the vector codec is registered."""
+
+    def __init__(self, fail_reset: bool = False):
+        self.codec = False
+        self.registrations = 0
+        self.fail_reset = fail_reset
+
+    async def set_type_codec(self, typename, **kwargs):
+        assert typename == "vector" and kwargs["format"] == "binary"
+        self.codec = True
+        self.registrations += 1
+
+    async def reset_type_codec(self, typename):
+        if self.fail_reset:
+            raise RuntimeError("current transaction is aborted")
+        self.codec = False
+
+
+class FakeSession:
+    """Session whose pooled connection exposes the driver connection and info dict."""
+
+    def __init__(self, driver_connection):
+        self.driver_connection = driver_connection
+        self.info = {}
+        self.invalidated = False
+
+    async def connection(self):
+        return self
+
+    async def get_raw_connection(self):
+        return self
+
+    async def invalidate(self):
+        self.invalidated = True
+
+
+def test_encode_vector_layout():
+    data = encode_vector([1.0, -2.5, 0.125])
+
+    # Header: dimension and an unused word, both big-endian uint16
+    assert struct.unpack_from(">HH", data) == (3, 0)
+    assert len(data) == 4 + 3 * 4
+    assert struct.unpack_from(">3f", data, 4) == (1.0, -2.5, 0.125)
+
+
+@pytest.mark.parametrize("value", [
+    [0.1, 0.2, 0.3],
+    np.linspace(-1, 1, 1536, dtype=np.float64),
+    np.arange(8, dtype=np.float32),
+])
+def test_vector_round_trip(value):
+    decoded = decode_vector(encode_vector(value))
+
+    assert decoded.dtype == np.float32
+    assert decoded.dtype.isnative
+    np.testing.assert_array_equal(decoded, np.asarray(value, dtype=np.float32))
+
+
+def test_decode_ignores_trailing_bytes():
+    data = encode_vector([3.0, 4.0]) + b"\x00" * 8
+    np.testing.assert_array_equal(decode_vector(data), [3.0, 4.0])
+
+
+def test_to_record_orders_columns_and_serializes_metadata():
+    record = DocChunkWriter._to_record({
+        "id": "c1",
+        "content": "text",
+        "embedding": [0.5],
+        "metadata": {"title": "CV"},
+    })
+
+    assert len(record) == len(DOC_CHUNK_COLUMNS)
+    assert record == ("c1", None, "text", [0.5], json.dumps({"title": "CV"}), 0)
+
+
+@pytest.mark.asyncio
+async def test_write_copies_in_batches(monkeypatch):
+    connection = FakeConnection()
+
+    @asynccontextmanager
+    async def fake_connection(session):
+        yield connection
+
+    monkeypatch.setattr(bulk_writer, "vector_connection", fake_connection)
+    writer = DocChunkWriter(session=None, batch_size=2)
+    rows = [
+        {"id": f"c{i}", "content": f"chunk {i}", "embedding": [float(i)], "chunk_index": i}
+        for i in range(5)
+    ]
+
+    stats = await writer.write(rows)
+
+    assert stats.rows == 5
+    assert stats.batches == 3
+    assert [len(records) for _, records, _ in connection.copies] == [2, 2, 1]
+    assert all(table == "doc_chunks_staging" for table, _, _ in connection.copies)
+    assert [record[0] for _, records, _ in connection.copies for record in records] == [
+        f"c{i}" for i in range(5)
+    ]
+    upserts = [s for s in connection.statements if s.startswith("INSERT INTO doc_chunks")]
+    assert len(upserts) == 3
+    assert "ON CONFLICT (id) DO UPDATE SET content = EXCLUDED.content" in upserts[0]
+
+
+@pytest.mark.asyncio
+async def test_vector_codec_is_removed_before_pooling():
+    driver = CodecConnection()
+    session = FakeSession(driver)
+
+    async with vector_connection(session) as outer:
+        assert outer is driver and driver.codec
+        async with vector_connection(session):
+            assert driver.codec
+        # Still inside the outer use
+        assert driver.codec
+
+    assert not driver.codec
+    assert driver.registrations == 1
+    assert not session.invalidated
+
+
+@pytest.mark.asyncio
+async def test_vector_codec_reset_failure_discards_connection():
+    session = FakeSession(CodecConnection(fail_reset=True))
+
+    with pytest.raises(ValueError):
+        async with vector_connection(session):
+            raise ValueError("COPY failed")
+
+    assert session.invalidated
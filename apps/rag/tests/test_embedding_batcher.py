@@ -0,0 +1,87 @@
+# @author: fatima bashir
+import asyncio
+from typing import List
+
+import pytest
+
+from app.services.embedding_batcher import EmbeddingCoalescer
+
+
+class FakeEmbeddingService:
+    """Embeds a text as [len(text)] and records every provider call."""
+
+    def __init__(self, error: Exception = None):
+        self.calls: List[List[str]] = []
+        self.error = error
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_embeds_share_one_call():
+    service = FakeEmbeddingService()
+    coalescer = EmbeddingCoalescer(service, window_ms=20, max_batch=64)
+
+    results = await asyncio.gather(*[coalescer.embed("x" * n) for n in range(1, 6)])
+
+    assert results == [[float(n)] for n in range(1, 6)]
+    assert service.calls == [["x", "xx", "xxx", "xxxx", "xxxxx"]]
+    stats = coalescer.get_stats()
+    assert stats["requests"] == 5
+    assert stats["batches"] == 1
+    assert stats["max_batch_size"] == 5
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting_for_window():
+    service = FakeEmbeddingService()
+    # A window this long would time the test out if the size trigger failed
+    coalescer = EmbeddingCoalescer(service, window_ms=60_000, max_batch=3)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*[coalescer.embed(f"q{i}") for i in range(6)]), timeout=1
+    )
+
+    assert len(results) == 6
+    assert service.calls == [["q0", "q1", "q2"], ["q3", "q4", "q5"]]
+
+
+@pytest.mark.asyncio
+async def test_identical_texts_are_embedded_once():
+    service = FakeEmbeddingService()
+    coalescer = EmbeddingCoalescer(service, window_ms=20, max_batch=64)
+
+    results = await asyncio.gather(
+        coalescer.embed("python"), coalescer.embed("rust"), coalescer.embed("python")
+    )
+
+    assert results == [[6.0], [4.0], [6.0]]
+    assert service.calls == [["python", "rust"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_raises_in_every_caller():
+    service = FakeEmbeddingService(error=RuntimeError("provider down"))
+    coalescer = EmbeddingCoalescer(service, window_ms=20, max_batch=64)
+
+    results = await asyncio.gather(
+        coalescer.embed("a"), coalescer.embed("b"), return_exceptions=True
+    )
+
+    assert len(service.calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_embed_many_bypasses_queue_for_full_batches():
+    service = FakeEmbeddingService()
+    coalescer = EmbeddingCoalescer(service, window_ms=20, max_batch=2)
+
+    assert await coalescer.embed_many(["a", "bb", "ccc"]) == [[1.0], [2.0], [3.0]]
+    assert service.calls == [["a", "bb", "ccc"]]
+    assert coalescer.get_stats()["requests"] == 0
@@ -0,0 +1,106 @@
+# @author: fatima bashir
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import httpx
+import numpy as np
+import openai
+import pytest
+
+from app.core.config import settings
+from app.services.embeddings import EmbeddingService
+
+
+class FakeEmbeddings:
+    """OpenAI embeddings endpoint that fails for batches containing a marked text."""
+
+    def __init__(self, failing: str):
+        self.failing = failing
+        self.calls: List[List[str]] = []
+
+    async def create(self, model, input):
+        self.calls.append(list(input))
+        await asyncio.sleep(0)
+        if self.failing in input:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0, 0.0, 0.0]) for _ in input])
+
+
+class FakeFallbackModel:
+    """Sentence-transformers stand-in with a different dimension than OpenAI."""
+
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return [np.array([0.5, 0.5]) for _ in texts]
+
+
+class FakeCache:
+    def __init__(self, entries: Dict[str, List[float]]):
+        self.entries = dict(entries)
+
+    async def get_many(self, texts):
+        return [self.entries.get(text) for text in texts]
+
+    async def set_many(self, texts, embeddings):
+        self.entries.update(zip(texts, embeddings))
+
+
+@pytest.fixture
+def batching(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "openai")
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_MAX_ITEMS", 2)
+    monkeypatch.setattr(settings, "EMBEDDING_MAX_CONCURRENCY", 4)
+
+
+def build_service(failing: str, cache=None):
+    endpoint = FakeEmbeddings(failing)
+    service = EmbeddingService(
+        openai_client=SimpleNamespace(embeddings=endpoint),
+        st_model=FakeFallbackModel(),
+        cache=cache,
+    )
+    return service, endpoint
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_for_the_whole_request(batching):
+    service, endpoint = build_service(failing="t3")
+    texts = [f"t{i}" for i in range(6)]
+
+    embeddings = await service.embed_texts(texts)
+
+    # Three batches went to OpenAI, but every vector comes from one model
+    assert len(endpoint.calls) == 3
+    assert service.st_model.calls == [texts]
+    assert embeddings == [[0.5, 0.5]] * len(texts)
+
+
+@pytest.mark.asyncio
+async def test_fallback_replaces_cache_hits_and_is_not_cached(batching):
+    cache = FakeCache({"t0": [1.0, 0.0, 0.0]})
+    service, _ = build_service(failing="t2", cache=cache)
+    texts = ["t0", "t1", "t2"]
+
+    embeddings = await service.embed_texts(texts)
+
+    assert embeddings == [[0.5, 0.5]] * len(texts)
+    assert cache.entries == {"t0": [1.0, 0.0, 0.0]}
+
+
+@pytest.mark.asyncio
+async def test_successful_batches_keep_openai_vectors(batching):
+    cache = FakeCache({})
+    service, endpoint = build_service(failing="never", cache=cache)
+    texts = [f"t{i}" for i in range(5)]
+
+    embeddings = await service.embed_texts(texts)
+
+    assert [len(call) for call in endpoint.calls] == [2, 2, 1]
+    assert embeddings == [[1.0, 0.0, 0.0]] * len(texts)
+    assert service.st_model.calls == []
+    assert set(cache.entries) == set(texts)
@@ -0,0 +1,58 @@
+# @author: fatima bashir
+import pytest
+
+from app.core.config import settings
+from app.services import result_cache
+from app.services.result_cache import GLOBAL_SCOPE, SearchResultCache
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.keys = []
+
+    def incr(self, key):
+        self.keys.append(key)
+
+    async def execute(self):
+        if self.redis.down:
+            raise ConnectionError("redis unavailable")
+        for key in self.keys:
+            self.redis.counters[key] = self.redis.counters.get(key, 0) + 1
+
+
+class FakeRedis:
+    def __init__(self, down: bool = False):
+        self.down = down
+        self.counters = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture(autouse=True)
+def no_replica(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_READ_URL", None)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_bumps_user_and_global_generations(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(result_cache, "get_redis", lambda: redis)
+    cache = SearchResultCache(prefix="search")
+
+    await cache.invalidate_user("u1")
+    await cache.invalidate_user(None)
+
+    assert redis.counters == {"search:gen:u1": 1, f"search:gen:{GLOBAL_SCOPE}": 2}
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_survives_redis_outage(monkeypatch):
+    monkeypatch.setattr(result_cache, "get_redis", lambda: FakeRedis(down=True))
+    cache = SearchResultCache(prefix="search")
+
+    # Runs after the database commit, so it must not fail the request
+    await cache.invalidate_user("u1")
+
+    assert cache.get_stats()["errors"] == 1
@@ -0,0 +1,252 @@
+# @author: fatima bashir
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from app.core.config import settings
+from app.services import search as search_module
+from app.services.bm25 import BM25Index
+from app.services.embedding_batcher import EmbeddingCoalescer
+from app.services.registry import registry
+from app.services.search import SearchService
+
+CHUNKS = {
+    "c1": ("u1", "python backend developer"),
+    "c2": ("u1", "rust systems programmer"),
+    "c3": ("u2", "python data scientist"),
+    "c4": ("u2", "marketing team lead"),
+}
+
+
+class FakeEmbeddingService:
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+
+class FakeSession:
+    """
+    A read session that, like AsyncSession, cannot run two statements at once.
+
+    Semantic statements return every chunk of the filtered user, keyword
+    statements the chunks containing a query word, and the BM25 hydrate
+    statement the requested ids.
+    """
+
+    active = 0
+    max_active = 0
+
+    def __init__(self):
+        self.busy = False
+        self.statements = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement, params=None):
+        if self.busy:
+            raise AssertionError("concurrent statements on one session")
+        self.busy = True
+        FakeSession.active += 1
+        FakeSession.max_active = max(FakeSession.max_active, FakeSession.active)
+        try:
+            # Yield so overlapping statements from other tasks would be caught
+            await asyncio.sleep(0.001)
+            self.statements += 1
+            return SimpleNamespace(fetchall=lambda: self._rows(params or {}))
+        finally:
+            FakeSession.active -= 1
+            self.busy = False
+
+    @staticmethod
+    def _rows(params):
+        def row(chunk_id, **scores):
+            return SimpleNamespace(
+                id=chunk_id, content=CHUNKS[chunk_id][1], metadata={}, source=None, **scores
+            )
+
+        user_id = params.get("user_id")
+        scoped = [c for c, (owner, _) in CHUNKS.items() if user_id in (None, owner)]
+        if "ids" in params:
+            return [row(chunk_id) for chunk_id in params["ids"]]
+        if "embedding" in params:
+            return [row(chunk_id, similarity_score=0.6) for chunk_id in scoped]
+        if "query" in params:
+            words = set(params["query"].split())
+            return [
+                row(chunk_id, bm25_score=1.0)
+                for chunk_id in scoped
+                if words & set(CHUNKS[chunk_id][1].split())
+            ]
+        return []
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    created: List[FakeSession] = []
+
+    def session_factory():
+        session = FakeSession()
+        created.append(session)
+        return session
+
+    index = BM25Index()
+    for chunk_id, (user_id, content) in CHUNKS.items():
+        index.add(chunk_id, content, user_id=user_id)
+    index.loaded = True
+
+    monkeypatch.setattr(search_module, "ReadSessionLocal", session_factory)
+    monkeypatch.setattr(search_module, "bm25_index", index)
+    monkeypatch.setattr(settings, "LOCAL_VECTOR_STORE", False)
+    monkeypatch.setattr(settings, "QUANTIZED_SEARCH", False)
+    monkeypatch.setattr(settings, "ANN_ITERATIVE_SCAN", "off")
+    FakeSession.active = FakeSession.max_active = 0
+    return created
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("keyword_engine, mode", [
+    ("bm25", "fused"),
+    ("bm25", "parallel"),
+    ("trigram", "parallel"),
+])
+async def test_hybrid_search_batch(sessions, monkeypatch, keyword_engine, mode):
+    monkeypatch.setattr(settings, "KEYWORD_ENGINE", keyword_engine)
+    monkeypatch.setattr(settings, "HYBRID_SEARCH_MODE", mode)
+    embedding_service = FakeEmbeddingService()
+    service = SearchService(db=None, embedding_service=embedding_service)
+    queries = [
+        {"query": "python", "user_id": "u1", "top_k": 2},
+        {"query": "rust", "user_id": "u1", "top_k": 1},
+        {"query": "python", "user_id": "u2", "top_k": 2},
+        {"query": "marketing", "user_id": "u2", "top_k": 2},
+    ] * 2
+
+    outcomes = await service.hybrid_search_batch(queries, concurrency=4)
+
+    # One embedding call for the whole batch; every query holds a read
+    # session and its keyword leg a second one
+    assert embedding_service.calls == [[query["query"] for query in queries]]
+    assert len(sessions) == 2 * len(queries)
+    assert all(session.statements > 0 for session in sessions)
+    # Queries and legs overlap across sessions, never on one
+    assert 1 < FakeSession.max_active <= 2 * 4
+
+    assert len(outcomes) == len(queries)
+    for query, (results, elapsed_ms) in zip(queries, outcomes):
+        assert elapsed_ms >= 0
+        assert len(results) <= query["top_k"]
+        assert all(CHUNKS[result["id"]][0] == query["user_id"] for result in results)
+        assert query["query"] in results[0]["content"]
+        assert results[0]["keyword_score"] > 0
+
+
+@pytest.mark.asyncio
+async def test_parallel_mode_runs_both_legs_at_once(sessions, monkeypatch):
+    monkeypatch.setattr(settings, "KEYWORD_ENGINE", "trigram")
+    monkeypatch.setattr(settings, "HYBRID_SEARCH_MODE", "parallel")
+    db = FakeSession()
+    service = SearchService(db=db, embedding_service=FakeEmbeddingService())
+
+    results = await service.hybrid_search(
+        "python", user_id="u1", top_k=2, query_embedding=[0.1, 0.2, 0.3]
+    )
+
+    assert results[0]["id"] == "c1"
+    # Semantic on the request session, keyword on its own read session
+    assert db.statements == 1
+    assert [session.statements for session in sessions] == [1]
+    assert FakeSession.max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_fused_mode_uses_local_store_when_it_serves_the_user(sessions, monkeypatch):
+    monkeypatch.setattr(settings, "KEYWORD_ENGINE", "trigram")
+    monkeypatch.setattr(settings, "HYBRID_SEARCH_MODE", "fused")
+
+    class LocalStore:
+        name = "local"
+
+        async def search(self, query_embedding, top_k, user_id=None, **options):
+            return [
+                {"id": "c2", "content": CHUNKS["c2"][1], "similarity_score": 0.9,
+                 "metadata": {}, "source": None}
+            ]
+
+    store = LocalStore()
+    monkeypatch.setattr(search_module, "local_vector_store", store)
+    monkeypatch.setattr(
+        search_module, "select_vector_store", lambda db, user_id, backend=None: store
+    )
+    db = FakeSession()
+    service = SearchService(db=db, embedding_service=FakeEmbeddingService())
+
+    results = await service.hybrid_search(
+        "python", user_id="u1", top_k=2, query_embedding=[0.1, 0.2, 0.3]
+    )
+
+    # Semantic hits come from the local store; only the keyword leg hits SQL
+    assert {result["id"] for result in results} == {"c1", "c2"}
+    assert db.statements == 1
+    assert sessions == []
+
+
+def test_fused_statement_quantizes_the_semantic_leg():
+    exact = search_module._fused_statement("", "weighted", "trigram").text
+    quantized = search_module._fused_statement("", "weighted", "trigram", "embedding_half").text
+
+    assert "embedding_bits" not in exact
+    assert "dc.embedding_bits <~> binary_quantize" in quantized
+    assert "LIMIT :quantized_candidates" in quantized
+    assert "dc.embedding_half <=>" in quantized
+
+
+@pytest.mark.asyncio
+async def test_fused_mode_honours_quantized_search(monkeypatch):
+    monkeypatch.setattr(settings, "KEYWORD_ENGINE", "trigram")
+    monkeypatch.setattr(settings, "HYBRID_SEARCH_MODE", "fused")
+    monkeypatch.setattr(settings, "LOCAL_VECTOR_STORE", False)
+    monkeypatch.setattr(settings, "QUANTIZED_SEARCH", True)
+    monkeypatch.setattr(settings, "QUANTIZED_RESCORE_COLUMN", "embedding")
+    monkeypatch.setattr(settings, "QUANTIZED_CANDIDATE_MULTIPLIER", 10)
+    monkeypatch.setattr(settings, "HYBRID_CANDIDATE_MULTIPLIER", 2)
+    executed = []
+
+    class RecordingSession:
+        async def execute(self, statement, params):
+            executed.append((statement.text, params))
+            return SimpleNamespace(fetchall=lambda: [])
+
+    service = SearchService(db=RecordingSession(), embedding_service=FakeEmbeddingService())
+
+    assert await service.hybrid_search(
+        "python", top_k=3, query_embedding=[0.1, 0.2, 0.3]
+    ) == []
+    (sql, params), = executed
+    assert "dc.embedding_bits <~> binary_quantize" in sql
+    assert params["candidates"] == 6
+    assert params["quantized_candidates"] == 60
+    assert service.semantic_ann_limit(params["candidates"]) == 60
+
+
+def test_search_services_share_the_registry_coalescer(monkeypatch):
+    embedding_service = FakeEmbeddingService()
+    shared = EmbeddingCoalescer(embedding_service)
+    monkeypatch.setattr(registry, "embedding_service", embedding_service)
+    monkeypatch.setattr(registry, "embedding_coalescer", shared)
+
+    first, second = SearchService(db=None), SearchService(db=None)
+
+    assert first.embedding_coalescer is shared
+    assert second.embedding_coalescer is shared
+    # A different embedding service cannot reuse the shared queue
+    other = SearchService(db=None, embedding_service=FakeEmbeddingService())
+    assert other.embedding_coalescer is not shared
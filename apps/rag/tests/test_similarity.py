@@ -0,0 +1,77 @@
+# @author: fatima bashir
+import numpy as np
+import pytest
+
+from app.services.similarity import CandidateMatrix, normalize_rows, top_k_similar
+
+
+def reference_top_k(queries, candidates, top_k):
+    """Full sort of cosine similarities, as the original implementation did."""
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+    candidates = np.asarray(candidates, dtype=np.float64)
+    scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ (
+        candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    ).T
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+    return order, np.take_along_axis(scores, order, axis=1)
+
+
+def test_normalize_rows():
+    vectors = [[3.0, 4.0], [0.0, 0.0], [0.0, -2.0]]
+
+    matrix = normalize_rows(vectors)
+
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, [[0.6, 0.8], [0.0, 0.0], [0.0, -1.0]], rtol=1e-6)
+    # A single vector becomes one row, and the input is not modified
+    source = np.array([1.0, 1.0])
+    assert normalize_rows(source).shape == (1, 2)
+    np.testing.assert_array_equal(source, [1.0, 1.0])
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 49])
+def test_top_k_matches_full_sort(top_k):
+    rng = np.random.default_rng(3)
+    queries = rng.normal(size=(4, 16))
+    candidates = rng.normal(size=(50, 16))
+
+    indices, scores = top_k_similar(queries, candidates, top_k)
+    expected_indices, expected_scores = reference_top_k(queries, candidates, top_k)
+
+    assert indices.shape == scores.shape == (4, top_k)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+    # Best first
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+def test_top_k_larger_than_candidates_returns_all_sorted():
+    candidates = [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]
+
+    indices, scores = top_k_similar([1.0, 0.2], candidates, top_k=10)
+
+    assert indices.tolist() == [[0, 2, 1]]
+    assert scores.shape == (1, 3)
+
+
+def test_candidate_matrix_is_reusable_and_prenormalized():
+    candidates = [[2.0, 0.0], [0.0, 5.0]]
+    matrix = CandidateMatrix(candidates)
+
+    assert len(matrix) == 2 and matrix.dimension == 2
+    indices, scores = top_k_similar([[0.0, 1.0], [1.0, 0.0]], matrix, top_k=1)
+    assert indices.tolist() == [[1], [0]]
+    np.testing.assert_allclose(scores, [[1.0], [1.0]])
+
+
+@pytest.mark.parametrize("candidates", [[], np.empty((0, 4)), CandidateMatrix([])])
+def test_empty_candidates(candidates):
+    indices, scores = top_k_similar([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]], candidates, 5)
+
+    assert indices.shape == scores.shape == (2, 0)
+    assert indices.tolist() == [[], []]
+
+
+def test_zero_top_k():
+    indices, scores = top_k_similar([1.0, 0.0], [[1.0, 0.0]], top_k=0)
+    assert indices.shape == scores.shape == (1, 0)
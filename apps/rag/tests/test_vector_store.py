@@ -0,0 +1,214 @@
+# @author: fatima bashir
+from contextlib import asynccontextmanager
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import vector_store
+from app.services.vector_store import LocalVectorStore
+
+DIMENSION = 8
+
+
+def unit(axis: int, noise: float = 0.0) -> list:
+    """A vector along one axis, optionally tilted toward the next one."""
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    vector[axis] = 1.0
+    vector[(axis + 1) % DIMENSION] = noise
+    return vector.tolist()
+
+
+def chunk(chunk_id: str, document_id: str, embedding: list) -> dict:
+    return {
+        "id": chunk_id,
+        "artifact_id": document_id,
+        "content": f"content of {chunk_id}",
+        "embedding": embedding,
+        "metadata": {"document_id": document_id, "chunk_index": 0},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(path=str(tmp_path), dimension=DIMENSION)
+    store._reset(expected_rows=0)
+    store.loaded = True
+    store.complete = True
+    yield store
+    asyncio.run(store.close())
+
+
+async def populate(store: LocalVectorStore) -> None:
+    await store.add(
+        [chunk("a1", "resume-a", unit(0)), chunk("a2", "resume-a", unit(0, 0.5))],
+        user_id="alice", artifact_type="resume", source="Alice CV",
+    )
+    await store.add(
+        [chunk("a3", "note-a", unit(0, 0.2))],
+        user_id="alice", artifact_type="note", source="Alice notes",
+    )
+    await store.add(
+        [chunk("b1", "resume-b", unit(0, 0.1)), chunk("b2", "resume-b", unit(3))],
+        user_id="bob", artifact_type="resume", source="Bob CV",
+    )
+
+
+@pytest.fixture(params=["exact", "graph"])
+def search_mode(request, monkeypatch):
+    # Every filtered subset is small, so force the HNSW path explicitly
+    if request.param == "graph":
+        monkeypatch.setattr(settings, "LOCAL_VECTOR_EXACT_MAX_ROWS", 0)
+    return request.param
+
+
+@pytest.mark.asyncio
+async def test_search_filters_by_user_and_type(store, search_mode):
+    await populate(store)
+
+    results = await store.search(unit(0), top_k=10, user_id="alice")
+    assert [r["id"] for r in results] == ["a1", "a3", "a2"]
+    assert results[0]["source"] == "Alice CV"
+    assert results[0]["content"] == "content of a1"
+    assert results[0]["similarity_score"] == pytest.approx(1.0, abs=1e-5)
+
+    results = await store.search(
+        unit(0), top_k=10, user_id="alice", filters={"artifact_type": "resume"}
+    )
+    assert [r["id"] for r in results] == ["a1", "a2"]
+
+    results = await store.search(unit(0), top_k=10, filters={"artifact_type": "resume"})
+    assert [r["id"] for r in results] == ["a1", "b1", "a2"]
+
+    assert await store.search(unit(0), top_k=10, user_id="carol") == []
+    assert await store.search(
+        unit(0), top_k=10, filters={"artifact_type": "cover_letter"}
+    ) == []
+
+
+@pytest.mark.asyncio
+async def test_search_applies_top_k_and_threshold(store, search_mode):
+    await populate(store)
+
+    results = await store.search(unit(0), top_k=2)
+    assert [r["id"] for r in results] == ["a1", "b1"]
+
+    # b2 is orthogonal to the query and never clears the threshold
+    results = await store.search(unit(0), top_k=10, similarity_threshold=0.5)
+    assert "b2" not in {r["id"] for r in results}
+    results = await store.search(unit(0), top_k=10, similarity_threshold=0.95)
+    assert [r["id"] for r in results] == ["a1", "b1", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_remove_document(store, search_mode):
+    await populate(store)
+
+    assert await store.remove_document("resume-a") == 2
+    assert await store.remove_document("resume-a") == 0
+    assert store.rows == 3
+
+    results = await store.search(unit(0), top_k=10, user_id="alice")
+    assert [r["id"] for r in results] == ["a3"]
+    results = await store.search(unit(0), top_k=10)
+    assert {r["id"] for r in results} == {"b1", "a3"}
+
+
+@pytest.mark.asyncio
+async def test_add_replaces_existing_chunk(store):
+    await populate(store)
+
+    await store.add(
+        [chunk("b2", "resume-b", unit(0))],
+        user_id="bob", artifact_type="resume", source="Bob CV",
+    )
+
+    assert store.rows == 5
+    results = await store.search(unit(0), top_k=10, user_id="bob")
+    assert [r["id"] for r in results] == ["b2", "b1"]
+
+
+@pytest.mark.asyncio
+async def test_add_is_ignored_until_loaded(tmp_path):
+    store = LocalVectorStore(path=str(tmp_path), dimension=DIMENSION)
+
+    await store.add([chunk("a1", "resume-a", unit(0))], user_id="alice")
+
+    assert store.rows == 0
+    assert not store.can_serve("alice")
+
+
+@pytest.mark.asyncio
+async def test_large_tenant_moves_to_pgvector(store, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_VECTOR_MAX_TENANT_ROWS", 3)
+    await populate(store)
+
+    await store.add(
+        [chunk("b3", "note-b", unit(1)), chunk("b4", "note-b", unit(2))],
+        user_id="bob", artifact_type="note", source="Bob notes",
+    )
+
+    assert not store.can_serve("bob")
+    assert not store.can_serve()
+    assert store.can_serve("alice")
+    assert store.rows == 3
+    assert await store.search(unit(0), top_k=10, user_id="bob") == []
+
+
+class FakeCursorConnection:
+    """asyncpg stand-in that streams canned records through a cursor."""
+
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def cursor(self, query, *args):
+        self.queries.append((query, args))
+        remaining = list(self.records)
+
+        class Cursor:
+            async def fetch(self, n):
+                batch = remaining[:n]
+                del remaining[:n]
+                return batch
+
+        return Cursor()
+
+
+@pytest.mark.asyncio
+async def test_add_document_streams_committed_rows(store, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_WRITE_BATCH_SIZE", 2)
+    store._excluded.add("mallory")
+    records = [
+        {**chunk(f"d{i}", "resume-d", unit(0, i / 10)), "user_id": "dana",
+         "artifact_type": "resume", "source": "Dana CV"}
+        for i in range(5)
+    ] + [{**chunk("m1", "resume-d", unit(0)), "user_id": "mallory",
+          "artifact_type": "resume", "source": None}]
+    connection = FakeCursorConnection(records)
+
+    @asynccontextmanager
+    async def fake_vector_connection(db):
+        yield connection
+
+    monkeypatch.setattr(vector_store, "vector_connection", fake_vector_connection)
+
+    assert await store.add_document(db=None, document_id="resume-d") == 5
+    (query, args), = connection.queries
+    assert args == ("resume-d",)
+    assert "metadata->>'document_id' = $1" in query
+
+    results = await store.search(unit(0), top_k=10, user_id="dana")
+    assert [r["id"] for r in results] == [f"d{i}" for i in range(5)]
+    assert results[0]["source"] == "Dana CV"
+    assert await store.search(unit(0), top_k=10, user_id="mallory") == []
@@ -0,0 +1,38 @@
+-- @author: fatima bashir
+-- Tombstones for deleted doc_chunks rows
+-- Run with psql after vector-indexes.sql.
+--
+-- The RAG service's in-process indexes (local vector store, BM25) refresh
+-- from the database on a timer. Rows written since the last refresh are
+-- found by updated_at; deleted rows are read from this table instead of
+-- diffing every doc_chunks id. Without it the service falls back to the
+-- full id scan.
+
+CREATE TABLE IF NOT EXISTS doc_chunk_deletions (
+    chunk_id   text NOT NULL,
+    deleted_at timestamptz NOT NULL DEFAULT clock_timestamp(),
+    PRIMARY KEY (chunk_id, deleted_at)
+);
+
+CREATE INDEX IF NOT EXISTS doc_chunk_deletions_deleted_at_idx
+ON doc_chunk_deletions (deleted_at);
+
+-- One insert per DELETE statement, including cascades from artifacts
+CREATE OR REPLACE FUNCTION doc_chunks_record_deletions()
+RETURNS trigger AS $$
+BEGIN
+    INSERT INTO doc_chunk_deletions (chunk_id)
+    SELECT id FROM deleted_rows;
+
+    -- Retention must match CHUNK_TOMBSTONE_RETENTION in app/core/bulk_writer.py
+    DELETE FROM doc_chunk_deletions
+    WHERE deleted_at < now() - interval '7 days';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doc_chunks_record_deletions ON doc_chunks;
+CREATE TRIGGER doc_chunks_record_deletions
+AFTER DELETE ON doc_chunks
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION doc_chunks_record_deletions();
@@ -0,0 +1,15 @@
+-- @author: fatima bashir
+-- Indexes for finding a document's chunks
+-- Run with psql after vector-indexes.sql.
+--
+-- The RAG service deletes (and reloads) a document's chunks with
+--   WHERE artifact_id = :id OR metadata->>'document_id' = :id
+-- Chunks of user artifacts carry both; chunks ingested without a user only
+-- have the metadata key. With an index on each side Postgres combines them
+-- in a BitmapOr instead of scanning every row of doc_chunks.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doc_chunks_artifact_id_idx
+ON doc_chunks (artifact_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doc_chunks_document_id_idx
+ON doc_chunks ((metadata->>'document_id'));
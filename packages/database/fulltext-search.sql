@@ -0,0 +1,21 @@
+-- @author: fatima bashir
+-- Stored tsvector column for keyword search (KEYWORD_ENGINE=fulltext)
+-- Run with psql after vector-indexes.sql, outside a transaction (CONCURRENTLY).
+--
+-- The expression index on to_tsvector('english', content) only helps queries
+-- that repeat the exact expression; a stored generated column is computed once
+-- per write, indexed directly and read back by ts_rank_cd without re-parsing.
+-- Adding the column rewrites doc_chunks once.
+
+ALTER TABLE doc_chunks
+ADD COLUMN IF NOT EXISTS content_tsv tsvector
+GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doc_chunks_content_tsv_idx
+ON doc_chunks USING gin (content_tsv);
+
+-- Superseded by doc_chunks_content_tsv_idx
+DROP INDEX CONCURRENTLY IF EXISTS doc_chunks_content_gin_idx;
+
+-- The trigram fallback for typo-heavy queries (word_similarity, <%) uses
+-- doc_chunks_content_trgm_idx from vector-indexes.sql
@@ -0,0 +1,55 @@
+-- @author: fatima bashir
+-- Compact embedding representations for doc_chunks (requires pgvector >= 0.7.0)
+-- Run with psql after vector-indexes.sql, outside a transaction (CONCURRENTLY).
+--
+-- embedding_half  halfvec(1536)  ~3 KB/row, used to rescore candidates
+-- embedding_bits  bit(1536)      192 B/row, Hamming-distance prefilter
+--
+-- The RAG service uses them when QUANTIZED_SEARCH=true: semantic search takes
+-- the nearest QUANTIZED_CANDIDATE_MULTIPLIER * top_k chunks by Hamming distance
+-- from the small bit index, then rescores only those with embedding_half.
+-- Measure the recall impact with apps/rag/benchmarks/recall.py --quantized.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+ALTER TABLE doc_chunks ADD COLUMN IF NOT EXISTS embedding_half halfvec(1536);
+ALTER TABLE doc_chunks ADD COLUMN IF NOT EXISTS embedding_bits bit(1536);
+
+-- Derive both columns from embedding on every write, so the ingestion and
+-- bulk COPY paths keep writing only the full-precision column
+CREATE OR REPLACE FUNCTION doc_chunks_quantize_embedding()
+RETURNS trigger AS $$
+BEGIN
+    IF NEW.embedding IS NULL THEN
+        NEW.embedding_half := NULL;
+        NEW.embedding_bits := NULL;
+    ELSE
+        NEW.embedding_half := NEW.embedding::halfvec(1536);
+        NEW.embedding_bits := binary_quantize(NEW.embedding)::bit(1536);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doc_chunks_quantize_embedding ON doc_chunks;
+CREATE TRIGGER doc_chunks_quantize_embedding
+BEFORE INSERT OR UPDATE OF embedding ON doc_chunks
+FOR EACH ROW EXECUTE FUNCTION doc_chunks_quantize_embedding();
+
+-- Backfill existing rows; rerun until it reports UPDATE 0 on large tables
+UPDATE doc_chunks
+SET embedding = embedding
+WHERE id IN (
+    SELECT id FROM doc_chunks
+    WHERE embedding IS NOT NULL AND embedding_bits IS NULL
+    LIMIT 50000
+);
+
+-- Hamming-distance index over the bit vectors (~30x smaller than a float32 HNSW index)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doc_chunks_embedding_bits_idx
+ON doc_chunks USING hnsw (embedding_bits bit_hamming_ops);
+
+-- Once QUANTIZED_SEARCH is enabled and recall is verified, the float32 ANN
+-- index is no longer read by semantic search and can be dropped to free RAM.
+-- Keep it while hybrid search (its semantic leg) still uses full precision.
+-- DROP INDEX CONCURRENTLY IF EXISTS doc_chunks_embedding_idx;
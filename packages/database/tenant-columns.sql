@@ -0,0 +1,70 @@
+-- @author: fatima bashir
+-- Denormalized ownership columns on doc_chunks for tenant filter pushdown
+-- Run with psql after vector-indexes.sql, outside a transaction (CONCURRENTLY).
+--
+-- Once this has run, set TENANT_FILTER_PUSHDOWN=true in the RAG service:
+-- search then filters on dc.user_id / dc.artifact_type instead of joining
+-- artifacts, so the planner sees per-tenant statistics and the filter can
+-- be applied inside the index scan. Tenants above ANN_TENANT_INDEX_MIN_ROWS
+-- get a partial ANN index (WHERE user_id = ...) built by the RAG service
+-- (AnnIndexManager.maintain); smaller tenants are served by the btree index
+-- below with an exact scan of their own rows.
+
+ALTER TABLE doc_chunks ADD COLUMN IF NOT EXISTS user_id text;
+ALTER TABLE doc_chunks ADD COLUMN IF NOT EXISTS artifact_type text;
+
+-- Copy ownership from the artifact on every chunk write
+CREATE OR REPLACE FUNCTION doc_chunks_set_owner()
+RETURNS trigger AS $$
+BEGIN
+    IF NEW.artifact_id IS NULL THEN
+        NEW.user_id := NULL;
+        NEW.artifact_type := NULL;
+    ELSE
+        SELECT a.user_id, a.type INTO NEW.user_id, NEW.artifact_type
+        FROM artifacts a
+        WHERE a.id = NEW.artifact_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doc_chunks_set_owner ON doc_chunks;
+CREATE TRIGGER doc_chunks_set_owner
+BEFORE INSERT OR UPDATE OF artifact_id ON doc_chunks
+FOR EACH ROW EXECUTE FUNCTION doc_chunks_set_owner();
+
+-- Keep chunks in sync when an artifact changes owner or type
+CREATE OR REPLACE FUNCTION artifacts_propagate_owner()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE doc_chunks
+    SET user_id = NEW.user_id, artifact_type = NEW.type, updated_at = now()
+    WHERE artifact_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS artifacts_propagate_owner ON artifacts;
+CREATE TRIGGER artifacts_propagate_owner
+AFTER UPDATE OF user_id, type ON artifacts
+FOR EACH ROW
+WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id OR OLD.type IS DISTINCT FROM NEW.type)
+EXECUTE FUNCTION artifacts_propagate_owner();
+
+-- Backfill existing rows; rerun until it reports UPDATE 0 on large tables
+UPDATE doc_chunks dc
+SET user_id = a.user_id, artifact_type = a.type
+FROM artifacts a
+WHERE dc.artifact_id = a.id
+    AND dc.user_id IS NULL
+    AND dc.id IN (
+        SELECT id FROM doc_chunks
+        WHERE artifact_id IS NOT NULL AND user_id IS NULL
+        LIMIT 50000
+    );
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS doc_chunks_user_id_type_idx
+ON doc_chunks (user_id, artifact_type);
+
+ANALYZE doc_chunks;
@@ -7,7 +7,10 @@ CREATE EXTENSION IF NOT EXISTS vector;
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Create vector indexes for similarity search
--- Note: These indexes will be created when you have actual data
+-- Note: The RAG service manages these indexes (apps/rag/app/services/ann_index.py).
+-- It sizes lists / m / ef_construction from the row count and rebuilds them
+-- concurrently as data grows; see POST /api/v1/admin/indexes/maintain.
+-- The statements below are the equivalent manual starting point.
 
 -- Index for document chunks vector similarity search
 -- CREATE INDEX CONCURRENTLY doc_chunks_embedding_idx 
@@ -20,6 +23,7 @@ CREATE EXTENSION IF NOT EXISTS pg_trgm;
 -- WITH (lists = 100);
 
 -- Text search indexes for hybrid search
+-- fulltext-search.sql replaces this with a stored tsvector column and index
 CREATE INDEX CONCURRENTLY IF NOT EXISTS doc_chunks_content_gin_idx 
 ON doc_chunks USING gin (to_tsvector('english', content));
 